@@ -1,9 +1,13 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+import hmac
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
 from app.db.documents.user import User
 from app.core.config import configurations
-import boto3
+from app.core.cognito import get_cognito_client
+from app.core.metrics import track_external
+from app.services.users import get_or_create_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
@@ -16,21 +20,14 @@ async def get_current_user(token: Optional[str] = Depends(oauth2_scheme)) -> Use
     if not token:
         # For development: create or return a default user
         # In production, this should raise HTTPException
-        default_user = await User.find_one(User.email == "default@example.com")
-        if not default_user:
-            # Create a default user if it doesn't exist
-            default_user = User(
-                email="default@example.com",
-                full_name="Default User"
-            )
-            await default_user.insert()
+        default_user, _ = await get_or_create_user("default@example.com", "Default User")
         return default_user
     
     try:
-        # Use COGNITO_REGION if AWS_REGION is not set
-        region = configurations.AWS_REGION or configurations.COGNITO_REGION
-        client = boto3.client("cognito-idp", region_name=region)
-        response = client.get_user(AccessToken=token)
+        # Shared client; the blocking Cognito call runs off the event loop
+        client = get_cognito_client()
+        with track_external("cognito", "get_user"):
+            response = await asyncio.to_thread(client.get_user, AccessToken=token)
         email = next(
             (attr["Value"] for attr in response["UserAttributes"] if attr["Name"] == "email"), None
         )
@@ -49,3 +46,14 @@ async def get_current_user(token: Optional[str] = Depends(oauth2_scheme)) -> Use
             detail=f"Authentication failed: {str(e)}"
         )
 
+
+async def require_admin_key(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Guard for operational endpoints: the X-Admin-Key header must match ADMIN_API_KEY.
+    The endpoints are disabled entirely while ADMIN_API_KEY is unset.
+    """
+    expected = configurations.ADMIN_API_KEY
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
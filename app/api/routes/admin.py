@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+
+from app.api.dependencies import require_admin_key
+from app.core.config import configurations
+from app.db.pool_metrics import pool_stats
+from app.db.query_profiler import query_profiler
+from app.services.content_screening import screening_terms
+from app.services.parent_dashboard import link_child, unlink_child
+from app.services.school_analytics import SchoolEvent, apply_events, utc_now
+from app.services.student_activity import ActivityEvent, record_activity
+from app.services.users import assign_school
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin_key)])
+
+
+@router.get("/query-stats", summary="Aggregated MongoDB query-shape statistics")
+async def get_query_stats(
+    sort: Literal["total_ms", "avg_ms", "max_ms", "count", "slow_count"] = Query("total_ms"),
+    limit: int = Query(50, ge=1, le=1000),
+    collscan_only: bool = Query(False, description="Only shapes whose sampled plan is a COLLSCAN or in-memory SORT"),
+):
+    """
+    Per query shape: call count, total/avg/max duration and slow count for this
+    worker process, plus the plan stages of the last sampled `explain`.
+    """
+    shapes = query_profiler.snapshot(sort_by=sort, limit=limit if not collscan_only else 10**6)
+    if collscan_only:
+        shapes = [shape for shape in shapes if shape["collscan"] or shape["in_memory_sort"]][:limit]
+    return {"shapes": shapes}
+
+
+@router.post("/query-stats/reset", summary="Reset query-shape statistics")
+async def reset_query_stats():
+    query_profiler.reset()
+    return {"message": "Query statistics reset", "status": "success"}
+
+
+@router.get("/pool-stats", summary="MongoDB connection pool statistics")
+async def get_pool_stats():
+    """
+    MongoDB connection pool statistics for this worker process.
+    Use checked_out / wait_queue / wait times to size MONGODB_MAX_POOL_SIZE.
+    """
+    return pool_stats.snapshot()
+
+
+class SchoolEventRequest(BaseModel):
+    school_id: str
+    class_id: str
+    grade: str
+    subject: str
+    student_id: str
+    score: Optional[float] = Field(None, ge=0, le=100)
+    minutes: float = Field(0.0, ge=0)
+    at: Optional[datetime] = None
+
+
+@router.post("/school-events", summary="Record scores and usage for school analytics")
+async def record_school_events(events: List[SchoolEventRequest]):
+    """
+    Fold a batch of scores and usage minutes into the school analytics rollups
+    and the students' own activity. Intended for the gradebook and activity
+    feeds; at most SCHOOL_EVENTS_MAX_BATCH events per call.
+    """
+    if len(events) > configurations.SCHOOL_EVENTS_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {configurations.SCHOOL_EVENTS_MAX_BATCH} events per request",
+        )
+    now = utc_now()
+    await asyncio.gather(
+        apply_events([
+            SchoolEvent(**{**event.model_dump(exclude={"at"}), "at": event.at or now})
+            for event in events
+        ]),
+        record_activity([
+            ActivityEvent(event.student_id, event.subject, event.minutes, event.score, event.at or now)
+            for event in events
+        ]),
+    )
+    return {"message": f"Recorded {len(events)} event(s)", "status": "success"}
+
+
+class SchoolAssignmentRequest(BaseModel):
+    school_id: Optional[str] = Field(None, min_length=1, description="None removes the user from their school")
+
+
+@router.put("/users/{user_id}/school", summary="Assign a user to a school")
+async def set_user_school(user_id: str, request: SchoolAssignmentRequest):
+    """
+    Set the school a user belongs to. School managers need one to see the
+    school analytics, and students' flagged messages go to their school's managers.
+    """
+    try:
+        object_id = ObjectId(user_id)
+    except InvalidId:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user ID format")
+    if not await assign_school(object_id, request.school_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return {"message": "School assigned" if request.school_id else "School removed", "status": "success"}
+
+
+class ParentLinkRequest(BaseModel):
+    parent_id: str
+    child_id: str
+
+
+@router.post("/parent-links", summary="Give a parent access to a child")
+async def create_parent_link(request: ParentLinkRequest):
+    created = await link_child(request.parent_id, request.child_id)
+    return {"message": "Link created" if created else "Link already exists", "status": "success"}
+
+
+@router.delete("/parent-links", summary="Remove a parent's access to a child")
+async def delete_parent_link(request: ParentLinkRequest):
+    if not await unlink_child(request.parent_id, request.child_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link not found")
+    return {"message": "Link removed", "status": "success"}
+
+
+@router.post("/content-screen/reload", summary="Reload the chat screening term list now")
+async def reload_screening_terms():
+    if not configurations.CONTENT_SCREEN_TERMS_FILE:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="CONTENT_SCREEN_TERMS_FILE is not set")
+    if not await screening_terms.reload(force=True):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Term list could not be loaded")
+    return {"message": f"Loaded {screening_terms.matcher.size} terms", "status": "success"}
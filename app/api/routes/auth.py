@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.core.cognito import sign_up, confirm_sign_up
 from app.schemas.user_schemas import RegisterRequest, ConfirmUserRequest
 from app.db.documents.user import User
+from app.services.users import get_or_create_user
+from app.utils.auth import get_current_user
 
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -22,39 +24,31 @@ async def register(payload: RegisterRequest):
             detail=str(e)
         )
 
-    # 2) Check if user exists in MongoDB using Beanie
-    existing_user = await User.find_one(User.email == payload.email)
-    
-    if existing_user:
-        # User already exists, return existing user info
-        return {
-            "status": "success",
-            "message": "User already exists.",
-            "user_id": str(existing_user.id),
-            "role": str(existing_user.role),
-        }
-    
-    # 3) Create new user in MongoDB using Beanie
+    # 2) Create the user in MongoDB unless it exists, in one atomic upsert
     try:
-        new_user = User(
-            email=payload.email,
-            full_name=payload.name,
-            role=payload.role
-        )
-        await new_user.insert()
-        
-        return {
-            "status": "success",
-            "message": "User registered. Please check your email for the confirmation code.",
-            "user_id": str(new_user.id),
-            "role": str(new_user.role),
-        }
+        user, created = await get_or_create_user(payload.email, payload.name, payload.role)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create user in database: {str(e)}"
         )
 
+    if not created:
+        # User already exists, return existing user info
+        return {
+            "status": "success",
+            "message": "User already exists.",
+            "user_id": str(user.id),
+            "role": str(user.role),
+        }
+
+    return {
+        "status": "success",
+        "message": "User registered. Please check your email for the confirmation code.",
+        "user_id": str(user.id),
+        "role": str(user.role),
+    }
+
 
 @router.post("/confirm", status_code=status.HTTP_200_OK)
 async def confirm(payload: ConfirmUserRequest):
@@ -72,6 +66,19 @@ async def confirm(payload: ConfirmUserRequest):
         )
 
 
+@router.get("/me", status_code=status.HTTP_200_OK)
+async def me(current_user: User = Depends(get_current_user)):
+    """
+    Return the user identified by the Cognito ID token in the Authorization header.
+    """
+    return {
+        "user_id": str(current_user.id),
+        "email": current_user.email,
+        "name": current_user.full_name,
+        "role": current_user.role,
+    }
+
+
 # Login API removed as per requirements
 
 
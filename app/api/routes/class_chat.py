@@ -1,4 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from app.db.documents.user import User
+from app.services.content_screening import screen_message
+from app.utils.auth import get_current_user
 
 router = APIRouter(prefix="/api", tags=["Class Chat"])
 
@@ -13,8 +18,18 @@ async def get_conversation_messages(chat_id: str):
     return {"message": "Success", "endpoint": "class-chat/conversation/{chat_id}/messages", "chat_id": chat_id}
 
 
+class ChatMessageRequest(BaseModel):
+    message: str = Field(..., min_length=1, max_length=4000)
+
+
 @router.post("/class-chat/conversation/{chat_id}/message", summary="Post message to conversation")
-async def post_conversation_message(chat_id: str):
+async def post_conversation_message(
+    chat_id: str,
+    payload: ChatMessageRequest,
+    sender: User = Depends(get_current_user),
+):
+    # Flags are reported to moderators in the background; the sender is not told
+    screen_message(chat_id, sender, payload.message)
     return {"message": "Success", "endpoint": "class-chat/conversation/{chat_id}/message", "chat_id": chat_id}
 
 
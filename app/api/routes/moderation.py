@@ -0,0 +1,161 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+
+from app.core.config import configurations
+from app.db.documents.user import User, UserRole
+from app.services import moderation
+from app.utils.auth import get_current_user
+
+router = APIRouter(prefix="/api/moderation", tags=["Moderation"])
+
+MODERATOR_ROLES = {UserRole.teacher, UserRole.school_manager}
+
+
+class ModerationItemResponse(BaseModel):
+    alert_id: str
+    notification_id: Optional[str] = None
+    user_id: Optional[str] = None
+    title: str
+    priority: int
+    status: str
+    created_at: datetime
+    claimed_by: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    lease_expires_at: datetime
+    claims: int
+    action: Optional[str] = None
+    details: Optional[str] = None
+
+
+class ClaimResponse(BaseModel):
+    items: List[ModerationItemResponse]
+
+
+class ResolveRequest(BaseModel):
+    action: Literal["ignore", "resolve", "action_taken"]
+    details: Optional[str] = Field(None, description="Optional reason or details for the action")
+
+
+class ModerationActionResponse(BaseModel):
+    id: str
+    alert_id: str
+    actor: Optional[str] = None
+    action: str
+    details: Optional[str] = None
+    at: datetime
+
+
+class ActionHistoryResponse(BaseModel):
+    actions: List[ModerationActionResponse]
+    # Pass as `before` to get the next (older) page; null on the last page
+    next_before: Optional[str] = None
+
+
+class QueueStatsResponse(BaseModel):
+    available: int
+    leased: int
+    oldest_open_age_seconds: float
+
+
+async def require_moderator(current_user: User = Depends(get_current_user)) -> str:
+    """The user id of the calling moderator"""
+    if current_user.role not in MODERATOR_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Teachers and school managers only")
+    return str(current_user.id)
+
+
+def _item_response(item) -> ModerationItemResponse:
+    return ModerationItemResponse(lease_expires_at=item["available_at"], **item)
+
+
+async def _history(limit: int, before: Optional[str], **scope) -> ActionHistoryResponse:
+    if before is not None and not (len(before) == 24 and ObjectId.is_valid(before)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid before cursor")
+    entries = await moderation.action_history(
+        before=ObjectId(before) if before else None, limit=limit + 1, **scope,
+    )
+    page = entries[:limit]
+    return ActionHistoryResponse(
+        actions=[ModerationActionResponse(id=str(entry["_id"]), **entry) for entry in page],
+        next_before=str(page[-1]["_id"]) if len(entries) > limit else None,
+    )
+
+
+@router.post("/claim", response_model=ClaimResponse, summary="Claim flagged-content alerts to work on")
+async def claim(
+    count: int = Query(1, ge=1, description="How many alerts to claim"),
+    moderator: str = Depends(require_moderator),
+):
+    """
+    Lease up to `count` open alerts, highest priority and oldest first. Each
+    lease lasts MODERATION_LEASE_SECONDS; extend it while working or the alert
+    goes back to the queue.
+    """
+    if count > configurations.MODERATION_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {configurations.MODERATION_MAX_BATCH} alerts per claim",
+        )
+    items = await moderation.claim_batch(moderator, count)
+    return ClaimResponse(items=[_item_response(item) for item in items])
+
+
+@router.post("/{alert_id}/extend", response_model=ModerationItemResponse, summary="Extend a claim")
+async def extend(alert_id: str, moderator: str = Depends(require_moderator)):
+    item = await moderation.extend_lease(alert_id, moderator)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You no longer hold this alert")
+    return _item_response(item)
+
+
+@router.post("/{alert_id}/release", status_code=status.HTTP_204_NO_CONTENT, summary="Return a claimed alert")
+async def release(alert_id: str, moderator: str = Depends(require_moderator)):
+    if not await moderation.release(alert_id, moderator):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You no longer hold this alert")
+
+
+@router.post("/{alert_id}/resolve", response_model=ModerationItemResponse, summary="Act on an alert")
+async def resolve(alert_id: str, request: ResolveRequest, moderator: str = Depends(require_moderator)):
+    """
+    Close an alert you hold, or one nobody holds. Exactly one moderator's
+    action is applied; everyone else gets 409.
+    """
+    try:
+        item = await moderation.complete(alert_id, request.action, moderator, request.details)
+    except moderation.ModerationConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Alert is already handled or claimed by another moderator",
+        )
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flagged content alert not found")
+    return _item_response(item)
+
+
+@router.get("/history", response_model=ActionHistoryResponse, summary="A moderator's audit history")
+async def moderator_history(
+    moderator_id: Optional[str] = Query(None, description="Defaults to the caller"),
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="next_before from the previous page"),
+    moderator: str = Depends(require_moderator),
+):
+    return await _history(limit, before, actor=moderator_id or moderator)
+
+
+@router.get("/{alert_id}/history", response_model=ActionHistoryResponse, summary="An alert's audit history")
+async def alert_history(
+    alert_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="next_before from the previous page"),
+    moderator: str = Depends(require_moderator),
+):
+    return await _history(limit, before, alert_id=alert_id)
+
+
+@router.get("/stats", response_model=QueueStatsResponse, summary="Moderation queue depth")
+async def stats(moderator: str = Depends(require_moderator)):
+    return await moderation.queue_stats()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+
+from app.db.documents.user import User, UserRole
+from app.services.parent_dashboard import get_parent_dashboard
+from app.utils.auth import get_current_user
+
+router = APIRouter(prefix="/api/parent", tags=["Parent"])
+
+
+class ChildStandingResponse(BaseModel):
+    school_id: str
+    grade: str
+    average_score: Optional[float] = None
+    assessments: int
+    minutes: float
+    last_active_at: Optional[datetime] = None
+    low_score: bool
+
+
+class ChildNotificationResponse(BaseModel):
+    id: str
+    title: str
+    type: str
+    status: str
+    created_at: datetime
+
+
+class ChildNotificationsResponse(BaseModel):
+    unread: int
+    recent: List[ChildNotificationResponse]
+
+
+class ChildSummaryResponse(BaseModel):
+    child_id: str
+    name: Optional[str] = None
+    email: Optional[str] = None
+    standings: List[ChildStandingResponse]
+    notifications: ChildNotificationsResponse
+
+
+class ParentDashboardResponse(BaseModel):
+    parent_id: str
+    children: List[ChildSummaryResponse]
+    unread_notifications: int
+    children_needing_attention: int
+
+
+async def require_parent(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.parent:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Parents only")
+    return current_user
+
+
+@router.get("/dashboard", response_model=ParentDashboardResponse, summary="All linked children at a glance")
+async def get_dashboard(parent: User = Depends(require_parent)):
+    """
+    Progress, at-risk flags and recent notifications for every child linked to
+    the calling parent. Cached per parent and refreshed when a child's data
+    changes.
+    """
+    return await get_parent_dashboard(str(parent.id))
@@ -0,0 +1,176 @@
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import BaseModel
+
+from app.api.dependencies import require_admin_key
+from app.core.config import configurations
+from app.db.documents.roster_import import RosterImport, RosterImportRow, RosterRowStatus
+from app.services.roster_import import SOURCE_FORMATS, RosterParseError, create_import, retry_failed_rows
+
+router = APIRouter(
+    prefix="/api/admin/roster-imports",
+    tags=["Roster Imports"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+class RosterImportResponse(BaseModel):
+    """Progress of a roster import"""
+    id: str
+    status: str
+    source_format: str
+    total_rows: int
+    counts: Dict[str, int]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class RosterRowResponse(BaseModel):
+    row_number: int
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    status: str
+    user_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RosterRowListResponse(BaseModel):
+    rows: List[RosterRowResponse]
+    # Pass as `after_row` to fetch the next page; null on the last page
+    next_after_row: Optional[int] = None
+
+
+def _to_response(job: RosterImport) -> RosterImportResponse:
+    return RosterImportResponse(
+        id=str(job.id),
+        status=job.status,
+        source_format=job.source_format,
+        total_rows=job.total_rows,
+        counts=job.counts,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+async def _read_roster(request: Request) -> bytes:
+    """The request body, rejected with 413 as soon as it exceeds ROSTER_MAX_BYTES"""
+    limit = configurations.ROSTER_MAX_BYTES
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Roster is larger than {limit} bytes",
+    )
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _get_import(import_id: str) -> RosterImport:
+    try:
+        job = await RosterImport.get(ObjectId(import_id))
+    except InvalidId:
+        job = None
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Roster import not found")
+    return job
+
+
+@router.post(
+    "",
+    response_model=RosterImportResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start a roster import",
+)
+async def start_roster_import(
+    request: Request,
+    source_format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, alias="format", description="csv or ndjson; inferred from Content-Type when omitted"
+    ),
+    default_role: Literal["student", "teacher", "parent", "school_manager"] = Query(
+        "student", description="Role for rows without a role column"
+    ),
+):
+    """
+    Upload a roster as the raw request body: CSV with an `email` column and
+    optional `name` and `role` columns, or NDJSON objects with the same keys.
+
+    Rows are stored and provisioned in the background (Cognito user, then
+    `User` document); poll the import and its rows for progress.
+    """
+    if source_format is None:
+        content_type = request.headers.get("content-type", "")
+        source_format = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    if source_format not in SOURCE_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported roster format")
+
+    body = await _read_roster(request)
+    if not body.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Roster is empty")
+    try:
+        job = await create_import(body, source_format, default_role)
+    except RosterParseError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start roster import: {str(e)}"
+        )
+    return _to_response(job)
+
+
+@router.get("/{import_id}", response_model=RosterImportResponse, summary="Get roster import progress")
+async def get_roster_import(import_id: str):
+    return _to_response(await _get_import(import_id))
+
+
+@router.get("/{import_id}/rows", response_model=RosterRowListResponse, summary="Per-row import status")
+async def get_roster_import_rows(
+    import_id: str,
+    row_status: Optional[Literal["pending", "provisioned", "created", "existing", "failed", "invalid"]] = Query(
+        None, alias="status", description="Only rows with this status"
+    ),
+    after_row: int = Query(0, ge=0, description="Return rows after this row number"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    await _get_import(import_id)
+    query = {"import_id": import_id, "row_number": {"$gt": after_row}}
+    if row_status:
+        query["status"] = row_status
+    rows = await RosterImportRow.find(query).sort("+row_number").limit(limit).to_list()
+    return RosterRowListResponse(
+        rows=[
+            RosterRowResponse(
+                row_number=row.row_number,
+                email=row.email,
+                full_name=row.full_name,
+                role=row.role,
+                status=row.status,
+                user_id=row.user_id,
+                error=row.error,
+            )
+            for row in rows
+        ],
+        next_after_row=rows[-1].row_number if len(rows) == limit else None,
+    )
+
+
+@router.post("/{import_id}/retry", summary="Requeue failed rows")
+async def retry_roster_import(import_id: str):
+    """Queue rows that failed in Cognito or MongoDB again; invalid rows are not retried"""
+    await _get_import(import_id)
+    requeued = await retry_failed_rows(import_id)
+    return {"status": "success", "requeued": requeued, "message": f"{requeued} {RosterRowStatus.FAILED.value} row(s) requeued"}
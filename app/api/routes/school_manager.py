@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from app.db.documents.user import User, UserRole
+from app.services.school_analytics import at_risk_students, class_breakdown, grade_breakdown, school_overview
+from app.utils.auth import get_current_user
+
+router = APIRouter(prefix="/api/school-manager", tags=["School Manager"])
+
+
+class UsageDayResponse(BaseModel):
+    day: str
+    minutes: float
+    sessions: int
+
+
+class GradeSubjectResponse(BaseModel):
+    grade: str
+    subject: str
+    average_score: Optional[float] = None
+    assessments: int
+    minutes: float
+
+
+class ClassAnalyticsResponse(GradeSubjectResponse):
+    class_id: str
+
+
+class AtRiskStudentResponse(BaseModel):
+    student_id: str
+    name: Optional[str] = None
+    grade: str
+    average_score: Optional[float] = None
+    assessments: int
+    last_active_at: Optional[datetime] = None
+    # low_score and/or inactive
+    reasons: List[str]
+
+
+class SchoolOverviewResponse(BaseModel):
+    school_id: str
+    students: int
+    average_score: Optional[float] = None
+    total_minutes: float
+    active_students_7d: int
+    at_risk_students: int
+    usage: List[UsageDayResponse]
+    grades: List[GradeSubjectResponse]
+    most_at_risk: List[AtRiskStudentResponse]
+
+
+async def require_school_manager(current_user: User = Depends(get_current_user)) -> str:
+    """The school id of the calling school manager"""
+    if current_user.role != UserRole.school_manager:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="School managers only")
+    if not current_user.school_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No school is assigned to this account")
+    return current_user.school_id
+
+
+@router.get("/analytics", response_model=SchoolOverviewResponse, summary="School-wide analytics dashboard")
+async def get_school_analytics(
+    days: int = Query(30, ge=1, le=90, description="Days of daily usage to include"),
+    school_id: str = Depends(require_school_manager),
+):
+    """
+    Totals, 7-day active students, daily usage, averages per grade and subject
+    and the ten most at-risk students, all read from precomputed rollups.
+    """
+    return await school_overview(school_id, days=days)
+
+
+@router.get("/analytics/grades", response_model=List[GradeSubjectResponse], summary="Averages per grade and subject")
+async def get_grade_analytics(school_id: str = Depends(require_school_manager)):
+    return await grade_breakdown(school_id)
+
+
+@router.get("/analytics/classes", response_model=List[ClassAnalyticsResponse], summary="Averages per class")
+async def get_class_analytics(
+    grade: Optional[str] = None,
+    school_id: str = Depends(require_school_manager),
+):
+    return await class_breakdown(school_id, grade=grade)
+
+
+@router.get("/analytics/at-risk", response_model=List[AtRiskStudentResponse], summary="At-risk students")
+async def get_at_risk_students(
+    grade: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    school_id: str = Depends(require_school_manager),
+):
+    """
+    Students averaging below AT_RISK_SCORE over at least AT_RISK_MIN_ASSESSMENTS
+    scores, or inactive for AT_RISK_INACTIVE_DAYS, lowest average first.
+    """
+    return await at_risk_students(school_id, grade=grade, limit=limit)
@@ -1,51 +1,166 @@
-from fastapi import APIRouter
+import re
+from datetime import datetime
+from typing import Dict, Generic, List, Optional, TypeVar
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.db.documents.login_event import LoginEventKind
+from app.db.documents.user import User
+from app.db.documents.user_settings import (
+    PersonalInfo,
+    Preferences,
+    SystemSettings,
+    TutorCustomization,
+    TwoFactorSettings,
+)
+from app.services import avatars
+from app.services.login_history import login_history
+from app.services.user_settings import SECTIONS, get_settings, update_section
+from app.utils.auth import get_current_user
 
 router = APIRouter(prefix="/api", tags=["Settings"])
 
+# Original ("<sha256>.<ext>") or thumbnail ("<sha256>-<size>.webp")
+AVATAR_KEY = re.compile(r"[0-9a-f]{64}(?:\.(?:jpg|png|gif|webp)|-\d+\.webp)")
+AVATAR_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-@router.get("/user/personal-info", summary="Get personal info")
-async def get_personal_info():
-    return {"message": "Success", "endpoint": "user/personal-info"}
 
+S = TypeVar("S", bound=BaseModel)
 
-@router.put("/user/personal-info", summary="Update personal info")
-async def update_personal_info():
-    return {"message": "Success", "endpoint": "user/personal-info"}
 
+class SectionResponse(BaseModel, Generic[S]):
+    # Settings version after this read or update, shared by all sections
+    version: int
+    settings: S
 
-@router.get("/user/tutor-customization", summary="Get tutor customization")
-async def get_tutor_customization():
-    return {"message": "Success", "endpoint": "user/tutor-customization"}
 
+class AllSettingsResponse(BaseModel):
+    version: int
+    personal_info: PersonalInfo
+    tutor_customization: TutorCustomization
+    preferences: Preferences
+    system_settings: SystemSettings
+    two_factor: TwoFactorSettings
 
-@router.put("/user/tutor-customization", summary="Update tutor customization")
-async def update_tutor_customization():
-    return {"message": "Success", "endpoint": "user/tutor-customization"}
 
+class AvatarResponse(BaseModel):
+    # "original" and one URL per thumbnail size
+    urls: Dict[str, str]
+    updated_at: datetime
 
-@router.get("/user/preferences", summary="Get user preferences")
-async def get_preferences():
-    return {"message": "Success", "endpoint": "user/preferences"}
 
+class LoginEventResponse(BaseModel):
+    at: datetime
+    kind: str
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
 
-@router.put("/user/preferences", summary="Update user preferences")
-async def update_preferences():
-    return {"message": "Success", "endpoint": "user/preferences"}
 
+class LoginHistoryResponse(BaseModel):
+    events: List[LoginEventResponse]
+    # Pass as `before` to get the next (older) page; null on the last page
+    next_before: Optional[datetime] = None
 
-@router.get("/user/system-settings", summary="Get system settings")
-async def get_system_settings():
-    return {"message": "Success", "endpoint": "user/system-settings"}
 
+async def _section(current_user: User, section: str) -> SectionResponse:
+    settings = await get_settings(str(current_user.id))
+    return SectionResponse(version=settings.version, settings=getattr(settings, section))
 
-@router.put("/user/system-settings", summary="Update system settings")
-async def update_system_settings():
-    return {"message": "Success", "endpoint": "user/system-settings"}
 
+async def _update_section(current_user: User, section: str, changes: BaseModel) -> SectionResponse:
+    if not changes.model_fields_set:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No settings to update")
+    settings = await update_section(str(current_user.id), section, changes)
+    return SectionResponse(version=settings.version, settings=getattr(settings, section))
 
-@router.patch("/user/avatar", summary="Update user avatar")
-async def patch_avatar():
-    return {"message": "Success", "endpoint": "user/avatar"}
+
+@router.get("/user/settings", response_model=AllSettingsResponse, summary="Get all settings sections")
+async def get_all_settings(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Every settings section in one response. The ETag is the settings version:
+    send it back as If-None-Match to get 304 when nothing changed.
+    """
+    settings = await get_settings(str(current_user.id))
+    etag = f'"{settings.version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    body = AllSettingsResponse(**settings.model_dump(include={"version", *SECTIONS}))
+    return JSONResponse(content=body.model_dump(mode="json"), headers={"ETag": etag})
+
+
+@router.get("/user/personal-info", response_model=SectionResponse[PersonalInfo], summary="Get personal info")
+async def get_personal_info(current_user: User = Depends(get_current_user)):
+    return await _section(current_user, "personal_info")
+
+
+@router.put("/user/personal-info", response_model=SectionResponse[PersonalInfo], summary="Update personal info")
+async def update_personal_info(changes: PersonalInfo, current_user: User = Depends(get_current_user)):
+    return await _update_section(current_user, "personal_info", changes)
+
+
+@router.get("/user/tutor-customization", response_model=SectionResponse[TutorCustomization],
+            summary="Get tutor customization")
+async def get_tutor_customization(current_user: User = Depends(get_current_user)):
+    return await _section(current_user, "tutor_customization")
+
+
+@router.put("/user/tutor-customization", response_model=SectionResponse[TutorCustomization],
+            summary="Update tutor customization")
+async def update_tutor_customization(changes: TutorCustomization, current_user: User = Depends(get_current_user)):
+    return await _update_section(current_user, "tutor_customization", changes)
+
+
+@router.get("/user/preferences", response_model=SectionResponse[Preferences], summary="Get user preferences")
+async def get_preferences(current_user: User = Depends(get_current_user)):
+    return await _section(current_user, "preferences")
+
+
+@router.put("/user/preferences", response_model=SectionResponse[Preferences], summary="Update user preferences")
+async def update_preferences(changes: Preferences, current_user: User = Depends(get_current_user)):
+    return await _update_section(current_user, "preferences", changes)
+
+
+@router.get("/user/system-settings", response_model=SectionResponse[SystemSettings], summary="Get system settings")
+async def get_system_settings(current_user: User = Depends(get_current_user)):
+    return await _section(current_user, "system_settings")
+
+
+@router.put("/user/system-settings", response_model=SectionResponse[SystemSettings],
+            summary="Update system settings")
+async def update_system_settings(changes: SystemSettings, current_user: User = Depends(get_current_user)):
+    return await _update_section(current_user, "system_settings", changes)
+
+
+@router.patch("/user/avatar", response_model=AvatarResponse, summary="Update user avatar")
+async def patch_avatar(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Upload a new avatar, either as multipart/form-data (field `file`) or as the raw
+    image body. JPEG, PNG, GIF and WebP up to AVATAR_MAX_BYTES are accepted.
+    """
+    try:
+        info = await avatars.set_avatar(current_user.id, request)
+    except avatars.AvatarTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except avatars.InvalidAvatar as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return AvatarResponse(urls=avatars.avatar_urls(info), updated_at=info.updated_at)
+
+
+@router.get("/avatars/{key}", summary="Avatar image", response_class=StreamingResponse)
+async def get_avatar(key: str, request: Request):
+    """Avatar URLs change whenever the image does, so responses are cached for a year"""
+    if not AVATAR_KEY.fullmatch(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    headers = {"Cache-Control": AVATAR_CACHE_CONTROL, "ETag": f'"{key}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    stored = await avatars.avatar_storage().open(key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    headers["Content-Length"] = str(stored.size)
+    return StreamingResponse(stored.chunks, media_type=stored.content_type, headers=headers)
 
 
 @router.post("/user/change-password", summary="Change password")
@@ -53,13 +168,31 @@ async def change_password():
     return {"message": "Success", "endpoint": "user/change-password"}
 
 
-@router.put("/user/2fa", summary="Update 2FA settings")
-async def update_two_factor():
-    return {"message": "Success", "endpoint": "user/2fa"}
-
-
-@router.get("/user/login-history", summary="Get login history")
-async def get_login_history():
-    return {"message": "Success", "endpoint": "user/login-history"}
+@router.put("/user/2fa", response_model=SectionResponse[TwoFactorSettings], summary="Update 2FA settings")
+async def update_two_factor(changes: TwoFactorSettings, current_user: User = Depends(get_current_user)):
+    return await _update_section(current_user, "two_factor", changes)
+
+
+@router.get("/user/login-history", response_model=LoginHistoryResponse, summary="Get login history")
+async def get_login_history(
+    since: Optional[datetime] = Query(None, description="Only events at or after this time"),
+    before: Optional[datetime] = Query(None, description="Only events before this time; next_before of the previous page"),
+    kind: Optional[LoginEventKind] = Query(None, description="login or token_use"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The caller's sign-ins and authenticated requests, newest first. Events are
+    written in batches, so the last second or so may not be listed yet.
+    """
+    events = await login_history(
+        str(current_user.id), since=since, before=before,
+        kind=kind.value if kind else None, limit=limit + 1,
+    )
+    page = events[:limit]
+    return LoginHistoryResponse(
+        events=page,
+        next_before=page[-1]["at"] if len(events) > limit else None,
+    )
 
 
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 
+from app.core.single_flight import single_flight
+from app.db.documents.user import User
+from app.services.student_activity import student_dashboard
+from app.utils.auth import get_current_user
+
 router = APIRouter(
     prefix='/api/student',
     tags=['Student']
@@ -10,18 +15,14 @@ router = APIRouter(
 # 📊 DASHBOARD API
 # ------------------------
 @router.get('/dashboard', summary='Get student dashboard data')
-async def get_student_dashboard():
-    return {
-        'userId': 'demo-user-123',
-        'progress': 85,
-        'weekly_activity': [60, 75, 80, 90, 100],
-        'subjects': [
-            {'name': 'Math', 'progress': 90},
-            {'name': 'Science', 'progress': 80},
-            {'name': 'English', 'progress': 85}
-        ],
-        'recommendations': ['Revise Algebra', 'Watch Physics Lecture 3']
-    }
+async def get_student_dashboard(current_user: User = Depends(get_current_user)):
+    """
+    Average score (`progress`), minutes per week for the last
+    STUDENT_ACTIVITY_WEEKS weeks (`weekly_activity`, oldest first, one entry
+    per week in `weeks`) and average score and minutes per subject, read from
+    the student's activity rollup.
+    """
+    return {'userId': str(current_user.id), **await student_dashboard(str(current_user.id))}
 
 # ------------------------
 # 🧭 LEARNING PATH API
@@ -66,6 +67,7 @@ async def get_lesson_history():
     }
 
 @router.get('/lessons/{lesson_id}', summary='Fetch detailed lesson view')
+@single_flight('lesson_details')
 async def get_lesson_details(lesson_id: str):
     lessons = {
         'L001': {
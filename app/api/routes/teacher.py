@@ -1,5 +1,10 @@
 import datetime
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.core.single_flight import single_flight
+from app.db.documents.user import User
+from app.services.content_screening import screen_message
+from app.utils.auth import get_current_user
 
 teacher_router = APIRouter(prefix="/api/teacher", tags=["Teacher"])
 
@@ -56,6 +61,7 @@ async def get_teacher_classes():
 
 
 @teacher_router.get("/classes/{class_id}", summary="Get class details")
+@single_flight("teacher_class_details")
 async def get_class_details(class_id: str):
     return {
         "class_id": class_id,
@@ -104,6 +110,7 @@ async def update_grades(class_id: str, payload: dict):
 # 📈 REPORTS
 # ----------------------------------------------------------------------
 @teacher_router.get("/reports/class-performance", summary="Get class performance report")
+@single_flight("teacher_reports")
 async def get_teacher_reports():
     return {
         "overall_avg_score": 85,
@@ -139,7 +146,9 @@ async def get_chat_messages(chat_id: str):
 
 
 @teacher_router.post("/class-chat/conversation/{chat_id}/message", summary="Send a new message")
-async def post_chat_message(chat_id: str, payload: dict):
+async def post_chat_message(chat_id: str, payload: dict, sender: User = Depends(get_current_user)):
+    if isinstance(payload.get("message"), str):
+        screen_message(chat_id, sender, payload["message"])
     return {"message": "Message sent successfully", "chat_id": chat_id, "payload": payload}
 
 
@@ -4,12 +4,25 @@ User routes using Beanie ODM for all database operations.
 This module uses Beanie's async methods for all MongoDB operations.
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Literal, Optional
 from bson import ObjectId
 
-from app.models.user_model import UserCreate, UserResponse
-from app.db.documents.user import User as UserDocument
+from app.core.config import configurations
+from app.models.user_model import (
+    UserBatchRequest,
+    UserBatchResponse,
+    UserCreate,
+    UserDirectoryEntry,
+    UserDirectoryResponse,
+    UserResponse,
+)
+from app.db.documents.user import User as UserDocument, UserRole
+from app.services.user_directory import InvalidCursor, list_directory
+from app.services.users import get_or_create_user, get_users_by_ids
+from app.utils.auth import get_current_user
+
+DIRECTORY_ROLES = {UserRole.teacher, UserRole.school_manager}
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -20,22 +33,14 @@ async def create_user(user_data: UserCreate):
     Create a new user using Beanie ODM.
     """
     try:
-        # Check if user already exists
-        existing_user = await UserDocument.find_one(UserDocument.email == user_data.email)
-        if existing_user:
+        # Insert unless the email is taken, in one atomic upsert
+        new_user, created = await get_or_create_user(user_data.email, user_data.name, user_data.role)
+        if not created:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User with this email already exists"
             )
         
-        # Create new user using Beanie
-        new_user = UserDocument(
-            email=user_data.email,
-            full_name=user_data.name,
-            role=user_data.role
-        )
-        await new_user.insert()
-        
         return {
             "status": "success",
             "message": "User created successfully",
@@ -81,6 +86,80 @@ async def get_all_users(limit: int = 100):
         )
 
 
+@router.get("/directory", response_model=UserDirectoryResponse)
+async def get_user_directory(
+    role: Optional[UserRole] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Case-insensitive prefix"),
+    search_by: Literal["name", "email"] = "name",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: UserDocument = Depends(get_current_user),
+):
+    """
+    Page through users sorted by name (or email), optionally filtered by role
+    and a case-insensitive prefix. Pass `next_cursor` back as `cursor` for the
+    next page; it is null on the last page.
+    """
+    if current_user.role not in DIRECTORY_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and school managers can browse the user directory"
+        )
+    try:
+        users, next_cursor = await list_directory(
+            role=role.value if role else None,
+            prefix=q,
+            search_by=search_by,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return UserDirectoryResponse(
+        users=[
+            UserDirectoryEntry(id=str(user.id), name=user.full_name, email=user.email, role=user.role)
+            for user in users
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.post("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    request: UserBatchRequest,
+    current_user: UserDocument = Depends(get_current_user),
+):
+    """
+    Look up several users by id in one call, e.g. to render a participant list.
+
+    Users come back in request order with duplicates removed; malformed and
+    unknown ids are reported in `missing`. Results may be up to
+    USER_CACHE_TTL_SECONDS old.
+    """
+    if len(request.ids) > configurations.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {configurations.USER_BATCH_MAX_IDS} ids per request"
+        )
+
+    # Only 24-hex-digit strings; ObjectId() would also accept any 12-character string
+    requested = {
+        user_id: ObjectId(user_id) if len(user_id) == 24 and ObjectId.is_valid(user_id) else None
+        for user_id in dict.fromkeys(request.ids)
+    }
+    found = await get_users_by_ids(oid for oid in requested.values() if oid is not None)
+
+    users, missing = [], []
+    for user_id, oid in requested.items():
+        user = found.get(oid) if oid is not None else None
+        if user is None:
+            missing.append(user_id)
+        else:
+            users.append(UserDirectoryEntry(id=str(user.id), name=user.full_name, email=user.email, role=user.role))
+    return UserBatchResponse(users=users, missing=missing)
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(user_id: str):
     """
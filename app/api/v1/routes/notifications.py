@@ -11,7 +11,11 @@ from pydantic import BaseModel, Field, ConfigDict, field_serializer
 from bson import ObjectId
 from datetime import datetime
 
+from app.core import events
 from app.db.documents.notification import Notification
+from app.db.documents.user import User, DigestCadence
+from app.services import moderation
+from app.services.notification_digest import digest_stats
 
 
 router = APIRouter(prefix="/api", tags=["Notifications"])
@@ -59,6 +63,26 @@ class FlaggedContentActionRequest(BaseModel):
     details: Optional[str] = Field(None, description="Optional reason or details for the action")
 
 
+class DigestSettingsRequest(BaseModel):
+    """Request model for updating the notification digest cadence"""
+    cadence: DigestCadence = Field(..., description="Digest cadence: immediate, hourly or daily")
+
+
+class DigestSettingsResponse(BaseModel):
+    """Response model for the notification digest cadence"""
+    user_id: str
+    cadence: DigestCadence
+
+
+class DigestStatsResponse(BaseModel):
+    """Digest counters for this worker process"""
+    notifications_generated: int
+    notifications_emailed: int
+    digests_sent: int
+    digests_skipped: int
+    emails_saved: int
+
+
 class SuccessResponse(BaseModel):
     """Standard success response"""
     message: str
@@ -163,6 +187,7 @@ async def mark_notifications_read(
             if notif.status != "read":
                 notif.status = "read"
                 await notif.save()
+                events.publish("notifications.changed", user_id=notif.user_id)
                 modified_count += 1
         
         if modified_count == 0:
@@ -217,6 +242,7 @@ async def mark_notification_read(
         # Update status
         notification.status = "read"
         await notification.save()
+        events.publish("notifications.changed", user_id=notification.user_id)
         
         return SuccessResponse(
             message="Notification marked as read successfully"
@@ -264,6 +290,7 @@ async def dismiss_notification(
         # Soft delete by setting status to dismissed
         notification.status = "dismissed"
         await notification.save()
+        events.publish("notifications.changed", user_id=notification.user_id)
         
         return SuccessResponse(
             message="Notification dismissed successfully"
@@ -340,6 +367,69 @@ async def search_notifications(
         )
 
 
+# ============================================================================
+# Digest Endpoints
+# ============================================================================
+
+async def _get_digest_user(user_id: str) -> User:
+    try:
+        object_id = ObjectId(user_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user ID format"
+        )
+    user = await User.get(object_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+
+@router.get("/notifications/digest-settings", response_model=DigestSettingsResponse)
+async def get_digest_settings(
+    user_id: str = Query(..., description="User ID whose digest cadence to fetch")
+):
+    """
+    Get how often notification emails are sent to a user.
+    """
+    user = await _get_digest_user(user_id)
+    return DigestSettingsResponse(user_id=user_id, cadence=user.notification_digest)
+
+
+@router.put("/notifications/digest-settings", response_model=DigestSettingsResponse)
+async def update_digest_settings(
+    request: DigestSettingsRequest,
+    user_id: str = Query(..., description="User ID whose digest cadence to update")
+):
+    """
+    Set the notification email cadence: immediate, hourly or daily.
+
+    Applies to the next digest window; an already open window keeps its schedule.
+    """
+    user = await _get_digest_user(user_id)
+    try:
+        await user.set({User.notification_digest: request.cadence})
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating digest settings: {str(e)}"
+        )
+    return DigestSettingsResponse(user_id=user_id, cadence=request.cadence)
+
+
+@router.get("/notifications/digest-stats", response_model=DigestStatsResponse)
+async def get_digest_stats():
+    """
+    Notifications generated versus digest emails sent by this worker process.
+
+    `emails_saved` is the number of emails avoided by coalescing.
+    """
+    return DigestStatsResponse(**digest_stats.snapshot())
+
+
 # ============================================================================
 # Flagged Content Endpoints
 # ============================================================================
@@ -351,29 +441,28 @@ async def ignore_flagged_content(
     """
     Mark the related flagged content notification as ignored.
     
-    Updates the notification status to "dismissed" for the flagged content alert.
+    Closes the alert's moderation queue item and updates its notifications to
+    "dismissed". Returns 409 if the alert was already handled or is claimed by
+    a moderator.
     """
     try:
-        # Find notification related to this alert_id
-        notification = await Notification.find_one(
-            Notification.type == "flagged_content",
-            Notification.related_resource_id == alert_id
-        )
+        item = await moderation.complete(alert_id, "ignore")
         
-        if not notification:
+        if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Flagged content notification not found"
             )
         
-        # Update status to dismissed (ignored)
-        notification.status = "dismissed"
-        await notification.save()
-        
         return SuccessResponse(
             message=f"Flagged content alert {alert_id} has been ignored"
         )
         
+    except moderation.ModerationConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Flagged content alert is already handled or claimed by a moderator"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -391,8 +480,10 @@ async def take_action_on_flagged_content(
     """
     Mark the flagged content as "resolved" or "action_taken".
     
-    Updates the notification and marks appropriate action.
-    Accepts action type and optional details.
+    Closes the alert's moderation queue item, marks its notifications as read
+    and records the action in the moderation audit log. Accepts action type
+    and optional details. Returns 409 if the alert was already handled or is
+    claimed by a moderator.
     """
     try:
         # Validate action
@@ -403,26 +494,14 @@ async def take_action_on_flagged_content(
                 detail=f"Invalid action. Must be one of: {', '.join(valid_actions)}"
             )
         
-        # Find notification related to this alert_id
-        notification = await Notification.find_one(
-            Notification.type == "flagged_content",
-            Notification.related_resource_id == alert_id
-        )
+        item = await moderation.complete(alert_id, request.action, details=request.details)
         
-        if not notification:
+        if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Flagged content notification not found"
             )
         
-        # Update notification - mark as read and add action details to message if provided
-        notification.status = "read"
-        if request.details:
-            notification.message += f" | Action: {request.action} - {request.details}"
-        else:
-            notification.message += f" | Action: {request.action}"
-        await notification.save()
-        
         action_message = f"Flagged content alert {alert_id} marked as {request.action}"
         if request.details:
             action_message += f": {request.details}"
@@ -431,6 +510,11 @@ async def take_action_on_flagged_content(
             message=action_message
         )
         
+    except moderation.ModerationConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Flagged content alert is already handled or claimed by a moderator"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -438,4 +522,3 @@ async def take_action_on_flagged_content(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing flagged content action: {str(e)}"
         )
-
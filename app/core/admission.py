@@ -0,0 +1,304 @@
+"""
+Admission control: an adaptive concurrency limit with priority queueing and load shedding.
+
+Each worker admits at most `limit` requests at once. The limit follows the
+gradient between no-load and current request latency: while latency stays
+within ADMISSION_LATENCY_TOLERANCE of its no-load level the limit grows, and
+when a slow dependency (Mongo, Cognito) pushes latency up the limit shrinks, so
+excess requests wait in a short priority queue instead of piling up inside the
+app. A request that cannot be admitted within ADMISSION_QUEUE_TIMEOUT_MS, or
+that finds the queue full, is rejected at once with 503 and `Retry-After`.
+
+Health and metrics are never limited, auth requests are admitted before other
+interactive requests, and reports/exports may only use ADMISSION_BATCH_SHARE of
+the limit and are shed instead of queued.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from enum import IntEnum
+from typing import List, Optional, Tuple
+
+from app.core.metrics import gauge_lines, registry
+
+CRITICAL_PATHS = (
+    "/api/health", "/api/health/live", "/api/health/ready", "/api/health/deep", "/api/ping-db", "/api/metrics",
+)
+AUTH_PREFIXES = ("/api/auth/",)
+BATCH_PREFIXES = ("/api/admin/",)
+BATCH_SEGMENTS = ("/reports/", "/export")
+
+
+class Priority(IntEnum):
+    """Admission priority of a request, lower is admitted first"""
+    critical = 0
+    auth = 1
+    interactive = 2
+    batch = 3
+
+
+def classify(path: str) -> Priority:
+    if path in CRITICAL_PATHS:
+        return Priority.critical
+    if path.startswith(AUTH_PREFIXES):
+        return Priority.auth
+    if path.startswith(BATCH_PREFIXES) or any(segment in path for segment in BATCH_SEGMENTS):
+        return Priority.batch
+    return Priority.interactive
+
+
+ADMISSION_QUEUE_DELAY = registry.histogram(
+    "admission_queue_delay_seconds", "Time requests waited for admission",
+    ("priority",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ADMISSION_SHED = registry.counter(
+    "admission_shed_total", "Requests rejected with 503 by admission control",
+    ("priority", "reason"),
+)
+
+
+class AdaptiveLimiter:
+    """
+    Gradient concurrency limiter.
+
+    `min_rtt` is the lowest request latency seen over the last one to two
+    windows of MIN_RTT_WINDOW seconds, standing in for the no-load latency, and
+    `short_rtt` a fast moving average of current latency. Each sample moves the
+    limit towards `limit * gradient + sqrt(limit)`, where the gradient is
+    `tolerance * min_rtt / short_rtt` clamped to [0.5, 1]; the square-root term
+    is the headroom that lets the limit grow while latency is healthy.
+    """
+
+    SMOOTHING = 0.2
+    SHORT_WEIGHT = 0.1
+    MIN_RTT_WINDOW = 30.0
+
+    def __init__(
+        self,
+        initial_limit: int = 50,
+        min_limit: int = 8,
+        max_limit: int = 500,
+        tolerance: float = 2.0,
+        max_queue: int = 100,
+        queue_timeout: float = 0.5,
+        batch_share: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.batch_share = batch_share
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        # Batch requests among `in_flight`
+        self.batch_in_flight = 0
+        self._short_rtt = 0.0
+        # Minimum latency of the previous and the current window
+        self._previous_min_rtt = math.inf
+        self._window_min_rtt = math.inf
+        self._window_started = time.monotonic()
+        # (priority, sequence, future); cancelled futures are skipped lazily
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._queued = 0
+        self._sequence = itertools.count()
+        self.shed = 0
+
+    @classmethod
+    def from_settings(cls) -> "AdaptiveLimiter":
+        from app.core.config import configurations
+
+        return cls(
+            initial_limit=configurations.ADMISSION_INITIAL_LIMIT,
+            min_limit=configurations.ADMISSION_MIN_LIMIT,
+            max_limit=configurations.ADMISSION_MAX_LIMIT,
+            tolerance=configurations.ADMISSION_LATENCY_TOLERANCE,
+            max_queue=configurations.ADMISSION_MAX_QUEUE,
+            queue_timeout=configurations.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+            batch_share=configurations.ADMISSION_BATCH_SHARE,
+        )
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1"""
+        backlog = self.in_flight + self._queued
+        return max(1, min(30, math.ceil(backlog * (self._short_rtt or 0.1) / max(self.limit, 1))))
+
+    async def acquire(self, priority: Priority) -> Optional[str]:
+        """
+        Wait for a slot. Returns None once admitted (the caller must `release`),
+        or the reason the request was shed.
+        """
+        if priority is Priority.critical:
+            return None
+        if priority is Priority.batch:
+            if self.batch_in_flight >= self._limit * self.batch_share:
+                return "batch_share"
+            if self.in_flight >= self._limit:
+                return "limit"
+            self.batch_in_flight += 1
+            self.in_flight += 1
+            return None
+        if self.in_flight < self._limit and not self._queued:
+            self.in_flight += 1
+            return None
+        if self._queued >= self.max_queue:
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._queued += 1
+        # asyncio.wait does not cancel the future, so a slot handed over right at
+        # the deadline is never lost
+        try:
+            await asyncio.wait((future,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The request went away while queued: give up its place, or the slot
+            # `_drain` may already have handed it
+            if future.done():
+                self.in_flight -= 1
+                self._drain()
+            else:
+                self._abandon(future)
+            raise
+        if future.done():
+            return None
+        self._abandon(future)
+        return "queue_timeout"
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        future.cancel()
+        self._queued -= 1
+        if len(self._waiters) > 2 * self.max_queue:
+            self._waiters = [entry for entry in self._waiters if not entry[2].cancelled()]
+            heapq.heapify(self._waiters)
+
+    def release(self, priority: Priority, latency: Optional[float]) -> None:
+        """Free the slot taken by `acquire` and feed the request latency to the limit"""
+        if priority is Priority.critical:
+            return
+        if latency is not None:
+            self._update(latency)
+        if priority is Priority.batch:
+            self.batch_in_flight -= 1
+        self.in_flight -= 1
+        self._drain()
+
+    def _drain(self) -> None:
+        while self._waiters and self.in_flight < self._limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._queued -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    @property
+    def min_rtt(self) -> float:
+        return min(self._previous_min_rtt, self._window_min_rtt)
+
+    def _update(self, rtt: float) -> None:
+        now = time.monotonic()
+        if now - self._window_started >= self.MIN_RTT_WINDOW:
+            self._previous_min_rtt = self._window_min_rtt
+            self._window_min_rtt = math.inf
+            self._window_started = now
+        self._window_min_rtt = min(self._window_min_rtt, rtt)
+        if not self._short_rtt:
+            self._short_rtt = rtt
+            return
+        self._short_rtt += (rtt - self._short_rtt) * self.SHORT_WEIGHT
+        gradient = max(0.5, min(1.0, self.tolerance * self.min_rtt / self._short_rtt))
+        # Only grow while the limit is actually being used
+        if gradient >= 1.0 and self.in_flight < self._limit / 2:
+            return
+        target = self._limit * gradient + math.sqrt(self._limit)
+        self._limit += (target - self._limit) * self.SMOOTHING
+        self._limit = min(max(self._limit, self.min_limit), self.max_limit)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "batch_in_flight": self.batch_in_flight,
+            "queued": self._queued,
+            "short_rtt_ms": round(self._short_rtt * 1000, 3),
+            "min_rtt_ms": round(self.min_rtt * 1000, 3) if self.min_rtt != math.inf else None,
+            "shed": self.shed,
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware admitting requests through an `AdaptiveLimiter`"""
+
+    def __init__(self, app, limiter: Optional[AdaptiveLimiter] = None):
+        self.app = app
+        self.limiter = limiter or AdaptiveLimiter.from_settings()
+        _limiters.append(self.limiter)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope["path"])
+        queued_at = time.perf_counter()
+        reason = await self.limiter.acquire(priority)
+        admitted_at = time.perf_counter()
+        ADMISSION_QUEUE_DELAY.observe(priority.name, value=admitted_at - queued_at)
+        if reason is not None:
+            self.limiter.shed += 1
+            ADMISSION_SHED.inc(priority.name, reason)
+            await self._reject(send)
+            return
+
+        latency = None
+        try:
+            await self.app(scope, receive, send)
+            latency = time.perf_counter() - admitted_at
+        finally:
+            # Failed requests say nothing reliable about latency
+            self.limiter.release(priority, latency)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.limiter.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+_limiters: List[AdaptiveLimiter] = []
+
+
+def _collect_admission():
+    snapshots = [limiter.snapshot() for limiter in _limiters]
+    return (
+        gauge_lines("admission_concurrency_limit", "Current adaptive concurrency limit",
+                    [({}, snapshot["limit"]) for snapshot in snapshots])
+        + gauge_lines("admission_in_flight", "Requests holding an admission slot",
+                      [({}, snapshot["in_flight"]) for snapshot in snapshots])
+        + gauge_lines("admission_queue_depth", "Requests waiting for admission",
+                      [({}, snapshot["queued"]) for snapshot in snapshots])
+    )
+
+
+registry.add_collector(_collect_admission)
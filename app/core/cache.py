@@ -0,0 +1,64 @@
+"""
+Small in-process caches.
+
+Entries live for `ttl` seconds and the least recently used entry is evicted once
+`maxsize` is reached. Each worker process has its own copy, so a cached value
+can be up to `ttl` seconds stale after a write in another worker.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+from app.core.metrics import registry
+
+V = TypeVar("V")
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "In-process cache lookups by cache and result", ("cache", "result"),
+)
+
+
+class TTLCache(Generic[V]):
+    """LRU mapping whose entries expire `ttl` seconds after they are set"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            CACHE_REQUESTS.inc(self.name, "miss")
+            return None
+        self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc(self.name, "hit")
+        return entry[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, V]:
+        """The cached values among `keys`; absent and expired keys are left out"""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
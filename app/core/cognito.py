@@ -1,43 +1,135 @@
 from typing import Dict, Any, Optional
-import boto3
-from botocore.exceptions import ClientError
+import threading
+import time
 import jwt
-import requests
 from datetime import datetime
 
 from app.core.config import configurations
+from app.core.http import get_http_session
+from app.core.metrics import track_external
 
+# Minimum seconds between JWKS refetches triggered by an unknown key id
+JWKS_MIN_REFRESH_SECONDS = 60
+# Seconds to wait after a failed JWKS fetch before trying again
+JWKS_FAILURE_BACKOFF_SECONDS = 5
 
-def _get_cognito_client():
-    # Use explicit Cognito region from configuration
-    session_kwargs = {"region_name": configurations.COGNITO_REGION}
-    if configurations.AWS_ACCESS_KEY_ID and configurations.AWS_SECRET_ACCESS_KEY:
-        session_kwargs.update(
-            {
-                "aws_access_key_id": configurations.AWS_ACCESS_KEY_ID,
-                "aws_secret_access_key": configurations.AWS_SECRET_ACCESS_KEY,
-            }
-        )
-    return boto3.client("cognito-idp", **session_kwargs)
+THROTTLING_ERROR_CODES = {"TooManyRequestsException", "ThrottlingException", "LimitExceededException"}
+
+
+class CognitoThrottled(ValueError):
+    """Cognito rejected the call because a request-rate quota was exceeded"""
+
+
+class CognitoUserExists(ValueError):
+    """A Cognito user with this username already exists"""
+
+_cognito_client = None
+_cognito_client_lock = threading.Lock()
+
+_jwks_lock = threading.Lock()
+_jwks_keys: Dict[str, Any] = {}
+_jwks_fetched_at = 0.0
+_jwks_retry_at = 0.0
+
+
+def get_cognito_client():
+    """
+    Return the process-wide boto3 Cognito client, creating it on first use.
+
+    boto3 is imported here rather than at module level because it dominates
+    import time; boto3 clients are thread-safe, so one instance is shared by
+    all requests and `asyncio.to_thread` calls.
+    """
+    global _cognito_client
+    if _cognito_client is None:
+        with _cognito_client_lock:
+            if _cognito_client is None:
+                import boto3
+
+                # Use explicit Cognito region from configuration
+                session_kwargs = {"region_name": configurations.COGNITO_REGION}
+                if configurations.AWS_ACCESS_KEY_ID and configurations.AWS_SECRET_ACCESS_KEY:
+                    session_kwargs.update(
+                        {
+                            "aws_access_key_id": configurations.AWS_ACCESS_KEY_ID,
+                            "aws_secret_access_key": configurations.AWS_SECRET_ACCESS_KEY,
+                        }
+                    )
+                if configurations.COGNITO_ENDPOINT_URL:
+                    session_kwargs["endpoint_url"] = configurations.COGNITO_ENDPOINT_URL
+                _cognito_client = boto3.client("cognito-idp", **session_kwargs)
+    return _cognito_client
 
 
 def get_cognito_public_keys():
     """Fetch Cognito public keys for JWT verification"""
     try:
         url = f"https://cognito-idp.{configurations.COGNITO_REGION}.amazonaws.com/{configurations.COGNITO_USER_POOL_ID}/.well-known/jwks.json"
-        response = requests.get(url)
-        response.raise_for_status()
+        with track_external("jwks", "fetch"):
+            response = get_http_session().get(url, timeout=configurations.HTTP_TIMEOUT_SECONDS)
+            response.raise_for_status()
         return response.json()
     except Exception as e:
         raise ValueError(f"Failed to fetch Cognito public keys: {str(e)}")
 
 
+def _refresh_public_keys() -> None:
+    global _jwks_keys, _jwks_fetched_at, _jwks_retry_at
+    try:
+        keys = get_cognito_public_keys()
+    except ValueError:
+        # Back off so an outage does not put a blocking fetch in every request
+        _jwks_retry_at = time.monotonic() + JWKS_FAILURE_BACKOFF_SECONDS
+        raise
+    _jwks_keys = {
+        key["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(key)
+        for key in keys["keys"]
+    }
+    _jwks_fetched_at = time.monotonic()
+
+
+def _needs_refresh(kid: str) -> bool:
+    now = time.monotonic()
+    if now < _jwks_retry_at:
+        return False
+    age = now - _jwks_fetched_at
+    return age > configurations.JWKS_CACHE_TTL_SECONDS or (kid not in _jwks_keys and age > JWKS_MIN_REFRESH_SECONDS)
+
+
+def get_public_key(kid: str):
+    """
+    Return the parsed public key for `kid` from the JWKS cache.
+
+    The JWKS is refetched when the cache is older than JWKS_CACHE_TTL_SECONDS, or
+    when an unknown kid shows up (key rotation), at most once per
+    JWKS_MIN_REFRESH_SECONDS. After a failed fetch the cached keys are used as
+    they are for JWKS_FAILURE_BACKOFF_SECONDS.
+    """
+    if _needs_refresh(kid):
+        with _jwks_lock:
+            if _needs_refresh(kid):
+                _refresh_public_keys()
+    return _jwks_keys.get(kid)
+
+
+def jwks_cache_state() -> Dict[str, Any]:
+    """Number of cached JWKS keys and seconds since they were fetched (None if never)"""
+    return {
+        "keys": len(_jwks_keys),
+        "age_seconds": round(time.monotonic() - _jwks_fetched_at, 1) if _jwks_fetched_at else None,
+    }
+
+
+def warm_public_keys() -> None:
+    """Fetch the JWKS now instead of on the first authenticated request"""
+    with _jwks_lock:
+        if not _jwks_keys:
+            _refresh_public_keys()
+
+
 def verify_cognito_token(token: str) -> Dict[str, Any]:
     """Verify and decode a Cognito JWT token"""
     try:
-        # Get the public keys
-        keys = get_cognito_public_keys()
-        
         # Decode the token header to get the key ID
         header = jwt.get_unverified_header(token)
         kid = header.get('kid')
@@ -45,12 +137,8 @@ def verify_cognito_token(token: str) -> Dict[str, Any]:
         if not kid:
             raise ValueError("Token header missing 'kid'")
         
-        # Find the matching public key
-        public_key = None
-        for key in keys['keys']:
-            if key['kid'] == kid:
-                public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                break
+        # Find the matching public key in the JWKS cache
+        public_key = get_public_key(kid)
         
         if not public_key:
             raise ValueError("No matching public key found")
@@ -81,7 +169,9 @@ def verify_cognito_token(token: str) -> Dict[str, Any]:
 
 
 def sign_up(email: str, password: str, name: Optional[str] = None) -> Dict[str, Any]:
-    client = _get_cognito_client()
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
     try:
         params: Dict[str, Any] = {
             "ClientId": configurations.COGNITO_CLIENT_ID,
@@ -91,7 +181,8 @@ def sign_up(email: str, password: str, name: Optional[str] = None) -> Dict[str,
         }
         if name:
             params["UserAttributes"].append({"Name": "name", "Value": name})
-        response = client.sign_up(**params)
+        with track_external("cognito", "sign_up"):
+            response = client.sign_up(**params)
         return response
     except ClientError as e:
         error_message = e.response.get("Error", {}).get("Message", str(e))
@@ -100,14 +191,52 @@ def sign_up(email: str, password: str, name: Optional[str] = None) -> Dict[str,
         raise ValueError(f"Unexpected error during sign_up: {str(e)}")
 
 
+def admin_create_user(email: str, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create a confirmed-email user as the pool administrator; Cognito emails the
+    temporary password. Used for bulk roster provisioning.
+    """
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
+    try:
+        attributes = [
+            {"Name": "email", "Value": email},
+            {"Name": "email_verified", "Value": "true"},
+        ]
+        if name:
+            attributes.append({"Name": "name", "Value": name})
+        with track_external("cognito", "admin_create_user"):
+            response = client.admin_create_user(
+                UserPoolId=configurations.COGNITO_USER_POOL_ID,
+                Username=email,
+                UserAttributes=attributes,
+                DesiredDeliveryMediums=["EMAIL"],
+            )
+        return response
+    except ClientError as e:
+        error = e.response.get("Error", {})
+        error_message = error.get("Message", str(e))
+        if error.get("Code") in THROTTLING_ERROR_CODES:
+            raise CognitoThrottled(f"Cognito admin_create_user throttled: {error_message}")
+        if error.get("Code") == "UsernameExistsException":
+            raise CognitoUserExists(f"Cognito admin_create_user failed: {error_message}")
+        raise ValueError(f"Cognito admin_create_user failed: {error_message}")
+    except Exception as e:
+        raise ValueError(f"Unexpected error during admin_create_user: {str(e)}")
+
+
 def confirm_sign_up(email: str, code: str) -> Dict[str, Any]:
-    client = _get_cognito_client()
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
     try:
-        response = client.confirm_sign_up(
-            ClientId=configurations.COGNITO_CLIENT_ID,
-            Username=email,
-            ConfirmationCode=code,
-        )
+        with track_external("cognito", "confirm_sign_up"):
+            response = client.confirm_sign_up(
+                ClientId=configurations.COGNITO_CLIENT_ID,
+                Username=email,
+                ConfirmationCode=code,
+            )
         return response
     except ClientError as e:
         error_message = e.response.get("Error", {}).get("Message", str(e))
@@ -117,16 +246,19 @@ def confirm_sign_up(email: str, code: str) -> Dict[str, Any]:
 
 
 def login(email: str, password: str) -> Dict[str, Any]:
-    client = _get_cognito_client()
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
     try:
-        response = client.initiate_auth(
-            ClientId=configurations.COGNITO_CLIENT_ID,
-            AuthFlow="USER_PASSWORD_AUTH",
-            AuthParameters={
-                "USERNAME": email,
-                "PASSWORD": password,
-            },
-        )
+        with track_external("cognito", "initiate_auth"):
+            response = client.initiate_auth(
+                ClientId=configurations.COGNITO_CLIENT_ID,
+                AuthFlow="USER_PASSWORD_AUTH",
+                AuthParameters={
+                    "USERNAME": email,
+                    "PASSWORD": password,
+                },
+            )
         return response
     except ClientError as e:
         error_message = e.response.get("Error", {}).get("Message", str(e))
@@ -137,12 +269,15 @@ def login(email: str, password: str) -> Dict[str, Any]:
 
 def reset_password(email: str) -> Dict[str, Any]:
     """Initiate forgot password flow in Cognito"""
-    client = _get_cognito_client()
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
     try:
-        response = client.forgot_password(
-            ClientId=configurations.COGNITO_CLIENT_ID,
-            Username=email,
-        )
+        with track_external("cognito", "forgot_password"):
+            response = client.forgot_password(
+                ClientId=configurations.COGNITO_CLIENT_ID,
+                Username=email,
+            )
         return response
     except ClientError as e:
         error_message = e.response.get("Error", {}).get("Message", str(e))
@@ -153,14 +288,17 @@ def reset_password(email: str) -> Dict[str, Any]:
 
 def confirm_forgot_password(email: str, confirmation_code: str, new_password: str) -> Dict[str, Any]:
     """Confirm forgot password with new password"""
-    client = _get_cognito_client()
+    client = get_cognito_client()
+    from botocore.exceptions import ClientError
+
     try:
-        response = client.confirm_forgot_password(
-            ClientId=configurations.COGNITO_CLIENT_ID,
-            Username=email,
-            ConfirmationCode=confirmation_code,
-            Password=new_password,
-        )
+        with track_external("cognito", "confirm_forgot_password"):
+            response = client.confirm_forgot_password(
+                ClientId=configurations.COGNITO_CLIENT_ID,
+                Username=email,
+                ConfirmationCode=confirmation_code,
+                Password=new_password,
+            )
         return response
     except ClientError as e:
         error_message = e.response.get("Error", {}).get("Message", str(e))
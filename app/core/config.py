@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from decouple import config
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
@@ -8,12 +10,65 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = config("FRONTEND_URL", default="http://localhost:3000")
     MONGODB_URL: str = config("MONGODB_URL")
 
+    # MongoDB client tuning (0 / empty leaves the driver default)
+    MONGODB_MAX_POOL_SIZE: int = config("MONGODB_MAX_POOL_SIZE", default=100, cast=int)
+    MONGODB_MIN_POOL_SIZE: int = config("MONGODB_MIN_POOL_SIZE", default=0, cast=int)
+    MONGODB_MAX_IDLE_TIME_MS: int = config("MONGODB_MAX_IDLE_TIME_MS", default=0, cast=int)
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = config("MONGODB_WAIT_QUEUE_TIMEOUT_MS", default=0, cast=int)
+    MONGODB_CONNECT_TIMEOUT_MS: int = config("MONGODB_CONNECT_TIMEOUT_MS", default=10000, cast=int)
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = config("MONGODB_SERVER_SELECTION_TIMEOUT_MS", default=10000, cast=int)
+    MONGODB_SOCKET_TIMEOUT_MS: int = config("MONGODB_SOCKET_TIMEOUT_MS", default=0, cast=int)
+    # Comma-separated, e.g. "zstd,snappy,zlib" (zstd/snappy need their python packages)
+    MONGODB_COMPRESSORS: str = config("MONGODB_COMPRESSORS", default="")
+    MONGODB_READ_CONCERN: str = config("MONGODB_READ_CONCERN", default="")
+    MONGODB_WRITE_CONCERN: str = config("MONGODB_WRITE_CONCERN", default="")
+    MONGODB_READ_PREFERENCE: str = config("MONGODB_READ_PREFERENCE", default="")
+
+    # Slow-query log
+    SLOW_QUERY_THRESHOLD_MS: float = config("SLOW_QUERY_THRESHOLD_MS", default=100.0, cast=float)
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = config("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", default=300.0, cast=float)
+    QUERY_PROFILER_MAX_SHAPES: int = config("QUERY_PROFILER_MAX_SHAPES", default=1000, cast=int)
+
     CORS_ALLOWED_ORIGINS: str = config('CORS_ALLOWED_ORIGINS')
 
     MAIL_FROM: str = config("MAIL_FROM")
     SENDGRID_API_KEY: str = config("SENDGRID_API_KEY")
 
+    # Background email queue
+    # MAIL_TRANSPORT: "sendgrid" for production, "memory" or "file" for offline use
+    MAIL_TRANSPORT: str = config("MAIL_TRANSPORT", default="sendgrid")
+    MAIL_FILE_DIR: str = config("MAIL_FILE_DIR", default="mail_outbox")
+    MAIL_WORKERS: int = config("MAIL_WORKERS", default=2, cast=int)
+    MAIL_BATCH_SIZE: int = config("MAIL_BATCH_SIZE", default=100, cast=int)
+    MAIL_MAX_ATTEMPTS: int = config("MAIL_MAX_ATTEMPTS", default=5, cast=int)
+    MAIL_RETRY_BASE_SECONDS: float = config("MAIL_RETRY_BASE_SECONDS", default=30.0, cast=float)
+    MAIL_RETRY_MAX_SECONDS: float = config("MAIL_RETRY_MAX_SECONDS", default=3600.0, cast=float)
+    MAIL_POLL_INTERVAL_SECONDS: float = config("MAIL_POLL_INTERVAL_SECONDS", default=5.0, cast=float)
+    MAIL_LEASE_SECONDS: int = config("MAIL_LEASE_SECONDS", default=300, cast=int)
+
+    # Notification digest emails
+    DIGEST_POLL_INTERVAL_SECONDS: float = config("DIGEST_POLL_INTERVAL_SECONDS", default=30.0, cast=float)
+    DIGEST_MAX_ITEMS: int = config("DIGEST_MAX_ITEMS", default=20, cast=int)
+
     # ADMIN_EMAIL: str = config("ADMIN_EMAIL")
+    # Shared key for /api/admin endpoints (sent as X-Admin-Key); empty disables them
+    ADMIN_API_KEY: str = config("ADMIN_API_KEY", default="")
+
+    # Admission control: adaptive concurrency limit and load shedding per worker
+    ADMISSION_ENABLED: bool = config("ADMISSION_ENABLED", default=True, cast=bool)
+    ADMISSION_INITIAL_LIMIT: int = config("ADMISSION_INITIAL_LIMIT", default=50, cast=int)
+    ADMISSION_MIN_LIMIT: int = config("ADMISSION_MIN_LIMIT", default=8, cast=int)
+    ADMISSION_MAX_LIMIT: int = config("ADMISSION_MAX_LIMIT", default=500, cast=int)
+    # Latency may grow to this multiple of the no-load latency before the limit shrinks
+    ADMISSION_LATENCY_TOLERANCE: float = config("ADMISSION_LATENCY_TOLERANCE", default=2.0, cast=float)
+    ADMISSION_MAX_QUEUE: int = config("ADMISSION_MAX_QUEUE", default=100, cast=int)
+    ADMISSION_QUEUE_TIMEOUT_MS: int = config("ADMISSION_QUEUE_TIMEOUT_MS", default=500, cast=int)
+    # Share of the limit that report/export requests may occupy
+    ADMISSION_BATCH_SHARE: float = config("ADMISSION_BATCH_SHARE", default=0.5, cast=float)
+
+    # Outbound HTTP (JWKS and other external calls)
+    HTTP_TIMEOUT_SECONDS: float = config("HTTP_TIMEOUT_SECONDS", default=5.0, cast=float)
+    JWKS_CACHE_TTL_SECONDS: int = config("JWKS_CACHE_TTL_SECONDS", default=3600, cast=int)
 
     # AWS credentials (optional locally if using IAM role)
     AWS_REGION: str = config("AWS_REGION", default="")
@@ -23,6 +78,89 @@ class Settings(BaseSettings):
     COGNITO_REGION: str = config("COGNITO_REGION")
     COGNITO_USER_POOL_ID: str = config("COGNITO_USER_POOL_ID")
     COGNITO_CLIENT_ID: str = config("COGNITO_CLIENT_ID")
+    # Point boto3 at a local Cognito stand-in (moto_server, cognito-local); empty uses AWS
+    COGNITO_ENDPOINT_URL: str = config("COGNITO_ENDPOINT_URL", default="")
+
+    # Bulk roster imports
+    ROSTER_MAX_ROWS: int = config("ROSTER_MAX_ROWS", default=20000, cast=int)
+    # Largest accepted upload; 10 MB leaves ~500 bytes per row at ROSTER_MAX_ROWS
+    ROSTER_MAX_BYTES: int = config("ROSTER_MAX_BYTES", default=10 * 1024 * 1024, cast=int)
+    ROSTER_CHUNK_SIZE: int = config("ROSTER_CHUNK_SIZE", default=500, cast=int)
+    # boto3 keeps 10 connections per client; higher values wait for a connection
+    ROSTER_COGNITO_CONCURRENCY: int = config("ROSTER_COGNITO_CONCURRENCY", default=8, cast=int)
+    ROSTER_THROTTLE_RETRIES: int = config("ROSTER_THROTTLE_RETRIES", default=6, cast=int)
+    ROSTER_THROTTLE_BASE_SECONDS: float = config("ROSTER_THROTTLE_BASE_SECONDS", default=0.5, cast=float)
+    ROSTER_LEASE_SECONDS: int = config("ROSTER_LEASE_SECONDS", default=300, cast=int)
+    ROSTER_POLL_INTERVAL_SECONDS: float = config("ROSTER_POLL_INTERVAL_SECONDS", default=10.0, cast=float)
+
+    # POST /api/users/batch: ids per request, and how long a looked-up user is cached
+    USER_BATCH_MAX_IDS: int = config("USER_BATCH_MAX_IDS", default=500, cast=int)
+    USER_CACHE_TTL_SECONDS: float = config("USER_CACHE_TTL_SECONDS", default=30.0, cast=float)
+    USER_CACHE_MAX_ENTRIES: int = config("USER_CACHE_MAX_ENTRIES", default=50000, cast=int)
+
+    # Prime MongoDB, Cognito and JWKS in each worker before it serves (gunicorn.conf.py turns it on)
+    WARM_UP_ON_STARTUP: bool = config("WARM_UP_ON_STARTUP", default=False, cast=bool)
+
+    # On SIGTERM, seconds a gunicorn worker keeps serving (reporting itself as draining) before it stops accepting
+    DRAIN_DELAY_SECONDS: float = config("DRAIN_DELAY_SECONDS", default=0.0, cast=float)
+
+    # How long coalesced reads (app/core/single_flight.py) keep their result; 0 only coalesces
+    SINGLE_FLIGHT_TTL_SECONDS: float = config("SINGLE_FLIGHT_TTL_SECONDS", default=1.0, cast=float)
+
+    # School analytics: a student is at risk below this average (over enough scores) or when inactive this long
+    AT_RISK_SCORE: float = config("AT_RISK_SCORE", default=60.0, cast=float)
+    AT_RISK_MIN_ASSESSMENTS: int = config("AT_RISK_MIN_ASSESSMENTS", default=3, cast=int)
+    AT_RISK_INACTIVE_DAYS: int = config("AT_RISK_INACTIVE_DAYS", default=14, cast=int)
+    SCHOOL_EVENTS_MAX_BATCH: int = config("SCHOOL_EVENTS_MAX_BATCH", default=5000, cast=int)
+
+    # Parent dashboard: children fetched at once per request, and how long a dashboard is cached
+    PARENT_DASHBOARD_CONCURRENCY: int = config("PARENT_DASHBOARD_CONCURRENCY", default=4, cast=int)
+    PARENT_DASHBOARD_CACHE_TTL_SECONDS: float = config("PARENT_DASHBOARD_CACHE_TTL_SECONDS", default=60.0, cast=float)
+    PARENT_DASHBOARD_CACHE_MAX_ENTRIES: int = config("PARENT_DASHBOARD_CACHE_MAX_ENTRIES", default=10000, cast=int)
+
+    # Moderation queue: how long a claim holds an item, most items per claim, depth sampling interval
+    MODERATION_LEASE_SECONDS: int = config("MODERATION_LEASE_SECONDS", default=300, cast=int)
+    MODERATION_MAX_BATCH: int = config("MODERATION_MAX_BATCH", default=20, cast=int)
+    MODERATION_STATS_INTERVAL_SECONDS: float = config("MODERATION_STATS_INTERVAL_SECONDS", default=15.0, cast=float)
+
+    # Chat screening: term list file (one term per line, `re:` for patterns; empty disables),
+    # how often it is checked for changes, and flagged messages buffered for reporting
+    CONTENT_SCREEN_TERMS_FILE: str = config("CONTENT_SCREEN_TERMS_FILE", default="")
+    CONTENT_SCREEN_RELOAD_SECONDS: float = config("CONTENT_SCREEN_RELOAD_SECONDS", default=30.0, cast=float)
+    CONTENT_SCREEN_QUEUE_SIZE: int = config("CONTENT_SCREEN_QUEUE_SIZE", default=1000, cast=int)
+    # Comma-separated emails of users notified about flags whose sender's school has no managers
+    CONTENT_SCREEN_FALLBACK_MODERATORS: str = config("CONTENT_SCREEN_FALLBACK_MODERATORS", default="")
+
+    # Login history: buffered event writes (batch size, flush interval, most events held) and retention
+    LOGIN_EVENTS_BATCH_SIZE: int = config("LOGIN_EVENTS_BATCH_SIZE", default=500, cast=int)
+    LOGIN_EVENTS_FLUSH_SECONDS: float = config("LOGIN_EVENTS_FLUSH_SECONDS", default=1.0, cast=float)
+    LOGIN_EVENTS_MAX_BUFFER: int = config("LOGIN_EVENTS_MAX_BUFFER", default=50000, cast=int)
+    LOGIN_HISTORY_RETENTION_DAYS: float = config("LOGIN_HISTORY_RETENTION_DAYS", default=90.0, cast=float)
+
+    # User settings read-through cache; entries are checked against the stored version on
+    # every read, the TTL only bounds how long an unused entry is kept
+    USER_SETTINGS_CACHE_TTL_SECONDS: float = config("USER_SETTINGS_CACHE_TTL_SECONDS", default=30.0, cast=float)
+    USER_SETTINGS_CACHE_MAX_ENTRIES: int = config("USER_SETTINGS_CACHE_MAX_ENTRIES", default=50000, cast=int)
+
+    # Student dashboard: weeks of activity kept in each student's rollup, and raw activity retention
+    STUDENT_ACTIVITY_WEEKS: int = config("STUDENT_ACTIVITY_WEEKS", default=8, cast=int)
+    STUDENT_ACTIVITY_RETENTION_DAYS: float = config("STUDENT_ACTIVITY_RETENTION_DAYS", default=400.0, cast=float)
+
+    # Health probes: deep check interval and per-check timeout, readiness fails above this
+    # many operations waiting for a MongoDB connection, mail is degraded past this backlog age
+    HEALTH_CHECK_INTERVAL_SECONDS: float = config("HEALTH_CHECK_INTERVAL_SECONDS", default=15.0, cast=float)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = config("HEALTH_CHECK_TIMEOUT_SECONDS", default=2.0, cast=float)
+    HEALTH_READY_MAX_WAIT_QUEUE: int = config("HEALTH_READY_MAX_WAIT_QUEUE", default=50, cast=int)
+    HEALTH_MAIL_MAX_LAG_SECONDS: float = config("HEALTH_MAIL_MAX_LAG_SECONDS", default=300.0, cast=float)
+
+    # Avatar uploads: "gridfs" (shared by all hosts) or "local" (AVATAR_STORAGE_DIR)
+    AVATAR_STORAGE: str = config("AVATAR_STORAGE", default="gridfs")
+    AVATAR_STORAGE_DIR: str = config("AVATAR_STORAGE_DIR", default="media/avatars")
+    AVATAR_MAX_BYTES: int = config("AVATAR_MAX_BYTES", default=5 * 1024 * 1024, cast=int)
+    # Comma-separated square thumbnail sizes, in pixels
+    AVATAR_THUMBNAIL_SIZES: str = config("AVATAR_THUMBNAIL_SIZES", default="64,256")
+    # Processes per server worker for CPU-bound work such as thumbnails
+    CPU_POOL_WORKERS: int = config("CPU_POOL_WORKERS", default=2, cast=int)
 
     # S3_REGION: str = config("S3_REGION")
     # S3_ACCESS_KEY_ID: str = config("S3_ACCESS_KEY_ID")
@@ -47,5 +185,19 @@ class Settings(BaseSettings):
             raise RuntimeError(f"Missing required environment variables: {keys}")
 
 
-configurations = Settings()
-configurations.validate_required()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build and validate the settings once, on first use"""
+    settings = Settings()
+    settings.validate_required()
+    return settings
+
+
+class _LazySettings:
+    """Proxy for `Settings` so importing this module stays cheap"""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+configurations = _LazySettings()
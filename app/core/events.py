@@ -0,0 +1,39 @@
+"""
+In-process publish/subscribe for cache invalidation.
+
+Writers publish a topic with keyword arguments after a change; caches subscribe
+handlers that drop the affected entries. Handlers run synchronously in the
+publisher and must be cheap. Events do not cross worker processes, so caches
+that rely on them still need a TTL to bound staleness in other workers.
+
+Topics:
+    notifications.changed    user_id: a notification was created, read or dismissed
+    school.standings_changed student_ids: scores or usage were recorded for these students
+    parent_links.changed     parent_id: a parent's children changed
+"""
+
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_subscribers: Dict[str, List[Callable[..., None]]] = defaultdict(list)
+
+
+def subscribe(topic: str, handler: Callable[..., None]) -> None:
+    if handler not in _subscribers[topic]:
+        _subscribers[topic].append(handler)
+
+
+def unsubscribe(topic: str, handler: Callable[..., None]) -> None:
+    if handler in _subscribers[topic]:
+        _subscribers[topic].remove(handler)
+
+
+def publish(topic: str, **payload) -> None:
+    for handler in list(_subscribers.get(topic, ())):
+        try:
+            handler(**payload)
+        except Exception:
+            logger.exception("Handler %r for %s failed", handler, topic)
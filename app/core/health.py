@@ -0,0 +1,182 @@
+"""
+Health probes, from cheapest to most thorough.
+
+- Liveness does no I/O: the process is up and its event loop answers.
+- Readiness fails while the worker drains (SIGTERM) or its MongoDB pool has
+  more than HEALTH_READY_MAX_WAIT_QUEUE operations waiting, and otherwise
+  sends one `ping`. Concurrent probes share that ping.
+- The deep check (MongoDB, the JWKS cache, the mail queue) runs in
+  `HealthMonitor` every HEALTH_CHECK_INTERVAL_SECONDS. The endpoint only
+  returns the last report, so probe traffic never adds database load.
+
+A check is "ok", "degraded" (serving, but something needs attention) or
+"fail"; the report takes the worst status of its checks.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import configurations
+from app.core.lifecycle import is_draining
+from app.core.metrics import gauge_lines, registry
+from app.core.single_flight import SingleFlight
+from app.db.pool_metrics import pool_stats
+
+logger = logging.getLogger(__name__)
+
+OK, DEGRADED, FAIL = "ok", "degraded", "fail"
+_SEVERITY = {OK: 0, DEGRADED: 1, FAIL: 2}
+
+_ping_flight = SingleFlight("readiness_ping")
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _pool_wait_queue() -> int:
+    return sum(server["wait_queue"] for server in pool_stats.snapshot()["servers"].values())
+
+
+async def readiness(mongo_client) -> Tuple[bool, Dict[str, Any]]:
+    """Whether this worker should get traffic, and why not"""
+    if is_draining():
+        return False, {"status": "draining"}
+    waiting = _pool_wait_queue()
+    if waiting > configurations.HEALTH_READY_MAX_WAIT_QUEUE:
+        return False, {"status": "saturated", "mongodb_wait_queue": waiting}
+    try:
+        await asyncio.wait_for(
+            _ping_flight.do("ping", lambda: mongo_client.admin.command("ping")),
+            timeout=configurations.HEALTH_CHECK_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        return False, {"status": "unavailable", "error": f"MongoDB ping failed: {e!r}"}
+    return True, {"status": "ready"}
+
+
+async def check_mongodb(mongo_client) -> Dict[str, Any]:
+    start = time.perf_counter()
+    await mongo_client.admin.command("ping")
+    return {
+        "status": OK,
+        "ping_ms": round((time.perf_counter() - start) * 1000, 2),
+        "wait_queue": _pool_wait_queue(),
+    }
+
+
+async def check_jwks() -> Dict[str, Any]:
+    """Cache state only; an empty or expired cache is refetched by the next token check"""
+    from app.core.cognito import jwks_cache_state
+
+    state = jwks_cache_state()
+    fresh = state["keys"] and state["age_seconds"] is not None \
+        and state["age_seconds"] <= configurations.JWKS_CACHE_TTL_SECONDS
+    return {"status": OK if fresh else DEGRADED, **state}
+
+
+async def check_mail_queue() -> Dict[str, Any]:
+    from app.db.documents.email_job import EmailJob, EmailJobStatus
+    from app.services.mail_queue import mail_worker_pool
+
+    collection = EmailJob.get_pymongo_collection()
+    now = utc_now()
+    oldest, dead = await asyncio.gather(
+        collection.find_one(
+            {"status": EmailJobStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+            {"next_attempt_at": 1}, sort=[("next_attempt_at", 1)],
+        ),
+        # Capped: the number only needs to say whether someone should look
+        collection.count_documents({"status": EmailJobStatus.DEAD.value}, limit=1000),
+    )
+    # Stored datetimes come back naive (UTC)
+    lag = (now.replace(tzinfo=None) - oldest["next_attempt_at"].replace(tzinfo=None)).total_seconds() if oldest else 0.0
+    healthy = mail_worker_pool.running and lag <= configurations.HEALTH_MAIL_MAX_LAG_SECONDS
+    return {
+        "status": OK if healthy else DEGRADED,
+        "workers_running": mail_worker_pool.running,
+        "oldest_due_seconds": round(max(lag, 0.0), 1),
+        "dead_letters": dead,
+    }
+
+
+async def _run_check(check: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    try:
+        return await asyncio.wait_for(check(), timeout=configurations.HEALTH_CHECK_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"status": FAIL, "error": f"Timed out after {configurations.HEALTH_CHECK_TIMEOUT_SECONDS:g}s"}
+    except Exception as e:
+        return {"status": FAIL, "error": repr(e)}
+
+
+class HealthMonitor:
+    """Background task that runs the deep checks and keeps the last report"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._mongo_client = None
+        self.report: Dict[str, Any] = {}
+
+    async def start(self, mongo_client) -> None:
+        if self._task:
+            return
+        self._mongo_client = mongo_client
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self) -> Dict[str, Any]:
+        """Run every check concurrently and store the report"""
+        names = ("mongodb", "jwks", "mail_queue")
+        results = await asyncio.gather(
+            _run_check(lambda: check_mongodb(self._mongo_client)),
+            _run_check(check_jwks),
+            _run_check(check_mail_queue),
+        )
+        checks = dict(zip(names, results))
+        self.report = {
+            "status": max((check["status"] for check in results), key=_SEVERITY.__getitem__),
+            "checked_at": utc_now(),
+            "checks": checks,
+        }
+        return self.report
+
+    def stale(self) -> bool:
+        """True before the first report, or when the loop has stopped producing them"""
+        if not self.report:
+            return True
+        max_age = timedelta(seconds=3 * configurations.HEALTH_CHECK_INTERVAL_SECONDS)
+        return utc_now() - self.report["checked_at"] > max_age
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Health check failed: %s", e)
+            await asyncio.sleep(configurations.HEALTH_CHECK_INTERVAL_SECONDS)
+
+
+health_monitor = HealthMonitor()
+
+
+def _collect_health():
+    report = health_monitor.report
+    if not report:
+        return []
+    return gauge_lines(
+        "health_check_status", "Last deep health check result per check (0 ok, 1 degraded, 2 fail)",
+        [({"check": name}, _SEVERITY[check["status"]]) for name, check in report["checks"].items()],
+    )
+
+
+registry.add_collector(_collect_health)
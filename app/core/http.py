@@ -0,0 +1,26 @@
+import threading
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Return the process-wide `requests.Session`, creating it on first use.
+
+    Reusing one session keeps TCP/TLS connections to external services alive
+    between calls instead of reconnecting for every request.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
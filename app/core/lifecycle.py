@@ -0,0 +1,49 @@
+"""
+Per-worker startup warm-up and shutdown state.
+
+`warm_up` runs in the app lifespan, so under gunicorn every worker does it after
+the fork and before it starts accepting connections: the first requests do not
+pay for opening a MongoDB connection, importing boto3 or fetching the Cognito
+JWKS. Each step is best effort; a failure is logged and the worker starts anyway.
+
+`mark_draining` is called by the server worker when it receives SIGTERM, so
+health checks can report the worker as going away while it finishes in-flight
+requests.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_draining = False
+
+
+def mark_draining() -> None:
+    global _draining
+    _draining = True
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+async def _step(name: str, awaitable) -> None:
+    start = time.perf_counter()
+    try:
+        await awaitable
+        logger.info("Warm-up %s done in %.0f ms", name, (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        logger.warning("Warm-up %s failed: %s", name, e)
+
+
+async def warm_up(mongo_client) -> None:
+    """Open a MongoDB connection and prime the Cognito client and JWKS cache, concurrently"""
+    from app.core.cognito import get_cognito_client, warm_public_keys
+
+    await asyncio.gather(
+        _step("mongodb", mongo_client.admin.command("ping")),
+        _step("cognito_client", asyncio.to_thread(get_cognito_client)),
+        _step("jwks", asyncio.to_thread(warm_public_keys)),
+    )
@@ -0,0 +1,39 @@
+"""
+Process pool for CPU-bound work that must not run on the event loop.
+
+The pool is created on first use, so each server worker gets its own after
+gunicorn forks, and uses the "spawn" start method: pool processes start from
+a fresh interpreter instead of a copy of the server's threads and sockets.
+Functions sent to it should live in modules with light imports.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import configurations
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def cpu_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=configurations.CPU_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_process(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run `fn(*args)` in the process pool; arguments and result must pickle"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool(), fn, *args)
+
+
+def shutdown_cpu_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
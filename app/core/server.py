@@ -0,0 +1,75 @@
+"""
+Gunicorn worker for production serving (see gunicorn.conf.py).
+
+Each worker runs the app with uvicorn on uvloop and httptools when they are
+installed, falling back to asyncio and h11. On SIGTERM the worker is marked as
+draining, optionally keeps serving for DRAIN_DELAY_SECONDS so load balancers
+can stop routing to it, then stops accepting connections, waits for in-flight
+requests and runs the lifespan shutdown (closing the MongoDB pool, stopping the
+mail workers) before gunicorn's graceful timeout would kill it.
+"""
+
+import asyncio
+import signal
+import sys
+import warnings
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+
+from app.core.config import configurations
+from app.core.lifecycle import mark_draining
+
+with warnings.catch_warnings():
+    # uvicorn.workers warns that it moves to the uvicorn-worker package
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+# Seconds of gunicorn's graceful_timeout kept for the lifespan shutdown
+LIFESPAN_SHUTDOWN_MARGIN = 5
+
+
+class DrainingServer(Server):
+    def __init__(self, config, drain_delay: float):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self.loop = None
+        self.drain_scheduled = False
+
+    def handle_exit(self, sig, frame) -> None:
+        mark_draining()
+        if sig == signal.SIGTERM and self.drain_delay > 0 and self.loop is not None and not self.drain_scheduled:
+            # Keep serving for drain_delay; a second SIGTERM exits right away
+            self.drain_scheduled = True
+            self._captured_signals.append(sig)
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.drain_delay, self._exit_now)
+            return
+        super().handle_exit(sig, frame)
+
+    def _exit_now(self) -> None:
+        self.should_exit = True
+
+    async def serve(self, sockets=None) -> None:
+        self.loop = asyncio.get_running_loop()
+        await super().serve(sockets=sockets)
+
+
+class UvicornWorker(_UvicornWorker):
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        drain_delay = configurations.DRAIN_DELAY_SECONDS
+        self.drain_delay = drain_delay
+        # Cancel stragglers early enough that the lifespan shutdown still runs
+        self.config.timeout_graceful_shutdown = max(
+            self.cfg.graceful_timeout - drain_delay - LIFESPAN_SHUTDOWN_MARGIN, 1
+        )
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config, drain_delay=self.drain_delay)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -0,0 +1,96 @@
+"""
+Single-flight coalescing for identical concurrent reads.
+
+While a call for a key is in flight, further calls with the same key await the
+same task instead of starting their own; optionally the result is also kept for
+a short TTL. The shared call runs as its own task, so a client that disconnects
+does not cancel it for the others.
+
+Results are shared between callers and must be treated as read-only. Only use
+this on reads whose result depends on nothing but the key (by default, the
+handler's arguments), never on who is asking.
+"""
+
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app.core.cache import TTLCache
+from app.core.config import configurations
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = registry.counter(
+    "single_flight_calls_total",
+    "Coalesced reads by group and outcome (executed, coalesced, cached)",
+    ("group", "outcome"),
+)
+
+
+class SingleFlight:
+    """One in-flight call per key, plus an optional result cache"""
+
+    def __init__(self, name: str, ttl: float = 0.0, maxsize: int = 1024):
+        self.name = name
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._results: Optional[TTLCache] = TTLCache(f"single_flight:{name}", ttl, maxsize) if ttl > 0 else None
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        if self._results is not None:
+            cached = self._results.get(key)
+            if cached is not None:
+                SINGLE_FLIGHT_CALLS.inc(self.name, "cached")
+                return cached[0]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "coalesced")
+        else:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "executed")
+            task = asyncio.ensure_future(self._run(key, call))
+            self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await call()
+            if self._results is not None:
+                # Wrapped so that a None result is cached too
+                self._results.set(key, (result,))
+            return result
+        finally:
+            del self._in_flight[key]
+
+
+def single_flight(name: str, ttl: Optional[float] = None, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorate an async function (e.g. a route handler) so that concurrent calls
+    with equal arguments share one execution. `ttl` defaults to
+    SINGLE_FLIGHT_TTL_SECONDS, read on the first call. `key` receives the call's
+    arguments and returns the coalescing key; by default it is the bound
+    arguments, which must be hashable. The decorated function keeps its
+    signature, so FastAPI still sees the original parameters.
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        def default_key(*args, **kwargs) -> Hashable:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple(bound.arguments.items())
+
+        make_key = key or default_key
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            if wrapper.single_flight is None:
+                group_ttl = configurations.SINGLE_FLIGHT_TTL_SECONDS if ttl is None else ttl
+                wrapper.single_flight = SingleFlight(name, ttl=group_ttl)
+            return await wrapper.single_flight.do(make_key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.single_flight = None
+        return wrapper
+
+    return decorator
@@ -0,0 +1,219 @@
+"""
+Blob storage backends for uploaded files.
+
+Uploads are streamed: `Storage.writer()` returns a `StorageWriter` that takes
+chunks as they arrive and only makes the object visible under its key on
+`commit`, so a failed or oversized upload never leaves a partial object
+behind. Keys are chosen at commit time, which lets callers name objects after
+a hash of their content.
+
+`LocalStorage` keeps objects in a directory and `GridFSStorage` in a MongoDB
+GridFS bucket. An S3-compatible backend implements the same interface
+(multipart upload, completed on `commit`).
+"""
+
+import asyncio
+import mimetypes
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
+
+CHUNK_SIZE = 256 * 1024
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    content_type: str
+    chunks: AsyncIterator[bytes]
+
+
+def content_type_of(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class StorageWriter(ABC):
+    @abstractmethod
+    async def write(self, chunk: bytes) -> None: ...
+
+    @abstractmethod
+    async def commit(self, key: str) -> None:
+        """Publish the written bytes under `key`; a no-op if `key` already exists"""
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """Discard everything written so far"""
+
+
+class Storage(ABC):
+    @abstractmethod
+    def writer(self) -> StorageWriter: ...
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def open(self, key: str) -> Optional[StoredObject]: ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """A filesystem path for `key`, when the backend has one"""
+        return None
+
+
+class _LocalWriter(StorageWriter):
+    def __init__(self, storage: "LocalStorage"):
+        self._storage = storage
+        fd, self._path = tempfile.mkstemp(dir=storage.tmp_dir, prefix="upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    async def write(self, chunk: bytes) -> None:
+        await asyncio.to_thread(self._file.write, chunk)
+
+    async def commit(self, key: str) -> None:
+        await asyncio.to_thread(self._file.close)
+        target = self._storage.path(key)
+        if os.path.exists(target):
+            os.unlink(self._path)
+            return
+        os.replace(self._path, target)
+
+    async def abort(self) -> None:
+        await asyncio.to_thread(self._file.close)
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+
+class LocalStorage(Storage):
+    """Objects as files in `root`; for a single host or a shared volume"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        if "/" in key or "\\" in key or key.startswith("."):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return os.path.join(self.root, key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
+
+    def writer(self) -> StorageWriter:
+        return _LocalWriter(self)
+
+    async def put(self, key: str, data: bytes) -> None:
+        writer = self.writer()
+        await writer.write(data)
+        await writer.commit(key)
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    async def open(self, key: str) -> Optional[StoredObject]:
+        path = self.path(key)
+        try:
+            handle = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError:
+            return None
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await asyncio.to_thread(handle.read, CHUNK_SIZE):
+                    yield chunk
+            finally:
+                handle.close()
+
+        return StoredObject(key, os.fstat(handle.fileno()).st_size, content_type_of(key), chunks())
+
+    async def read(self, key: str) -> bytes:
+        def read_file() -> bytes:
+            with open(self.path(key), "rb") as fh:
+                return fh.read()
+        return await asyncio.to_thread(read_file)
+
+    async def delete(self, key: str) -> None:
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class _GridFSWriter(StorageWriter):
+    def __init__(self, bucket: AsyncGridFSBucket):
+        self._bucket = bucket
+        # Uploaded under a temporary name and renamed on commit
+        self._stream = bucket.open_upload_stream(f".upload-{uuid.uuid4().hex}", chunk_size_bytes=CHUNK_SIZE)
+
+    async def write(self, chunk: bytes) -> None:
+        await self._stream.write(chunk)
+
+    async def commit(self, key: str) -> None:
+        await self._stream.close()
+        if await self._bucket.find({"filename": key}).limit(1).to_list():
+            await self._bucket.delete(self._stream._id)
+            return
+        await self._bucket.rename(self._stream._id, key)
+
+    async def abort(self) -> None:
+        await self._stream.abort()
+
+
+class GridFSStorage(Storage):
+    """Objects in a GridFS bucket, so every app host sees them"""
+
+    def __init__(self, database, bucket_name: str):
+        self._bucket = AsyncGridFSBucket(database, bucket_name=bucket_name, chunk_size_bytes=CHUNK_SIZE)
+
+    def writer(self) -> StorageWriter:
+        return _GridFSWriter(self._bucket)
+
+    async def put(self, key: str, data: bytes) -> None:
+        writer = self.writer()
+        await writer.write(data)
+        await writer.commit(key)
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self._bucket.find({"filename": key}).limit(1).to_list())
+
+    async def open(self, key: str) -> Optional[StoredObject]:
+        try:
+            stream = await self._bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await stream.readchunk():
+                    yield chunk
+            finally:
+                await stream.close()
+
+        return StoredObject(key, stream.length, content_type_of(key), chunks())
+
+    async def read(self, key: str) -> bytes:
+        stream = await self._bucket.open_download_stream_by_name(key)
+        try:
+            return await stream.read()
+        finally:
+            await stream.close()
+
+    async def delete(self, key: str) -> None:
+        async for grid_file in self._bucket.find({"filename": key}):
+            await self._bucket.delete(grid_file._id)
@@ -1,3 +1,3 @@
 # Database initialization is now in app/db/init_db.py
 # Import from there to avoid duplication
-from app.db.init_db import init_db, DATABASE_MODELS
+from app.db.init_db import init_db, close_db, DATABASE_MODELS
@@ -0,0 +1,67 @@
+"""
+Pre-deploy check for the unique `users.email` index (`email_unique`).
+
+`init_beanie` creates the index at startup and fails if two users share an
+email. Run this against the target database first:
+
+    python -m app.db.dedupe_user_emails            # list duplicate emails
+    python -m app.db.dedupe_user_emails --apply    # keep the oldest user per email, delete the rest
+
+The oldest document (by `created_at`, then `_id`) is kept, so ids already
+handed out for a user keep working; the ids of deleted documents are printed
+so anything that referenced them can be repointed.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict, List
+
+from pymongo import AsyncMongoClient
+
+from app.core.config import configurations
+from app.db.documents.user import User
+
+
+async def find_duplicates(collection) -> List[Dict[str, Any]]:
+    """One entry per email held by more than one user: the email and its user ids, oldest first"""
+    cursor = await collection.aggregate([
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {"_id": "$email", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+        {"$sort": {"_id": 1}},
+    ], allowDiskUse=True)
+    return [{"email": doc["_id"], "ids": doc["ids"]} async for doc in cursor]
+
+
+async def run(apply: bool, mongodb_url: str) -> int:
+    client = AsyncMongoClient(mongodb_url)
+    try:
+        collection = client.get_default_database()[User.Settings.name]
+        duplicates = await find_duplicates(collection)
+        for duplicate in duplicates:
+            keep, *extra = duplicate["ids"]
+            print(f"{duplicate['email']}: keep {keep}, duplicates {', '.join(str(id_) for id_ in extra)}")
+            if apply:
+                await collection.delete_many({"_id": {"$in": extra}})
+        if not duplicates:
+            print("No duplicate emails; the unique index can be built")
+        elif apply:
+            print(f"Removed duplicates for {len(duplicates)} email(s)")
+        return len(duplicates)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Delete all but the oldest user per email")
+    parser.add_argument("--mongodb-url", default=configurations.MONGODB_URL)
+    args = parser.parse_args()
+    found = asyncio.run(run(args.apply, args.mongodb_url))
+    # Exit non-zero on a dry run that found duplicates, so a deploy pipeline can gate on it
+    sys.exit(1 if found and not args.apply else 0)
+
+
+if __name__ == "__main__":
+    main()
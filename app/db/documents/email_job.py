@@ -0,0 +1,55 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import List, Optional
+from enum import Enum
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class EmailJobStatus(str, Enum):
+    """Email job status enumeration"""
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+
+class EmailJob(Document):
+    """Queued outbound email, processed by the background mail workers"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    recipients: List[str] = Field(..., min_length=1, description="Recipient email addresses")
+    subject: str = Field(..., description="Email subject")
+    content: str = Field(..., description="Email body")
+    mime_type: str = Field(default="html", description="Body type: plain or html")
+    status: str = Field(default=EmailJobStatus.PENDING, description="pending, sending, sent or dead")
+    attempts: int = Field(default=0, description="Number of delivery attempts so far")
+    max_attempts: int = Field(default=5, description="Attempts before the job is dead-lettered")
+    next_attempt_at: datetime = Field(default_factory=utc_now, description="Earliest time of the next attempt")
+    claim_id: Optional[str] = Field(None, description="Lease token of the worker processing the job")
+    locked_until: Optional[datetime] = Field(None, description="Lease expiry; the job is reclaimable afterwards")
+    last_error: Optional[str] = Field(None, description="Error of the last failed attempt")
+    created_at: datetime = Field(default_factory=utc_now)
+    sent_at: Optional[datetime] = None
+
+    class Settings:
+        name = "email_jobs"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+            IndexModel([("claim_id", ASCENDING)], sparse=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -0,0 +1,55 @@
+from beanie import Document, Granularity, TimeSeriesConfig
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Optional
+from enum import Enum
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class LoginEventKind(str, Enum):
+    """Login event kind enumeration"""
+    LOGIN = "login"  # First request seen for a Cognito sign-in (auth_time)
+    TOKEN_USE = "token_use"  # Any later authenticated request
+
+
+class LoginEvent(Document):
+    """
+    One sign-in or authenticated request, stored in a time-series collection
+    bucketed per user. Events expire after LOGIN_HISTORY_RETENTION_DAYS (set on
+    the collection at startup by `init_db`).
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    at: datetime = Field(default_factory=utc_now)
+    user_id: str
+    kind: str = Field(default=LoginEventKind.TOKEN_USE)
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    auth_time: Optional[int] = Field(None, description="Cognito auth_time of the session the token belongs to")
+
+    class Settings:
+        name = "login_events"  # Collection name in MongoDB
+        timeseries = TimeSeriesConfig(
+            time_field="at",
+            meta_field="user_id",
+            granularity=Granularity.seconds,
+        )
+        indexes = [
+            # A user's events in a time range, newest first
+            IndexModel([("user_id", ASCENDING), ("at", DESCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
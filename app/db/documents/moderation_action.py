@@ -0,0 +1,43 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class ModerationAction(Document):
+    """
+    One entry in the append-only moderation audit log.
+
+    Entries are never updated; history is read newest first by `_id`, per alert
+    or per moderator.
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    alert_id: str
+    actor: Optional[str] = Field(None, description="Moderator user id; None for the unauthenticated flagged-content endpoints")
+    action: str = Field(..., description="claim, extend, release, ignore, resolve or action_taken")
+    details: Optional[str] = None
+    at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "moderation_actions"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("alert_id", ASCENDING), ("_id", DESCENDING)]),
+            IndexModel([("actor", ASCENDING), ("_id", DESCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -0,0 +1,69 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Optional
+from enum import Enum
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class ModerationStatus(str, Enum):
+    """Moderation item status enumeration"""
+    OPEN = "open"
+    RESOLVED = "resolved"
+    IGNORED = "ignored"
+
+
+class ModerationItem(Document):
+    """
+    One flagged-content alert waiting for a moderator.
+
+    An open item is claimable when `available_at` has passed. Claiming pushes
+    `available_at` to the end of the lease, so an item whose moderator goes away
+    becomes claimable again once the lease expires.
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    alert_id: str = Field(..., description="Flagged content alert id (Notification.related_resource_id)")
+    notification_id: Optional[str] = Field(None, description="Flagged content notification for this alert")
+    user_id: Optional[str] = Field(None, description="User the notification was sent to")
+    title: str = ""
+    priority: int = Field(default=0, description="Higher is served first")
+    status: str = Field(default=ModerationStatus.OPEN)
+    created_at: datetime = Field(default_factory=utc_now)
+    available_at: datetime = Field(default_factory=utc_now, description="Claimable from; lease expiry while claimed")
+    claimed_by: Optional[str] = Field(None, description="Moderator holding (or last holding) the lease")
+    claim_token: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    claims: int = Field(default=0, description="Times the item was claimed; above 1 means a lease expired")
+    resolved_at: Optional[datetime] = None
+    resolved_by: Optional[str] = None
+    action: Optional[str] = None
+    details: Optional[str] = None
+
+    class Settings:
+        name = "moderation_queue"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("alert_id", ASCENDING)], unique=True),
+            # Claiming: open items by priority then age, skipping leased ones on the index keys
+            IndexModel(
+                [("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING), ("available_at", ASCENDING)],
+                name="claim_order",
+            ),
+            # A moderator's current claims
+            IndexModel([("claimed_by", ASCENDING), ("status", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
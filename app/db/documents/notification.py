@@ -1,5 +1,6 @@
 from beanie import Document
 from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from datetime import datetime, timezone
 from typing import Optional
 from enum import Enum
@@ -38,6 +39,12 @@ class Notification(Document):
     
     class Settings:
         name = "notifications"  # Collection name in MongoDB
+        indexes = [
+            # A user's notifications, newest first, optionally by status
+            IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+            # Notifications of one flagged-content alert
+            IndexModel([("related_resource_id", ASCENDING), ("type", ASCENDING)]),
+        ]
         
     model_config = ConfigDict(
         populate_by_name=True,
@@ -0,0 +1,50 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import List, Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class NotificationDigest(Document):
+    """
+    Open per-user window of notifications waiting to be emailed as one digest.
+
+    Exactly one open digest exists per user; it is closed when the flusher
+    claims it and removed once the email has been queued.
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    user_id: str = Field(..., description="User the digest is addressed to")
+    email: str = Field(..., description="Recipient email captured when the window opened")
+    cadence: str = Field(..., description="Digest cadence: immediate, hourly or daily")
+    open: bool = Field(default=True, description="False once a flusher has claimed the digest")
+    notification_ids: List[str] = Field(default_factory=list)
+    notification_count: int = Field(default=0, description="Notifications coalesced into this digest")
+    window_start: datetime = Field(default_factory=utc_now)
+    due_at: datetime = Field(default_factory=utc_now, description="When the digest should be sent")
+
+    class Settings:
+        name = "notification_digests"  # Collection name in MongoDB
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"open": True},
+            ),
+            IndexModel([("open", ASCENDING), ("due_at", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
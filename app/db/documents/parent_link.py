@@ -0,0 +1,38 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class ParentLink(Document):
+    """A parent's access to one child's (student's) data"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    parent_id: str = Field(..., description="User id of the parent")
+    child_id: str = Field(..., description="User id of the student")
+    created_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "parent_links"  # Collection name in MongoDB
+        indexes = [
+            # A parent's children; also keeps each link unique
+            IndexModel([("parent_id", ASCENDING), ("child_id", ASCENDING)], unique=True),
+            # A child's parents, for cache invalidation and unlinking
+            IndexModel([("child_id", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -0,0 +1,98 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from enum import Enum
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class RosterImportStatus(str, Enum):
+    """Roster import job status enumeration"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class RosterRowStatus(str, Enum):
+    """
+    Per-row provisioning status.
+
+    PROVISIONED rows have a Cognito user but no `User` document yet; a resumed
+    import skips Cognito for them. INVALID rows were rejected while parsing and
+    are never retried; FAILED rows can be requeued.
+    """
+    PENDING = "pending"
+    PROVISIONED = "provisioned"
+    CREATED = "created"
+    EXISTING = "existing"
+    FAILED = "failed"
+    INVALID = "invalid"
+
+
+class RosterImport(Document):
+    """A school roster being provisioned in the background"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    status: str = Field(default=RosterImportStatus.PENDING, description="pending, running or completed")
+    source_format: str = Field(..., description="csv or ndjson")
+    total_rows: int = Field(default=0)
+    # Rows per final status: created, existing, failed, invalid
+    counts: Dict[str, int] = Field(default_factory=dict)
+    claim_id: Optional[str] = Field(None, description="Lease token of the worker running the import")
+    locked_until: Optional[datetime] = Field(None, description="Lease expiry; the import is resumable afterwards")
+    created_at: datetime = Field(default_factory=utc_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "roster_imports"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class RosterImportRow(Document):
+    """One line of a roster import and its provisioning outcome"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    import_id: str = Field(..., description="RosterImport this row belongs to")
+    row_number: int = Field(..., description="1-based line number in the uploaded file")
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    status: str = Field(default=RosterRowStatus.PENDING)
+    user_id: Optional[str] = Field(None, description="Created or matched User document")
+    error: Optional[str] = None
+    cognito_attempts: int = Field(default=0, description="Cognito calls made for this row, including throttled ones")
+
+    class Settings:
+        name = "roster_import_rows"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("import_id", ASCENDING), ("row_number", ASCENDING)], unique=True),
+            IndexModel([("import_id", ASCENDING), ("status", ASCENDING), ("row_number", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
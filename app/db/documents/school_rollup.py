@@ -0,0 +1,165 @@
+from beanie import Document
+from pydantic import Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+# School analytics rollups, maintained incrementally as scores and usage are
+# recorded (app/services/school_analytics.py): class -> grade -> school. Sums
+# and counts are stored rather than averages so every update is a `$inc`.
+
+
+class StudentStanding(Document):
+    """One student's running totals within a school, for the at-risk list"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    school_id: str
+    student_id: str
+    grade: str
+    score_sum: float = 0.0
+    score_count: int = 0
+    avg_score: Optional[float] = None
+    # Average below AT_RISK_SCORE over at least AT_RISK_MIN_ASSESSMENTS scores
+    low_score: bool = False
+    minutes: float = 0.0
+    last_active_at: Optional[datetime] = None
+
+    class Settings:
+        name = "student_standings"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("school_id", ASCENDING), ("student_id", ASCENDING)], unique=True),
+            IndexModel([("school_id", ASCENDING), ("low_score", ASCENDING), ("avg_score", ASCENDING)]),
+            IndexModel([("school_id", ASCENDING), ("last_active_at", ASCENDING)]),
+            # A student's standings across schools (parent dashboard)
+            IndexModel([("student_id", ASCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class ClassRollup(Document):
+    """Score and usage totals of one class"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    school_id: str
+    class_id: str
+    grade: str
+    subject: str
+    score_sum: float = 0.0
+    score_count: int = 0
+    minutes: float = 0.0
+    updated_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "class_rollups"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("school_id", ASCENDING), ("class_id", ASCENDING)], unique=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class GradeRollup(Document):
+    """Score and usage totals of one grade and subject across its classes"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    school_id: str
+    grade: str
+    subject: str
+    score_sum: float = 0.0
+    score_count: int = 0
+    minutes: float = 0.0
+    updated_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "grade_rollups"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("school_id", ASCENDING), ("grade", ASCENDING), ("subject", ASCENDING)], unique=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class SchoolRollup(Document):
+    """School-wide totals"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    school_id: str
+    student_count: int = 0
+    score_sum: float = 0.0
+    score_count: int = 0
+    minutes: float = 0.0
+    updated_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "school_rollups"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("school_id", ASCENDING)], unique=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class SchoolUsageDay(Document):
+    """Minutes and sessions of one grade on one UTC day"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    school_id: str
+    day: str = Field(..., description="UTC date, YYYY-MM-DD")
+    grade: str
+    minutes: float = 0.0
+    sessions: int = 0
+
+    class Settings:
+        name = "school_usage_days"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("school_id", ASCENDING), ("day", DESCENDING), ("grade", ASCENDING)], unique=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -0,0 +1,89 @@
+from beanie import Document, Granularity, TimeSeriesConfig
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class StudentActivity(Document):
+    """
+    One study session or score, stored in a time-series collection bucketed per
+    student. Raw history for audits and rebuilding rollups; the dashboard reads
+    `StudentProgress`. Expires after STUDENT_ACTIVITY_RETENTION_DAYS (set on the
+    collection at startup by `init_db`).
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    at: datetime = Field(default_factory=utc_now)
+    student_id: str
+    subject: str
+    minutes: float = 0.0
+    score: Optional[float] = None
+
+    class Settings:
+        name = "student_activity"  # Collection name in MongoDB
+        timeseries = TimeSeriesConfig(
+            time_field="at",
+            meta_field="student_id",
+            granularity=Granularity.hours,
+        )
+        indexes = [
+            # A student's activity in a time range, newest first
+            IndexModel([("student_id", ASCENDING), ("at", DESCENDING)]),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
+
+
+class ActivityTotals(BaseModel):
+    # Sums and counts rather than averages, so every update is an addition
+    minutes: float = 0.0
+    sessions: int = 0
+    score_sum: float = 0.0
+    score_count: int = 0
+
+
+class StudentProgress(Document):
+    """
+    One student's activity rollup, maintained as activity is recorded
+    (app/services/student_activity.py): overall totals, totals per subject,
+    and totals per week (keyed by the week's Monday, UTC) for the last
+    STUDENT_ACTIVITY_WEEKS weeks.
+    """
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    student_id: str
+    totals: ActivityTotals = Field(default_factory=ActivityTotals)
+    subjects: Dict[str, ActivityTotals] = Field(default_factory=dict)
+    weeks: Dict[str, ActivityTotals] = Field(default_factory=dict)
+    last_active_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "student_progress"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("student_id", ASCENDING)], unique=True),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -1,7 +1,9 @@
 from beanie import Document
-from pydantic import EmailStr, Field, ConfigDict, field_serializer
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from pymongo.collation import Collation
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from bson import ObjectId
 
@@ -10,6 +12,11 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
+# Case-insensitive comparison for the directory indexes; queries must pass the
+# same collation to use them
+DIRECTORY_COLLATION = Collation(locale="en", strength=2)
+
+
 class UserRole(str, Enum):
     student = "student"
     teacher = "teacher"
@@ -17,15 +24,50 @@ class UserRole(str, Enum):
     school_manager = "school_manager"
 
 
+class DigestCadence(str, Enum):
+    """How often notification emails are sent to a user"""
+    immediate = "immediate"
+    hourly = "hourly"
+    daily = "daily"
+
+
+class AvatarInfo(BaseModel):
+    """An uploaded avatar; stored under keys derived from its content hash (app/services/avatars.py)"""
+    hash: str
+    extension: str
+    size: int
+    # Thumbnail sizes rendered, in pixels
+    sizes: List[int] = Field(default_factory=list)
+    updated_at: datetime = Field(default_factory=utc_now)
+
+
 class User(Document):
     id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
     email: EmailStr
     full_name: Optional[str] = None
     role: UserRole = Field(default=UserRole.student)
+    notification_digest: DigestCadence = Field(default=DigestCadence.hourly)
+    school_id: Optional[str] = Field(None, description="School a school manager (or member) belongs to")
+    avatar: Optional[AvatarInfo] = None
     created_at: datetime = Field(default_factory=utc_now)
 
     class Settings:
         name = "users"  # Collection name in MongoDB
+        indexes = [
+            # One user per email; user writes upsert on it (see app/services/users.py)
+            IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+            # User directory: prefix search and keyset pagination, with and without a role filter
+            IndexModel([("full_name", ASCENDING), ("_id", ASCENDING)],
+                       collation=DIRECTORY_COLLATION, name="directory_name"),
+            IndexModel([("role", ASCENDING), ("full_name", ASCENDING), ("_id", ASCENDING)],
+                       collation=DIRECTORY_COLLATION, name="directory_role_name"),
+            IndexModel([("email", ASCENDING), ("_id", ASCENDING)],
+                       collation=DIRECTORY_COLLATION, name="directory_email"),
+            IndexModel([("role", ASCENDING), ("email", ASCENDING), ("_id", ASCENDING)],
+                       collation=DIRECTORY_COLLATION, name="directory_role_email"),
+            # A school's members by role (e.g. its school managers)
+            IndexModel([("school_id", ASCENDING), ("role", ASCENDING)]),
+        ]
         
     model_config = ConfigDict(
         populate_by_name=True,
@@ -36,3 +78,16 @@ class User(Document):
     def serialize_objectid(self, oid: ObjectId, _info) -> str:
         """Serialize ObjectId to string"""
         return str(oid)
+
+
+class UserDirectoryView(BaseModel):
+    """Projection of the fields the user directory lists"""
+    id: ObjectId = Field(alias="_id")
+    full_name: Optional[str] = None
+    email: str
+    role: str
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
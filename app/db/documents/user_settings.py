@@ -0,0 +1,82 @@
+from beanie import Document
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from bson import ObjectId
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+# One model per settings section. The same model validates a PUT body: only the
+# fields the client sent are written (`model_dump(exclude_unset=True)`), and
+# unknown fields are ignored, so stored sections never hold undeclared keys.
+
+
+class PersonalInfo(BaseModel):
+    phone: Optional[str] = Field(None, max_length=32)
+    date_of_birth: Optional[str] = Field(None, description="YYYY-MM-DD")
+    bio: Optional[str] = Field(None, max_length=1000)
+    location: Optional[str] = Field(None, max_length=200)
+
+
+class TutorCustomization(BaseModel):
+    tutor_name: str = Field("Mai", max_length=50)
+    voice: str = "default"
+    personality: Literal["encouraging", "neutral", "challenging"] = "encouraging"
+    explanation_level: Literal["simple", "standard", "detailed"] = "standard"
+    language: str = "English"
+
+
+class Preferences(BaseModel):
+    language: str = "English"
+    theme: Literal["light", "dark", "system"] = "system"
+    email_notifications: bool = True
+    push_notifications: bool = True
+
+
+class SystemSettings(BaseModel):
+    timezone: str = "UTC"
+    date_format: str = "YYYY-MM-DD"
+    high_contrast: bool = False
+    font_scale: float = Field(1.0, ge=0.5, le=3.0)
+
+
+class TwoFactorSettings(BaseModel):
+    enabled: bool = False
+    method: Literal["totp", "sms", "email"] = "totp"
+
+
+class UserSettings(Document):
+    """All of one user's settings sections, versioned as a whole"""
+
+    id: Optional[ObjectId] = Field(default_factory=ObjectId, alias="_id")
+    user_id: str
+    # Incremented by every update; 0 means nothing was saved yet
+    version: int = 0
+    personal_info: PersonalInfo = Field(default_factory=PersonalInfo)
+    tutor_customization: TutorCustomization = Field(default_factory=TutorCustomization)
+    preferences: Preferences = Field(default_factory=Preferences)
+    system_settings: SystemSettings = Field(default_factory=SystemSettings)
+    two_factor: TwoFactorSettings = Field(default_factory=TwoFactorSettings)
+    updated_at: datetime = Field(default_factory=utc_now)
+
+    class Settings:
+        name = "user_settings"  # Collection name in MongoDB
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], unique=True),
+            # Covers the version check in front of the settings cache
+            IndexModel([("user_id", ASCENDING), ("version", ASCENDING)], name="user_id_version"),
+        ]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
+
+    @field_serializer('id')
+    def serialize_objectid(self, oid: ObjectId, _info) -> str:
+        """Serialize ObjectId to string"""
+        return str(oid)
@@ -1,14 +1,75 @@
+import logging
+from typing import Any, Dict
+
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from app.core.config import configurations
 from app.db.documents.user import User
+from app.db.documents.user_settings import UserSettings
+from app.db.documents.moderation_action import ModerationAction
+from app.db.documents.moderation_item import ModerationItem
 from app.db.documents.notification import Notification
+from app.db.documents.email_job import EmailJob
+from app.db.documents.login_event import LoginEvent
+from app.db.documents.notification_digest import NotificationDigest
+from app.db.documents.parent_link import ParentLink
+from app.db.documents.roster_import import RosterImport, RosterImportRow
+from app.db.documents.student_activity import StudentActivity, StudentProgress
+from app.db.documents.school_rollup import (
+    ClassRollup,
+    GradeRollup,
+    SchoolRollup,
+    SchoolUsageDay,
+    StudentStanding,
+)
+from app.db.pool_metrics import pool_stats
+from app.db.query_profiler import query_profiler
+
+logger = logging.getLogger(__name__)
+
+DATABASE_MODELS = [
+    User, Notification, EmailJob, NotificationDigest, RosterImport, RosterImportRow,
+    StudentStanding, ClassRollup, GradeRollup, SchoolRollup, SchoolUsageDay, ParentLink,
+    ModerationItem, ModerationAction, LoginEvent, UserSettings, StudentActivity, StudentProgress,
+]
+
+
+def client_options() -> Dict[str, Any]:
+    """Build MongoClient keyword arguments from Settings, skipping unset values"""
+    options: Dict[str, Any] = {
+        "maxPoolSize": configurations.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": configurations.MONGODB_MIN_POOL_SIZE,
+        "connectTimeoutMS": configurations.MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": configurations.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "appname": configurations.APP_NAME,
+        "event_listeners": [pool_stats, query_profiler],
+    }
+    if configurations.MONGODB_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = configurations.MONGODB_MAX_IDLE_TIME_MS
+    if configurations.MONGODB_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = configurations.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    if configurations.MONGODB_SOCKET_TIMEOUT_MS:
+        options["socketTimeoutMS"] = configurations.MONGODB_SOCKET_TIMEOUT_MS
+    if configurations.MONGODB_COMPRESSORS:
+        options["compressors"] = configurations.MONGODB_COMPRESSORS
+    if configurations.MONGODB_READ_CONCERN:
+        options["readConcernLevel"] = configurations.MONGODB_READ_CONCERN
+    if configurations.MONGODB_WRITE_CONCERN:
+        w = configurations.MONGODB_WRITE_CONCERN
+        options["w"] = int(w) if w.isdigit() else w
+    if configurations.MONGODB_READ_PREFERENCE:
+        options["readPreference"] = configurations.MONGODB_READ_PREFERENCE
+    return options
 
-DATABASE_MODELS = [User, Notification]
 
+async def init_db() -> AsyncMongoClient:
+    """
+    Create the process-wide MongoDB client and initialize Beanie on it.
 
-async def init_db():
-    client = AsyncIOMotorClient(configurations.MONGODB_URL)
+    The caller owns the returned client and must pass it to `close_db` on shutdown.
+    """
+    client = AsyncMongoClient(configurations.MONGODB_URL, **client_options())
+    query_profiler.attach(client)
     await init_beanie(
         database=client.get_default_database(),
         document_models=DATABASE_MODELS,
@@ -18,4 +79,27 @@ async def init_db():
             model.model_rebuild()
         except Exception:
             pass
+    await apply_time_series_retention(client.get_default_database())
+    return client
+
+
+async def apply_time_series_retention(database) -> None:
+    """
+    Expire login events after LOGIN_HISTORY_RETENTION_DAYS and student activity
+    after STUDENT_ACTIVITY_RETENTION_DAYS. Set on every startup so a changed
+    setting also applies to the existing collections.
+    """
+    retention = (
+        (LoginEvent, configurations.LOGIN_HISTORY_RETENTION_DAYS),
+        (StudentActivity, configurations.STUDENT_ACTIVITY_RETENTION_DAYS),
+    )
+    for model, days in retention:
+        try:
+            await database.command("collMod", model.Settings.name, expireAfterSeconds=int(days * 86400))
+        except Exception as e:
+            logger.error("Could not set %s retention: %s", model.Settings.name, e)
+
 
+async def close_db(client: AsyncMongoClient) -> None:
+    """Close the client and its connection pools"""
+    await client.close()
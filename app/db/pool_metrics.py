@@ -0,0 +1,150 @@
+"""
+Connection pool statistics collected from pymongo's CMAP event listeners.
+
+The listener is registered on the client in `init_db`, so every worker process
+keeps its own numbers; compare them across workers to size `MONGODB_MAX_POOL_SIZE`.
+"""
+
+import os
+import threading
+from typing import Dict
+
+from pymongo import monitoring
+
+from app.core.metrics import gauge_lines, registry
+
+
+class _AddressStats:
+    __slots__ = (
+        "open", "checked_out", "waiting", "max_waiting",
+        "checkouts", "checkout_failures", "wait_time_total", "wait_time_max",
+        "pool_cleared",
+    )
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.pool_cleared = 0
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Track open/checked-out connections, wait queue depth and checkout wait times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _AddressStats] = {}
+
+    def _for(self, address) -> _AddressStats:
+        key = f"{address[0]}:{address[1]}" if address else "unknown"
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _AddressStats()
+        return stats
+
+    def pool_created(self, event):
+        with self._lock:
+            self._for(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._for(event.address).pool_cleared += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._stats.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._for(event.address).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._for(event.address)
+            stats.open = max(stats.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            stats = self._for(event.address)
+            stats.waiting += 1
+            stats.max_waiting = max(stats.max_waiting, stats.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            stats = self._for(event.address)
+            stats.waiting = max(stats.waiting - 1, 0)
+            stats.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        # `duration` (seconds) is the time spent waiting for the connection
+        duration = getattr(event, "duration", 0.0) or 0.0
+        with self._lock:
+            stats = self._for(event.address)
+            stats.waiting = max(stats.waiting - 1, 0)
+            stats.checked_out += 1
+            stats.checkouts += 1
+            stats.wait_time_total += duration
+            stats.wait_time_max = max(stats.wait_time_max, duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._for(event.address)
+            stats.checked_out = max(stats.checked_out - 1, 0)
+
+    def snapshot(self) -> dict:
+        """Per-server pool statistics for this process"""
+        with self._lock:
+            servers = {}
+            for address, stats in self._stats.items():
+                servers[address] = {
+                    "open_connections": stats.open,
+                    "checked_out": stats.checked_out,
+                    "wait_queue": stats.waiting,
+                    "max_wait_queue": stats.max_waiting,
+                    "checkouts": stats.checkouts,
+                    "checkout_failures": stats.checkout_failures,
+                    "wait_time_avg_ms": round(
+                        stats.wait_time_total / stats.checkouts * 1000, 3
+                    ) if stats.checkouts else 0.0,
+                    "wait_time_max_ms": round(stats.wait_time_max * 1000, 3),
+                    "pool_cleared": stats.pool_cleared,
+                }
+        return {"pid": os.getpid(), "servers": servers}
+
+
+pool_stats = PoolStatsListener()
+
+_POOL_GAUGES = {
+    "open_connections": "Open connections in the MongoDB pool",
+    "checked_out": "MongoDB connections currently checked out",
+    "wait_queue": "Operations waiting for a MongoDB connection",
+    "checkout_failures": "Failed MongoDB connection checkouts",
+    "wait_time_avg_ms": "Average MongoDB connection checkout wait (ms)",
+    "wait_time_max_ms": "Maximum MongoDB connection checkout wait (ms)",
+}
+
+
+def _collect_pool_stats():
+    servers = pool_stats.snapshot()["servers"]
+    lines = []
+    for key, documentation in _POOL_GAUGES.items():
+        lines.extend(gauge_lines(
+            f"mongodb_pool_{key}",
+            documentation,
+            [({"server": server}, stats[key]) for server, stats in servers.items()],
+        ))
+    return lines
+
+
+registry.add_collector(_collect_pool_stats)
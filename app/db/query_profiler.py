@@ -0,0 +1,258 @@
+"""
+MongoDB slow-query log built on pymongo's CommandListener.
+
+Every CRUD command is reduced to a query shape (collection, command, filter keys
+and operators with values stripped, sort keys) and aggregated per shape.
+Commands slower than SLOW_QUERY_THRESHOLD_MS are logged, and a slow shape gets
+an `explain` sampled at most once per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS to
+flag collection scans and in-memory sorts.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.core.config import configurations
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TRACKED_COMMANDS = {
+    "find", "aggregate", "count", "distinct", "update", "delete", "findAndModify", "insert",
+}
+
+# Keys added by the driver that must not be sent back inside `explain`
+_DRIVER_KEYS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+MONGODB_COMMAND_DURATION = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency",
+    ("command", "collection"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+def _shape(value: Any) -> Any:
+    """Replace literal values with '?' while keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: _shape(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shaped = _shape(item)
+            if shaped not in shapes:
+                shapes.append(shaped)
+        return shapes
+    return "?"
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Value-free description of a command used to group similar queries"""
+    if command_name == "find":
+        return {"filter": _shape(command.get("filter", {})), "sort": list(command.get("sort") or {})}
+    if command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            name = next(iter(stage), "?")
+            if name == "$match":
+                stages.append({name: _shape(stage[name])})
+            elif name == "$sort":
+                stages.append({name: list(stage[name])})
+            else:
+                stages.append(name)
+        return {"pipeline": stages}
+    if command_name == "count":
+        return {"query": _shape(command.get("query", {}))}
+    if command_name == "distinct":
+        return {"key": command.get("key"), "query": _shape(command.get("query", {}))}
+    if command_name == "update":
+        updates = command.get("updates") or [{}]
+        return {"q": _shape(updates[0].get("q", {})), "upsert": bool(updates[0].get("upsert"))}
+    if command_name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return {"q": _shape(deletes[0].get("q", {}))}
+    if command_name == "findAndModify":
+        return {"query": _shape(command.get("query", {})), "sort": list(command.get("sort") or {})}
+    return {}
+
+
+def plan_stages(plan: Any) -> List[str]:
+    """All `stage` names in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+class _ShapeStats:
+    __slots__ = (
+        "database", "collection", "command", "shape", "count", "total_ms", "max_ms",
+        "slow_count", "last_seen", "last_explained", "plan_stages", "collscan",
+        "in_memory_sort", "sample_command",
+    )
+
+    def __init__(self, database: str, collection: str, command: str, shape: Dict[str, Any]):
+        self.database = database
+        self.collection = collection
+        self.command = command
+        self.shape = shape
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.last_seen = 0.0
+        self.last_explained = 0.0
+        self.plan_stages: List[str] = []
+        self.collscan = False
+        self.in_memory_sort = False
+        self.sample_command: Optional[Dict[str, Any]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "command": self.command,
+            "shape": self.shape,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "slow_count": self.slow_count,
+            "last_seen": self.last_seen,
+            "plan_stages": self.plan_stages,
+            "collscan": self.collscan,
+            "in_memory_sort": self.in_memory_sort,
+        }
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Aggregate MongoDB command durations by query shape and explain slow shapes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any]]] = {}
+        self._shapes: Dict[str, _ShapeStats] = {}
+        self._client = None
+
+    def attach(self, client) -> None:
+        """Give the profiler a client to run sampled `explain` commands with"""
+        self._client = client
+
+    def started(self, event):
+        if event.command_name not in TRACKED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "<database>"
+        shape = query_shape(event.command_name, event.command)
+        key = json.dumps([event.database_name, collection, event.command_name, shape], sort_keys=True, default=str)
+        with self._lock:
+            stats = self._shapes.get(key)
+            if stats is None:
+                if len(self._shapes) >= configurations.QUERY_PROFILER_MAX_SHAPES:
+                    return
+                stats = self._shapes[key] = _ShapeStats(
+                    event.database_name, collection, event.command_name, shape
+                )
+            self._pending[(event.connection_id, event.request_id)] = (key, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            key, command = pending
+            stats = self._shapes.get(key)
+            if stats is None:
+                return
+            duration_ms = event.duration_micros / 1000
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_seen = time.time()
+            slow = duration_ms >= configurations.SLOW_QUERY_THRESHOLD_MS
+            explain = False
+            if slow:
+                stats.slow_count += 1
+                stats.sample_command = command
+                now = time.monotonic()
+                if (
+                    stats.command != "insert"
+                    and now - stats.last_explained >= configurations.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+                ):
+                    stats.last_explained = now
+                    explain = True
+
+        MONGODB_COMMAND_DURATION.observe(stats.command, stats.collection, value=duration_ms / 1000)
+        if slow:
+            logger.warning(
+                "Slow MongoDB %s on %s took %.1f ms, shape=%s",
+                stats.command, stats.collection, duration_ms, json.dumps(stats.shape, default=str),
+            )
+        if explain and self._client is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            loop.create_task(self._explain(key))
+
+    async def _explain(self, key: str) -> None:
+        stats = self._shapes.get(key)
+        if stats is None or stats.sample_command is None:
+            return
+        command = {
+            name: value for name, value in stats.sample_command.items()
+            if not name.startswith("$") and name not in _DRIVER_KEYS
+        }
+        try:
+            result = await self._client[stats.database].command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            logger.debug("explain failed for %s on %s: %s", stats.command, stats.collection, e)
+            return
+        stages = plan_stages(result.get("queryPlanner", {}).get("winningPlan", {}))
+        # Aggregations report the plan inside their $cursor stage
+        if not stages:
+            stages = plan_stages(result.get("stages", []))
+        with self._lock:
+            stats.plan_stages = sorted(set(stages))
+            stats.collscan = "COLLSCAN" in stages
+            stats.in_memory_sort = "SORT" in stages
+            stats.sample_command = None
+        if stats.collscan or stats.in_memory_sort:
+            logger.warning(
+                "MongoDB %s on %s uses %s, shape=%s",
+                stats.command, stats.collection,
+                " and ".join(flag for flag, on in (("COLLSCAN", stats.collscan), ("in-memory SORT", stats.in_memory_sort)) if on),
+                json.dumps(stats.shape, default=str),
+            )
+
+    def snapshot(self, sort_by: str = "total_ms", limit: int = 50) -> List[Dict[str, Any]]:
+        """Aggregated per-shape statistics, worst first"""
+        with self._lock:
+            rows = [stats.as_dict() for stats in self._shapes.values()]
+        rows.sort(key=lambda row: row.get(sort_by, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+
+query_profiler = QueryProfiler()
@@ -7,7 +7,7 @@ All actual database operations are performed using PyMongo client.
 """
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_serializer
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from datetime import datetime, timezone
 
@@ -68,3 +68,29 @@ class UserResponse(BaseModel):
     def serialize_datetime(self, dt: datetime, _info) -> str:
         """Serialize datetime to ISO format"""
         return dt.isoformat()
+
+
+class UserDirectoryEntry(BaseModel):
+    """One user in the directory listing."""
+    id: str
+    name: Optional[str] = None
+    email: str
+    role: str
+
+
+class UserDirectoryResponse(BaseModel):
+    """A page of the user directory."""
+    users: List[UserDirectoryEntry]
+    # Opaque; pass as `cursor` to fetch the next page. Null on the last page.
+    next_cursor: Optional[str] = None
+
+
+class UserBatchRequest(BaseModel):
+    """Schema for looking up several users by id."""
+    ids: List[str] = Field(..., min_length=1)
+
+
+class UserBatchResponse(BaseModel):
+    """Users in request order; ids that are malformed or unknown are listed in `missing`."""
+    users: List[UserDirectoryEntry]
+    missing: List[str]
@@ -0,0 +1,217 @@
+"""
+Avatar uploads.
+
+The request body is streamed: each chunk is hashed, counted against
+AVATAR_MAX_BYTES and written to the storage backend as it arrives, so an
+upload never sits in memory and an oversized one is cut off as soon as it
+crosses the limit. Both a multipart form (field `file`) and a raw image body
+are accepted.
+
+The stored original is named after the SHA-256 of its content, and so are its
+thumbnails, which are rendered in the process pool. A new avatar always gets a
+new URL, so avatar responses can be cached for a year (`immutable`). An image
+someone already uploaded is not stored or rendered again.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from app.core.config import configurations
+from app.core.process_pool import run_in_process
+from app.core.storage import GridFSStorage, LocalStorage, Storage, StorageWriter
+from app.db.documents.user import AvatarInfo, User, utc_now
+from app.services.image_processing import make_thumbnails, sniff_image_type
+
+AVATAR_URL_PREFIX = "/api/avatars"
+# Multipart framing around the file: boundaries, part headers, other small fields
+MULTIPART_OVERHEAD = 16 * 1024
+# Bytes needed to tell the image formats apart (WebP's RIFF header is the longest)
+SNIFF_BYTES = 12
+
+
+class AvatarTooLarge(ValueError):
+    pass
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+@lru_cache(maxsize=1)
+def avatar_storage() -> Storage:
+    if configurations.AVATAR_STORAGE == "local":
+        return LocalStorage(configurations.AVATAR_STORAGE_DIR)
+    return GridFSStorage(User.get_pymongo_collection().database, bucket_name="avatars")
+
+
+def thumbnail_sizes() -> List[int]:
+    return sorted(int(size) for size in configurations.AVATAR_THUMBNAIL_SIZES.split(",") if size.strip())
+
+
+def original_key(info: AvatarInfo) -> str:
+    return f"{info.hash}.{info.extension}"
+
+
+def thumbnail_key(info: AvatarInfo, size: int) -> str:
+    return f"{info.hash}-{size}.webp"
+
+
+def avatar_urls(info: Optional[AvatarInfo]) -> Optional[Dict[str, str]]:
+    """URLs of the original (`original`) and of each thumbnail (by size)"""
+    if info is None:
+        return None
+    urls = {"original": f"{AVATAR_URL_PREFIX}/{original_key(info)}"}
+    for size in info.sizes:
+        urls[str(size)] = f"{AVATAR_URL_PREFIX}/{thumbnail_key(info, size)}"
+    return urls
+
+
+@dataclass
+class _Upload:
+    writer: StorageWriter
+    digest: "hashlib._Hash"
+    size: int = 0
+    extension: Optional[str] = None
+    # Start of the file, held back until there is enough of it to sniff the format
+    head: bytes = b""
+
+    async def add(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self.extension is None:
+            self.head += chunk
+            if len(self.head) < SNIFF_BYTES:
+                return
+            chunk, self.head = self.head, b""
+            self._sniff(chunk)
+        await self._write(chunk)
+
+    async def finish(self) -> None:
+        """Flush a file shorter than SNIFF_BYTES, which `add` is still holding back"""
+        if self.extension is None and self.head:
+            chunk, self.head = self.head, b""
+            self._sniff(chunk)
+            await self._write(chunk)
+
+    def _sniff(self, head: bytes) -> None:
+        self.extension = sniff_image_type(head[:SNIFF_BYTES])
+        if self.extension is None:
+            raise InvalidAvatar("Avatar must be a JPEG, PNG, GIF or WebP image")
+
+    async def _write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > configurations.AVATAR_MAX_BYTES:
+            raise AvatarTooLarge(f"Avatar is larger than {configurations.AVATAR_MAX_BYTES} bytes")
+        self.digest.update(chunk)
+        await self.writer.write(chunk)
+
+
+async def _stream_multipart(request: Request, boundary: bytes, sink: Callable[[bytes], Awaitable[None]]) -> None:
+    """Feed the `file` part of a multipart body to `sink`, chunk by chunk"""
+    pending: List[bytes] = []
+    state = {"header": b"", "headers": {}, "in_file": False, "found": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header"] = data[start:end].lower()
+
+    def on_header_value(data, start, end):
+        state["headers"][state["header"]] = state["headers"].get(state["header"], b"") + data[start:end]
+
+    def on_headers_finished():
+        _, params = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        state["in_file"] = params.get(b"name") == b"file" and not state["found"]
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"], state["found"] = False, True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for piece in pending:
+            await sink(piece)
+        pending.clear()
+    parser.finalize()
+    if not state["found"]:
+        raise InvalidAvatar("Multipart body has no 'file' part")
+
+
+async def receive_avatar(request: Request) -> AvatarInfo:
+    """Stream the request body into storage; returns the stored original's details"""
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    multipart = content_type == b"multipart/form-data"
+    limit = configurations.AVATAR_MAX_BYTES + (MULTIPART_OVERHEAD if multipart else 0)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise AvatarTooLarge(f"Avatar is larger than {configurations.AVATAR_MAX_BYTES} bytes")
+
+    storage = avatar_storage()
+    upload = _Upload(storage.writer(), hashlib.sha256())
+    try:
+        if multipart:
+            if b"boundary" not in params:
+                raise InvalidAvatar("Multipart body has no boundary")
+            await _stream_multipart(request, params[b"boundary"], upload.add)
+        else:
+            async for chunk in request.stream():
+                await upload.add(chunk)
+        await upload.finish()
+        if upload.extension is None:
+            raise InvalidAvatar("Empty upload")
+    except BaseException:
+        await upload.writer.abort()
+        raise
+    info = AvatarInfo(hash=upload.digest.hexdigest(), extension=upload.extension, size=upload.size)
+    await upload.writer.commit(original_key(info))
+    return info
+
+
+async def _render_thumbnails(info: AvatarInfo) -> None:
+    storage = avatar_storage()
+    sizes = thumbnail_sizes()
+    missing = [size for size in sizes if not await storage.exists(thumbnail_key(info, size))]
+    if not missing:
+        return
+    source = storage.local_path(original_key(info)) or await storage.read(original_key(info))
+    try:
+        thumbnails = await run_in_process(make_thumbnails, source, missing)
+    except ValueError as e:
+        raise InvalidAvatar(f"Avatar could not be decoded: {e}") from None
+    for size, data in thumbnails.items():
+        await storage.put(thumbnail_key(info, size), data)
+
+
+async def set_avatar(user_id, request: Request) -> AvatarInfo:
+    """Store the uploaded image and its thumbnails and make it the user's avatar"""
+    info = await receive_avatar(request)
+    try:
+        await _render_thumbnails(info)
+    except InvalidAvatar:
+        # Not an image after all; a valid upload of the same bytes would have rendered
+        await avatar_storage().delete(original_key(info))
+        raise
+    info.sizes = thumbnail_sizes()
+    info.updated_at = utc_now()
+    await User.get_pymongo_collection().update_one(
+        {"_id": user_id}, {"$set": {"avatar": info.model_dump()}},
+    )
+    return info
@@ -0,0 +1,359 @@
+"""
+Screening of chat messages for banned terms and patterns.
+
+Terms are compiled into one Aho-Corasick automaton, so a message is scanned
+once whatever the size of the term list. Messages and terms go through the
+same normalization (case, diacritics, common leetspeak and in-word
+punctuation), so "B.@.d" and "bád" match the term "bad". Terms match whole
+words; a trailing `*` matches any word starting with the term.
+
+The term list is a text file (CONTENT_SCREEN_TERMS_FILE), one term per line,
+`#` for comments and `re:` for a regular expression. Patterns see the message
+with only case and diacritics folded, so digits and punctuation in them (e.g.
+`re:\\d{3}-\\d{4}`) match as written. `ScreeningTermsWatcher` rebuilds the
+matcher in a thread when the file changes and swaps it in, so a reload never
+blocks requests.
+
+Screening itself is synchronous and takes microseconds. Flagged messages are
+handed to `FlagReporter`, which creates the flagged-content notifications (and
+so the moderation queue items) in the background, off the request path.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.core.config import configurations
+from app.core.metrics import gauge_lines, registry
+from app.db.documents.notification import NotificationType
+from app.db.documents.user import User, UserRole
+from app.services import moderation
+from app.services.notifications import create_notification
+
+logger = logging.getLogger("app.content_screening")
+
+CONTENT_SCREEN_MESSAGES = registry.counter(
+    "content_screen_messages_total", "Chat messages screened, by result", ["result"],
+)
+CONTENT_SCREEN_REPORTS_DROPPED = registry.counter(
+    "content_screen_reports_dropped_total", "Flagged messages not reported because the report queue was full",
+)
+CONTENT_SCREEN_RELOADS = registry.counter(
+    "content_screen_reloads_total", "Term list reloads, by result", ["result"],
+)
+
+EXCERPT_LENGTH = 200
+
+# Leetspeak substitutions; other punctuation inside words ("b.a.d", "b-a-d") is
+# dropped and the rest becomes a word boundary
+_LEET = {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+         "@": "a", "$": "s", "|": "l", "+": "t"}
+_DROPPED = ".-_*'`~^"
+_TABLE = str.maketrans({
+    **{ch: " " for ch in "\t\n\r\f\v,;:!?\"()[]{}<>/\\=%&#"},
+    **{ch: None for ch in _DROPPED},
+    **_LEET,
+})
+
+
+def _strip_diacritics(text: str) -> str:
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def fold(text: str) -> str:
+    """Fold case and diacritics"""
+    return _strip_diacritics(text).casefold()
+
+
+def normalize(text: str) -> str:
+    """Fold case, diacritics, leetspeak and in-word punctuation"""
+    return fold(text).translate(_TABLE)
+
+
+@dataclass(frozen=True)
+class _Term:
+    text: str
+    prefix: bool
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over normalized terms, plus optional regex patterns"""
+
+    def __init__(self, terms: Iterable[str] = (), patterns: Iterable[str] = ()):
+        self.terms: List[_Term] = []
+        # Trie: per state a char -> state dict, the failure link and the terms ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for raw in terms:
+            prefix = raw.endswith("*")
+            text = normalize(raw.rstrip("*")).strip()
+            if text:
+                self._add(len(self.terms), text)
+                self.terms.append(_Term(text, prefix))
+        self._link()
+        # Patterns run on folded text; case is ignored rather than folded so escapes like \D survive
+        patterns = [_strip_diacritics(p) for p in patterns]
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE) if patterns else None
+        self.size = len(self.terms) + len(patterns)
+
+    def _add(self, index: int, text: str) -> None:
+        state = 0
+        for ch in text:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (index,)
+
+    def _link(self) -> None:
+        # Breadth-first, so every failure target is linked before the states that use it;
+        # the root's children fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def find(self, message: str) -> List[str]:
+        """Distinct terms and patterns matched in `message`"""
+        folded = fold(message)
+        text = folded.translate(_TABLE)
+        goto, fail, out, terms = self._goto, self._fail, self._out, self.terms
+        found: List[str] = []
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for index in out[state]:
+                term = terms[index]
+                start = end - len(term.text) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if not term.prefix and end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                if term.text not in found:
+                    found.append(term.text)
+        if self.pattern is not None:
+            for match in self.pattern.finditer(folded):
+                if match.group(0) and match.group(0) not in found:
+                    found.append(match.group(0))
+        return found
+
+
+def parse_terms(lines: Iterable[str]) -> TermMatcher:
+    terms, patterns = [], []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("re:"):
+            pattern = line[3:].strip()
+            re.compile(pattern)
+            patterns.append(pattern)
+        else:
+            terms.append(line)
+    return TermMatcher(terms, patterns)
+
+
+def load_terms(path: str) -> TermMatcher:
+    with open(path, encoding="utf-8") as fh:
+        return parse_terms(fh)
+
+
+class ScreeningTermsWatcher:
+    """Holds the current matcher and reloads it when the term file changes"""
+
+    def __init__(self):
+        self.matcher = TermMatcher()
+        self._mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def reload(self, force: bool = False) -> bool:
+        """Rebuild the matcher if the file changed (or `force`); True if a new one was swapped in"""
+        path = configurations.CONTENT_SCREEN_TERMS_FILE
+        if not path:
+            return False
+        try:
+            mtime = os.stat(path).st_mtime
+            if not force and mtime == self._mtime:
+                return False
+            matcher = await asyncio.to_thread(load_terms, path)
+        except (OSError, re.error) as e:
+            # Keep screening with the last good list
+            CONTENT_SCREEN_RELOADS.inc("error")
+            logger.error("Could not load screening terms from %s: %s", path, e)
+            return False
+        self.matcher, self._mtime = matcher, mtime
+        CONTENT_SCREEN_RELOADS.inc("ok")
+        logger.info("Loaded %d screening terms from %s", matcher.size, path)
+        return True
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        await self.reload()
+        self._task = asyncio.create_task(self._run(), name="screening-terms-watcher")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(configurations.CONTENT_SCREEN_RELOAD_SECONDS)
+            try:
+                await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Screening term reload failed: %s", e)
+
+
+screening_terms = ScreeningTermsWatcher()
+
+
+@dataclass
+class FlaggedMessage:
+    chat_id: str
+    sender_id: str
+    school_id: Optional[str]
+    text: str
+    matches: List[str]
+
+
+def fallback_moderator_emails() -> List[str]:
+    return [email.strip() for email in configurations.CONTENT_SCREEN_FALLBACK_MODERATORS.split(",") if email.strip()]
+
+
+async def _moderators(school_id: Optional[str]) -> List[str]:
+    """The school's managers, or CONTENT_SCREEN_FALLBACK_MODERATORS if it has none (or no school is known)"""
+    users = User.get_pymongo_collection()
+    docs = []
+    if school_id:
+        docs = await users.find(
+            {"school_id": school_id, "role": UserRole.school_manager.value}, {"_id": 1},
+        ).to_list()
+    if not docs:
+        emails = fallback_moderator_emails()
+        if emails:
+            docs = await users.find({"email": {"$in": emails}}, {"_id": 1}).to_list()
+    return [str(doc["_id"]) for doc in docs]
+
+
+async def report_flag(flag: FlaggedMessage) -> str:
+    """Notify the sender's school managers (or the fallback moderators) and queue the alert; returns the alert id"""
+    alert_id = str(ObjectId())
+    excerpt = flag.text if len(flag.text) <= EXCERPT_LENGTH else flag.text[:EXCERPT_LENGTH] + "…"
+    title = f"Flagged message in chat {flag.chat_id}"
+    message = f"Message from user {flag.sender_id} matched {', '.join(flag.matches)}: {excerpt}"
+    recipients = await _moderators(flag.school_id)
+    for user_id in recipients:
+        await create_notification(
+            user_id=user_id,
+            title=title,
+            message=message,
+            type=NotificationType.FLAGGED_CONTENT,
+            related_resource_id=alert_id,
+        )
+    if not recipients:
+        # Nobody to notify; the moderation queue still gets it
+        await moderation.enqueue(alert_id, title=title)
+    return alert_id
+
+
+class FlagReporter:
+    """Background task that turns flagged messages into notifications"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, flag: FlaggedMessage) -> None:
+        if self._queue is None:
+            CONTENT_SCREEN_REPORTS_DROPPED.inc()
+            logger.error("Flag reporter is not running; dropped flag for chat %s", flag.chat_id)
+            return
+        try:
+            self._queue.put_nowait(flag)
+        except asyncio.QueueFull:
+            CONTENT_SCREEN_REPORTS_DROPPED.inc()
+            logger.error("Flag report queue full; dropped flag for chat %s", flag.chat_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._queue = asyncio.Queue(maxsize=configurations.CONTENT_SCREEN_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._run(), name="flag-reporter")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._queue = None
+
+    async def _run(self) -> None:
+        while True:
+            flag = await self._queue.get()
+            try:
+                await report_flag(flag)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Reporting flagged message in chat %s failed: %s", flag.chat_id, e)
+
+
+flag_reporter = FlagReporter()
+
+
+def screen_message(chat_id: str, sender: User, text: str) -> List[str]:
+    """
+    Check a chat message against the term list. Returns the matched terms;
+    if there are any, the flag is reported in the background.
+    """
+    matches = screening_terms.matcher.find(text)
+    if not matches:
+        CONTENT_SCREEN_MESSAGES.inc("clean")
+        return matches
+    CONTENT_SCREEN_MESSAGES.inc("flagged")
+    flag_reporter.submit(FlaggedMessage(chat_id, str(sender.id), sender.school_id, text, matches))
+    return matches
+
+
+def _collect_screening_stats():
+    return (
+        gauge_lines("content_screen_terms", "Terms and patterns in the loaded screening list",
+                    [({}, screening_terms.matcher.size)])
+        + gauge_lines("content_screen_report_queue_depth", "Flagged messages waiting to be reported",
+                      [({}, flag_reporter.depth())])
+    )
+
+
+registry.add_collector(_collect_screening_stats)
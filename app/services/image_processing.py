@@ -0,0 +1,52 @@
+"""
+CPU-bound image work, run in the process pool (app/core/process_pool.py).
+
+Kept free of app imports so a freshly spawned pool worker only has to import
+Pillow. Errors are re-raised as ValueError so they pickle back to the caller.
+"""
+
+import io
+import warnings
+from typing import Dict, Iterable, Optional, Union
+
+# Larger images are refused rather than decoded (a 5 MB PNG can expand to gigabytes)
+MAX_PIXELS = 40_000_000
+
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """File extension for the image format `head` starts with, if it is one we accept"""
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def make_thumbnails(source: Union[str, bytes], sizes: Iterable[int]) -> Dict[int, bytes]:
+    """Square WebP thumbnails of the image at path `source` (or in `source` bytes), keyed by size"""
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+                image = ImageOps.exif_transpose(image)
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+                thumbnails = {}
+                for size in sizes:
+                    thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+                    buffer = io.BytesIO()
+                    thumbnail.save(buffer, "WEBP", quality=85, method=4)
+                    thumbnails[size] = buffer.getvalue()
+                return thumbnails
+    except Exception as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from None
@@ -0,0 +1,171 @@
+"""
+Login history: every sign-in and authenticated request, for security review.
+
+`get_current_user` records an event per authenticated request. Recording only
+appends to an in-memory buffer; `LoginEventWriter` flushes the buffer with one
+unordered `insert_many` every LOGIN_EVENTS_FLUSH_SECONDS, or as soon as
+LOGIN_EVENTS_BATCH_SIZE events are waiting. The buffer is bounded: if MongoDB
+falls behind, the newest events are dropped and counted rather than growing
+the worker's memory.
+
+Events go to the `login_events` time-series collection, bucketed per user, so
+a user's recent history is one range scan of a few buckets. MongoDB deletes
+events older than LOGIN_HISTORY_RETENTION_DAYS (applied by `init_db`).
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import configurations
+from app.core.metrics import gauge_lines, registry
+from app.db.documents.login_event import LoginEvent, LoginEventKind
+
+logger = logging.getLogger("app.login_history")
+
+LOGIN_EVENTS = registry.counter(
+    "login_events_total", "Login events by outcome (written or dropped)", ["outcome"],
+)
+LOGIN_EVENTS_FLUSH_DURATION = registry.histogram(
+    "login_events_flush_seconds", "Time to write one batch of login events",
+)
+
+USER_AGENT_MAX_LENGTH = 256
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+@lru_cache(maxsize=1)
+def seen_sessions() -> TTLCache[bool]:
+    """(user, auth_time) pairs already recorded as a login by this worker"""
+    return TTLCache("login_sessions", ttl=24 * 3600, maxsize=100000)
+
+
+class LoginEventWriter:
+    """Buffers login events and writes them in batches from a background task"""
+
+    def __init__(self):
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def record(self, event: Dict[str, Any]) -> None:
+        if len(self._buffer) >= configurations.LOGIN_EVENTS_MAX_BUFFER:
+            LOGIN_EVENTS.inc("dropped")
+            return
+        self._buffer.append(event)
+        if self._wakeup is not None and len(self._buffer) >= configurations.LOGIN_EVENTS_BATCH_SIZE:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events written"""
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:configurations.LOGIN_EVENTS_BATCH_SIZE]
+            del self._buffer[:len(batch)]
+            try:
+                with LOGIN_EVENTS_FLUSH_DURATION.time():
+                    await LoginEvent.get_pymongo_collection().insert_many(batch, ordered=False)
+            except Exception:
+                # Put the batch back for the next flush if there is room
+                room = configurations.LOGIN_EVENTS_MAX_BUFFER - len(self._buffer)
+                self._buffer[:0] = batch[:room]
+                if len(batch) > room:
+                    LOGIN_EVENTS.inc("dropped", amount=len(batch) - room)
+                raise
+            LOGIN_EVENTS.inc("written", amount=len(batch))
+            written += len(batch)
+        return written
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="login-event-writer")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Dropped %d login events on shutdown: %s", len(self._buffer), e)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=configurations.LOGIN_EVENTS_FLUSH_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Login event flush failed: %s", e)
+
+
+login_event_writer = LoginEventWriter()
+
+
+def record_token_use(user_id: str, claims: Dict[str, Any], ip: Optional[str], user_agent: Optional[str]) -> None:
+    """Record one authenticated request; the first one of a Cognito sign-in counts as the login"""
+    auth_time = claims.get("auth_time")
+    kind = LoginEventKind.TOKEN_USE
+    if auth_time is not None:
+        sessions = seen_sessions()
+        if sessions.get((user_id, auth_time)) is None:
+            sessions.set((user_id, auth_time), True)
+            kind = LoginEventKind.LOGIN
+    login_event_writer.record({
+        "at": utc_now(),
+        "user_id": user_id,
+        "kind": kind.value,
+        "ip": ip,
+        "user_agent": user_agent[:USER_AGENT_MAX_LENGTH] if user_agent else None,
+        "auth_time": auth_time,
+    })
+
+
+async def login_history(
+    user_id: str,
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    kind: Optional[str] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """A user's events in [since, before), newest first"""
+    query: Dict[str, Any] = {"user_id": user_id}
+    at: Dict[str, datetime] = {}
+    if since is not None:
+        at["$gte"] = since
+    if before is not None:
+        at["$lt"] = before
+    if at:
+        query["at"] = at
+    if kind is not None:
+        query["kind"] = kind
+    return await LoginEvent.get_pymongo_collection().find(
+        query, {"_id": 0, "at": 1, "kind": 1, "ip": 1, "user_agent": 1},
+    ).sort("at", -1).limit(limit).to_list()
+
+
+def _collect_login_events():
+    return gauge_lines("login_events_pending", "Login events buffered and not yet written",
+                       [({}, login_event_writer.pending())])
+
+
+registry.add_collector(_collect_login_events)
@@ -1,33 +1,148 @@
-import sendgrid
-from sendgrid.helpers.mail import Email, To, Content, Mail
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import List
+
 from app.core.config import configurations
+from app.core.metrics import track_external
+
+_sendgrid_client = None
+_sendgrid_client_lock = threading.Lock()
+
+# SendGrid accepts at most 1000 personalizations per mail/send request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+def get_sendgrid_client():
+    """Return the process-wide SendGrid client, importing sendgrid on first use"""
+    global _sendgrid_client
+    if _sendgrid_client is None:
+        with _sendgrid_client_lock:
+            if _sendgrid_client is None:
+                import sendgrid
 
-sg = sendgrid.SendGridAPIClient(api_key=configurations.SENDGRID_API_KEY)
+                _sendgrid_client = sendgrid.SendGridAPIClient(api_key=configurations.SENDGRID_API_KEY)
+    return _sendgrid_client
 
 
 def send_grid_mail_send(subject, to_email, content, mime_type="plain"):
     # mime_types: "text/plain" or "text/html" or "text/x-amp-html"
+    from sendgrid.helpers.mail import Email, To, Content, Mail
+
     to_email = To(to_email)
     from_email = Email(configurations.MAIL_FROM)
     content = Content(f"text/{mime_type}", content)
     mail = Mail(from_email, to_email, subject, content)
 
-    response = sg.client.mail.send.post(request_body=mail.get())
+    with track_external("sendgrid", "mail_send"):
+        response = get_sendgrid_client().client.mail.send.post(request_body=mail.get())
     if int(response.status_code) != 202:
         raise Exception("send_grid_mail_send failed to send email")
 
 
+@dataclass
+class EmailBatch:
+    """
+    One outbound request: a shared subject/body sent to several personalizations.
+
+    Each personalization is the recipient list of one queued job, so recipients
+    of different jobs never see each other.
+    """
+    subject: str
+    content: str
+    mime_type: str = "html"
+    personalizations: List[List[str]] = field(default_factory=list)
+
+
+class SendGridTransport:
+    """Deliver batches through the SendGrid v3 mail/send API (blocking)"""
+
+    def send(self, batch: EmailBatch) -> None:
+        from sendgrid.helpers.mail import Email, To, Content, Mail, Personalization
+
+        mail = Mail()
+        mail.from_email = Email(configurations.MAIL_FROM)
+        mail.subject = batch.subject
+        mail.add_content(Content(f"text/{batch.mime_type}", batch.content))
+        for recipients in batch.personalizations:
+            personalization = Personalization()
+            for recipient in recipients:
+                personalization.add_to(To(recipient))
+            mail.add_personalization(personalization)
+
+        with track_external("sendgrid", "mail_send"):
+            response = get_sendgrid_client().client.mail.send.post(request_body=mail.get())
+        if int(response.status_code) != 202:
+            raise Exception(f"SendGrid responded with status {response.status_code}")
+
+
+class InMemoryTransport:
+    """Keep sent batches in memory; used for tests and local development"""
+
+    def __init__(self):
+        self.outbox: List[EmailBatch] = []
+
+    def send(self, batch: EmailBatch) -> None:
+        self.outbox.append(batch)
+
+
+class FileTransport:
+    """Write each batch as a JSON file into a directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def send(self, batch: EmailBatch) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(self.directory, f"{stamp}-{uuid.uuid4().hex[:8]}.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(asdict(batch), fh, indent=2)
+
+
+_transport = None
+
+
+def get_transport():
+    """Return the transport selected by MAIL_TRANSPORT (created once per process)"""
+    global _transport
+    if _transport is None:
+        kind = configurations.MAIL_TRANSPORT.lower()
+        if kind == "memory":
+            _transport = InMemoryTransport()
+        elif kind == "file":
+            _transport = FileTransport(configurations.MAIL_FILE_DIR)
+        elif kind == "sendgrid":
+            _transport = SendGridTransport()
+        else:
+            raise ValueError(f"Unknown MAIL_TRANSPORT: {configurations.MAIL_TRANSPORT}")
+    return _transport
+
+
+def set_transport(transport) -> None:
+    """Override the active transport (e.g. with an InMemoryTransport in tests)"""
+    global _transport
+    _transport = transport
+
+
 async def send_email(to_email: str, subject: str, html_content: str):
     """
-    Send email using SendGrid
-    
+    Queue an email for delivery by the background mail workers.
+
+    The SendGrid call happens off the request path; this only persists the job.
+
     Args:
         to_email: Recipient email address
         subject: Email subject
         html_content: HTML content of the email
     """
+    from app.services.mail_queue import enqueue_email
+
     try:
-        send_grid_mail_send(subject, to_email, html_content, "html")
+        await enqueue_email([to_email], subject, html_content, "html")
         return True
     except Exception as e:
         raise Exception(f"Failed to send email: {str(e)}")
@@ -0,0 +1,270 @@
+"""
+Mongo-backed email queue and background worker pool.
+
+Request handlers only call `enqueue_email`, which inserts an `EmailJob` and
+returns. Workers claim due jobs in batches under a lease, group jobs that share
+subject and body into one SendGrid request with a personalization per job, and
+run the blocking transport call in a thread. Failed jobs are retried with
+exponential backoff and dead-lettered after `max_attempts`. An attempt is
+counted when the job is claimed, so a job whose worker keeps dying mid-send is
+dead-lettered too instead of being reclaimed forever.
+"""
+
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.core.config import configurations
+from app.db.documents.email_job import EmailJob, EmailJobStatus
+from app.services.mail import EmailBatch, SENDGRID_MAX_PERSONALIZATIONS, get_transport
+
+logger = logging.getLogger(__name__)
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    base = configurations.MAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(base, configurations.MAIL_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def enqueue_email(
+    recipients: List[str],
+    subject: str,
+    content: str,
+    mime_type: str = "html",
+) -> EmailJob:
+    """Persist an email job and wake the local workers"""
+    job = EmailJob(
+        recipients=recipients,
+        subject=subject,
+        content=content,
+        mime_type=mime_type,
+        max_attempts=configurations.MAIL_MAX_ATTEMPTS,
+    )
+    await job.insert()
+    mail_worker_pool.wake()
+    return job
+
+
+async def claim_jobs(limit: int) -> List[EmailJob]:
+    """
+    Lease up to `limit` due jobs for this worker.
+
+    Pending jobs whose `next_attempt_at` has passed are due, as are jobs stuck
+    in "sending" whose lease expired (their worker died mid-batch); those that
+    already used all their attempts are dead-lettered instead. Claiming counts
+    an attempt.
+    """
+    now = utc_now()
+    await EmailJob.find({
+        "status": EmailJobStatus.SENDING.value,
+        "locked_until": {"$lte": now},
+        "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+    }).update_many({
+        "$set": {
+            "status": EmailJobStatus.DEAD.value,
+            "claim_id": None,
+            "locked_until": None,
+            "last_error": "Lease expired on the last attempt",
+        }
+    })
+    due_filter = {
+        "$or": [
+            {"status": EmailJobStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+            {"status": EmailJobStatus.SENDING.value, "locked_until": {"$lte": now}},
+        ]
+    }
+    candidates = await EmailJob.find(due_filter).sort("+next_attempt_at").limit(limit).to_list()
+    if not candidates:
+        return []
+
+    claim_id = uuid.uuid4().hex
+    # The due filter is repeated so a job claimed by another worker in the
+    # meantime is skipped atomically.
+    await EmailJob.find({"_id": {"$in": [job.id for job in candidates]}, **due_filter}).update_many(
+        {
+            "$set": {
+                "status": EmailJobStatus.SENDING.value,
+                "claim_id": claim_id,
+                "locked_until": now + timedelta(seconds=configurations.MAIL_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        }
+    )
+    return await EmailJob.find({"claim_id": claim_id}).to_list()
+
+
+def build_batches(jobs: List[EmailJob]) -> List[Tuple[EmailBatch, List[EmailJob]]]:
+    """Group jobs with identical subject/body into batches of personalizations"""
+    groups: Dict[Tuple[str, str, str], List[EmailJob]] = {}
+    for job in jobs:
+        groups.setdefault((job.subject, job.content, job.mime_type), []).append(job)
+
+    batches = []
+    for (subject, content, mime_type), grouped in groups.items():
+        for start in range(0, len(grouped), SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = grouped[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            batch = EmailBatch(
+                subject=subject,
+                content=content,
+                mime_type=mime_type,
+                personalizations=[list(job.recipients) for job in chunk],
+            )
+            batches.append((batch, chunk))
+    return batches
+
+
+async def mark_sent(jobs: List[EmailJob]) -> None:
+    """Mark jobs delivered, unless their lease expired and another worker reclaimed them"""
+    # Jobs delivered together come from a single claim
+    result = await EmailJob.find(
+        {"_id": {"$in": [job.id for job in jobs]}, "claim_id": jobs[0].claim_id}
+    ).update_many(
+        {
+            "$set": {
+                "status": EmailJobStatus.SENT.value,
+                "sent_at": utc_now(),
+                "claim_id": None,
+                "locked_until": None,
+                "last_error": None,
+            },
+        }
+    )
+    if result is not None and result.modified_count < len(jobs):
+        logger.warning("Lease lost on %d of %d sent email job(s)", len(jobs) - result.modified_count, len(jobs))
+
+
+async def mark_failed(jobs: List[EmailJob], error: str) -> None:
+    """Schedule a retry for each job, or dead-letter it when out of attempts"""
+    now = utc_now()
+    for job in jobs:
+        # `attempts` already counts this attempt (see `claim_jobs`)
+        attempts = job.attempts
+        update = {
+            "claim_id": None,
+            "locked_until": None,
+            "last_error": error,
+        }
+        if attempts >= job.max_attempts:
+            update["status"] = EmailJobStatus.DEAD.value
+            logger.error("Email job %s dead-lettered after %d attempts: %s", job.id, attempts, error)
+        else:
+            update["status"] = EmailJobStatus.PENDING.value
+            update["next_attempt_at"] = now + timedelta(seconds=retry_delay(attempts))
+        await EmailJob.find({"_id": job.id, "claim_id": job.claim_id}).update_many({"$set": update})
+
+
+async def process_batch(limit: Optional[int] = None) -> int:
+    """Claim and deliver one batch of jobs. Returns the number of jobs claimed."""
+    jobs = await claim_jobs(limit or configurations.MAIL_BATCH_SIZE)
+    if not jobs:
+        return 0
+
+    transport = get_transport()
+    for batch, batch_jobs in build_batches(jobs):
+        try:
+            await asyncio.to_thread(transport.send, batch)
+        except Exception as e:
+            logger.warning("Email batch of %d job(s) failed: %s", len(batch_jobs), e)
+            await mark_failed(batch_jobs, str(e))
+        else:
+            await mark_sent(batch_jobs)
+    return len(jobs)
+
+
+async def list_dead_letters(limit: int = 100) -> List[EmailJob]:
+    """Return dead-lettered jobs, newest first"""
+    return await EmailJob.find(
+        {"status": EmailJobStatus.DEAD.value}
+    ).sort("-created_at").limit(limit).to_list()
+
+
+async def requeue_dead_letter(job_id: str) -> bool:
+    """Move a dead-lettered job back to pending with a fresh attempt budget"""
+    result = await EmailJob.find(
+        {"_id": ObjectId(job_id), "status": EmailJobStatus.DEAD.value}
+    ).update_many(
+        {
+            "$set": {
+                "status": EmailJobStatus.PENDING.value,
+                "attempts": 0,
+                "next_attempt_at": utc_now(),
+            }
+        }
+    )
+    mail_worker_pool.wake()
+    return bool(result and result.modified_count)
+
+
+class EmailWorkerPool:
+    """A fixed number of asyncio workers draining the email queue"""
+
+    def __init__(self, size: Optional[int] = None):
+        # Resolved from MAIL_WORKERS on start() when not given
+        self.size = size
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self.size = self.size or configurations.MAIL_WORKERS
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(index), name=f"mail-worker-{index}")
+            for index in range(self.size)
+        ]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self.wake()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while not self._stopping:
+            # Cleared before claiming so an enqueue during the batch is not lost
+            self._wakeup.clear()
+            try:
+                claimed = await process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("mail-worker-%d failed to process batch: %s", index, e)
+                claimed = 0
+
+            if claimed:
+                continue
+            # Queue is empty: sleep until the poll interval elapses or a local
+            # enqueue wakes us up.
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=configurations.MAIL_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+mail_worker_pool = EmailWorkerPool()
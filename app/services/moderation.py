@@ -0,0 +1,350 @@
+"""
+Flagged-content moderation queue.
+
+Every flagged-content alert gets one `ModerationItem`. Moderators claim items
+with an atomic `find_one_and_update` that picks the highest-priority, oldest
+open item whose `available_at` has passed and moves `available_at` to the end
+of a lease. A moderator who disappears simply lets the lease run out and the
+item becomes claimable again. Resolving is a single conditional update from
+`open`, so when two moderators act on the same alert exactly one wins.
+
+Every claim, extend, release and action is appended to the `moderation_actions`
+audit log, readable newest first per alert or per moderator.
+
+Queue depth is sampled by `ModerationQueueMonitor` and exported as gauges;
+claims and time-to-action are recorded as they happen.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core import events
+from app.core.config import configurations
+from app.core.metrics import gauge_lines, registry
+from app.db.documents.moderation_action import ModerationAction
+from app.db.documents.moderation_item import ModerationItem, ModerationStatus
+from app.db.documents.notification import Notification, NotificationStatus, NotificationType
+
+logger = logging.getLogger("app.moderation")
+
+CLAIM_ORDER = [("priority", -1), ("created_at", 1)]
+
+MODERATION_CLAIMS = registry.counter(
+    "moderation_claims_total", "Moderation items claimed, by whether an expired lease was taken over", ["kind"],
+)
+MODERATION_ACTIONS = registry.counter(
+    "moderation_actions_total", "Moderation items closed, by action", ["action"],
+)
+MODERATION_TIME_TO_ACTION = registry.histogram(
+    "moderation_time_to_action_seconds", "Time from an alert being queued to a moderator acting on it", ["action"],
+    buckets=(60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400),
+)
+MODERATION_CLAIM_TO_ACTION = registry.histogram(
+    "moderation_claim_to_action_seconds", "Time from the last claim of an item to a moderator acting on it", ["action"],
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+class ModerationConflict(Exception):
+    """The item exists but is closed or leased to another moderator"""
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # pymongo returns naive UTC datetimes
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _collection():
+    return ModerationItem.get_pymongo_collection()
+
+
+async def enqueue(
+    alert_id: str,
+    notification_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    title: str = "",
+    priority: int = 0,
+) -> None:
+    """
+    Queue an alert for moderation. Idempotent per alert: a repeat keeps the
+    first notification and raises the priority if the new one is higher.
+    """
+    now = utc_now()
+    try:
+        await _collection().update_one(
+            {"alert_id": alert_id},
+            {
+                "$setOnInsert": {
+                    "notification_id": notification_id,
+                    "user_id": user_id,
+                    "title": title,
+                    "status": ModerationStatus.OPEN.value,
+                    "created_at": now,
+                    "available_at": now,
+                    "claims": 0,
+                },
+                "$max": {"priority": priority},
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # Lost an upsert race to another notification for the same alert
+        pass
+
+
+async def _ensure_queued(alert_id: str) -> bool:
+    """Queue an alert raised before the moderation queue existed; False if there is no such alert"""
+    notification = await Notification.get_pymongo_collection().find_one(
+        {"related_resource_id": alert_id, "type": NotificationType.FLAGGED_CONTENT.value},
+        {"user_id": 1, "title": 1},
+    )
+    if notification is None:
+        return False
+    await enqueue(alert_id, str(notification["_id"]), notification["user_id"], notification["title"])
+    return True
+
+
+async def _audit(alert_ids: List[str], actor: Optional[str], action: str, details: Optional[str] = None) -> None:
+    if not alert_ids:
+        return
+    now = utc_now()
+    await ModerationAction.get_pymongo_collection().insert_many(
+        [
+            {"alert_id": alert_id, "actor": actor, "action": action, "details": details, "at": now}
+            for alert_id in alert_ids
+        ],
+        ordered=False,
+    )
+
+
+async def _record_claims(moderator: str, items: List[Dict[str, Any]]) -> None:
+    for item in items:
+        MODERATION_CLAIMS.inc("reclaim" if item["claims"] > 1 else "first")
+    await _audit([item["alert_id"] for item in items], moderator, "claim")
+
+
+def _claim_update(moderator: str, token: str, now: datetime) -> Dict[str, Any]:
+    return {
+        "$set": {
+            "claimed_by": moderator,
+            "claim_token": token,
+            "claimed_at": now,
+            "available_at": now + timedelta(seconds=configurations.MODERATION_LEASE_SECONDS),
+        },
+        "$inc": {"claims": 1},
+    }
+
+
+async def claim_next(moderator: str) -> Optional[Dict[str, Any]]:
+    """Lease the highest-priority, oldest available item to `moderator`"""
+    now = utc_now()
+    item = await _collection().find_one_and_update(
+        {"status": ModerationStatus.OPEN.value, "available_at": {"$lte": now}},
+        _claim_update(moderator, uuid.uuid4().hex, now),
+        sort=CLAIM_ORDER,
+        return_document=ReturnDocument.AFTER,
+    )
+    if item is not None:
+        await _record_claims(moderator, [item])
+    return item
+
+
+async def claim_batch(moderator: str, count: int) -> List[Dict[str, Any]]:
+    """
+    Lease up to `count` items in three round trips instead of `count`.
+
+    Candidates are read in claim order, then claimed with one `update_many`
+    that re-checks availability, so an item another moderator took in between
+    is skipped rather than stolen. The items this call won carry its token.
+    """
+    if count <= 1:
+        item = await claim_next(moderator)
+        return [item] if item else []
+    now = utc_now()
+    available = {"status": ModerationStatus.OPEN.value, "available_at": {"$lte": now}}
+    candidates = await _collection().find(available, {"_id": 1}).sort(CLAIM_ORDER).limit(count).to_list()
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    ids = [doc["_id"] for doc in candidates]
+    await _collection().update_many({"_id": {"$in": ids}, **available}, _claim_update(moderator, token, now))
+    items = await _collection().find({"_id": {"$in": ids}, "claim_token": token}).sort(CLAIM_ORDER).to_list()
+    await _record_claims(moderator, items)
+    return items
+
+
+def _held_by(moderator: str, now: datetime) -> Dict[str, Any]:
+    return {"status": ModerationStatus.OPEN.value, "claimed_by": moderator, "available_at": {"$gt": now}}
+
+
+async def extend_lease(alert_id: str, moderator: str) -> Optional[Dict[str, Any]]:
+    """Restart the lease of an item `moderator` still holds; None if the lease was lost"""
+    now = utc_now()
+    item = await _collection().find_one_and_update(
+        {"alert_id": alert_id, **_held_by(moderator, now)},
+        {"$set": {"available_at": now + timedelta(seconds=configurations.MODERATION_LEASE_SECONDS)}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if item is not None:
+        await _audit([alert_id], moderator, "extend")
+    return item
+
+
+async def release(alert_id: str, moderator: str) -> bool:
+    """Hand an item back to the queue before its lease runs out"""
+    now = utc_now()
+    result = await _collection().update_one(
+        {"alert_id": alert_id, **_held_by(moderator, now)},
+        {"$set": {"available_at": now, "claim_token": None}},
+    )
+    if result.modified_count:
+        await _audit([alert_id], moderator, "release")
+    return bool(result.modified_count)
+
+
+async def _close_notifications(alert_id: str, action: str) -> None:
+    collection = Notification.get_pymongo_collection()
+    query = {"related_resource_id": alert_id, "type": NotificationType.FLAGGED_CONTENT.value}
+    user_ids = await collection.distinct("user_id", query)
+    new_status = NotificationStatus.DISMISSED if action == "ignore" else NotificationStatus.READ
+    await collection.update_many(query, {"$set": {"status": new_status.value}})
+    for user_id in user_ids:
+        events.publish("notifications.changed", user_id=user_id)
+
+
+async def complete(
+    alert_id: str,
+    action: str,
+    moderator: Optional[str] = None,
+    details: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Close an alert with `action` ("ignore", "resolve" or "action_taken").
+
+    Allowed for the moderator holding the lease, or for anyone once no lease
+    is held. Returns None if there is no such alert and raises
+    `ModerationConflict` if it is already closed or leased to someone else.
+    """
+    now = utc_now()
+    allowed: List[Dict[str, Any]] = [{"available_at": {"$lte": now}}]
+    if moderator:
+        allowed.append({"claimed_by": moderator})
+    item = await _collection().find_one_and_update(
+        {"alert_id": alert_id, "status": ModerationStatus.OPEN.value, "$or": allowed},
+        {"$set": {
+            "status": ModerationStatus.IGNORED.value if action == "ignore" else ModerationStatus.RESOLVED.value,
+            "action": action,
+            "details": details,
+            "resolved_at": now,
+            "resolved_by": moderator,
+            "claim_token": None,
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+    if item is None:
+        if await _collection().count_documents({"alert_id": alert_id}, limit=1):
+            raise ModerationConflict(alert_id)
+        if not await _ensure_queued(alert_id):
+            return None
+        return await complete(alert_id, action, moderator, details)
+
+    MODERATION_ACTIONS.inc(action)
+    MODERATION_TIME_TO_ACTION.observe(action, value=(now - _as_utc(item["created_at"])).total_seconds())
+    if item.get("claimed_at"):
+        MODERATION_CLAIM_TO_ACTION.observe(action, value=(now - _as_utc(item["claimed_at"])).total_seconds())
+    await asyncio.gather(_audit([alert_id], moderator, action, details), _close_notifications(alert_id, action))
+    return item
+
+
+async def action_history(
+    alert_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    before: Optional[ObjectId] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """
+    Audit entries for one alert or one moderator, newest first.
+
+    Pages by `_id`: pass the last entry's id as `before` for the next page, so
+    each page is an index range scan however deep the history goes.
+    """
+    query: Dict[str, Any] = {"alert_id": alert_id} if alert_id is not None else {"actor": actor}
+    if before is not None:
+        query["_id"] = {"$lt": before}
+    return await ModerationAction.get_pymongo_collection().find(query).sort("_id", -1).limit(limit).to_list()
+
+
+async def queue_stats() -> Dict[str, Any]:
+    """Open items split by whether they are leased, and the age of the oldest one"""
+    now = utc_now()
+    collection = _collection()
+    available, leased, oldest = await asyncio.gather(
+        collection.count_documents({"status": ModerationStatus.OPEN.value, "available_at": {"$lte": now}}),
+        collection.count_documents({"status": ModerationStatus.OPEN.value, "available_at": {"$gt": now}}),
+        collection.find_one(
+            {"status": ModerationStatus.OPEN.value}, {"created_at": 1}, sort=[("created_at", 1)],
+        ),
+    )
+    return {
+        "available": available,
+        "leased": leased,
+        "oldest_open_age_seconds": (now - _as_utc(oldest["created_at"])).total_seconds() if oldest else 0.0,
+    }
+
+
+class ModerationQueueMonitor:
+    """Background task that samples queue depth for the metrics endpoint"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {}
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run(), name="moderation-queue-monitor")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.stats = await queue_stats()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Moderation queue sampling failed: %s", e)
+            await asyncio.sleep(configurations.MODERATION_STATS_INTERVAL_SECONDS)
+
+
+moderation_queue_monitor = ModerationQueueMonitor()
+
+
+def _collect_queue_stats():
+    stats = moderation_queue_monitor.stats
+    if not stats:
+        return []
+    return (
+        gauge_lines("moderation_queue_depth", "Open moderation items, by whether they are leased",
+                    [({"state": "available"}, stats["available"]), ({"state": "leased"}, stats["leased"])])
+        + gauge_lines("moderation_queue_oldest_age_seconds", "Age of the oldest open moderation item",
+                      [({}, stats["oldest_open_age_seconds"])])
+    )
+
+
+registry.add_collector(_collect_queue_stats)
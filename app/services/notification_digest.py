@@ -0,0 +1,288 @@
+"""
+Coalesced notification digest emails.
+
+Every new notification is pushed into the user's open `NotificationDigest`.
+The window opens with the first notification and closes after the user's
+cadence (immediate, hourly or daily); the scheduler then renders the whole
+window into a single email and hands it to the mail queue.
+"""
+
+import asyncio
+import html
+import logging
+from datetime import datetime, timedelta, timezone
+from string import Template
+from typing import List, Optional
+
+from beanie import UpdateResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import configurations
+from app.core.metrics import registry
+from app.db.documents.notification import Notification, NotificationStatus
+from app.db.documents.notification_digest import NotificationDigest
+from app.db.documents.user import User, DigestCadence
+from app.services.mail_queue import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+CADENCE_WINDOWS = {
+    DigestCadence.immediate: timedelta(0),
+    DigestCadence.hourly: timedelta(hours=1),
+    DigestCadence.daily: timedelta(days=1),
+}
+
+# A claimed digest that was not removed within this time is reclaimed
+DIGEST_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+DIGEST_TEMPLATE = Template("""\
+<html>
+  <body>
+    <p>Hi $name,</p>
+    <p>You have $count new notification$plural on $app_name:</p>
+    <ul>
+$items
+    </ul>
+$more
+    <p><a href="$frontend_url">Open $app_name</a></p>
+  </body>
+</html>
+""")
+
+DIGEST_ITEM_TEMPLATE = Template("      <li><strong>$title</strong><br>$message</li>")
+
+# Emails saved is notifications{stage="emailed"} minus digests{outcome="sent"}
+DIGEST_NOTIFICATIONS = registry.counter(
+    "notification_digest_notifications_total",
+    "Notifications added to a digest (generated) and delivered in a digest email (emailed)", ("stage",),
+)
+DIGESTS = registry.counter(
+    "notification_digests_total", "Closed digest windows by outcome (sent or skipped)", ("outcome",),
+)
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class DigestStats:
+    """In-process counters comparing notifications generated with emails sent"""
+
+    def __init__(self):
+        self.notifications_generated = 0
+        self.notifications_emailed = 0
+        self.digests_sent = 0
+        self.digests_skipped = 0
+
+    def generated(self) -> None:
+        self.notifications_generated += 1
+        DIGEST_NOTIFICATIONS.inc("generated")
+
+    def sent(self, count: int) -> None:
+        self.notifications_emailed += count
+        self.digests_sent += 1
+        DIGEST_NOTIFICATIONS.inc("emailed", amount=count)
+        DIGESTS.inc("sent")
+
+    def skipped(self) -> None:
+        self.digests_skipped += 1
+        DIGESTS.inc("skipped")
+
+    @property
+    def emails_saved(self) -> int:
+        return self.notifications_emailed - self.digests_sent
+
+    def snapshot(self) -> dict:
+        return {
+            "notifications_generated": self.notifications_generated,
+            "notifications_emailed": self.notifications_emailed,
+            "digests_sent": self.digests_sent,
+            "digests_skipped": self.digests_skipped,
+            "emails_saved": self.emails_saved,
+        }
+
+
+digest_stats = DigestStats()
+
+
+async def record_notification(notification: Notification) -> None:
+    """Add a notification to its user's open digest, opening one if needed"""
+    digest_stats.generated()
+    push = {
+        "$push": {"notification_ids": str(notification.id)},
+        "$inc": {"notification_count": 1},
+    }
+
+    # Common case: a window is already open, one round trip and no user lookup
+    result = await NotificationDigest.find_one(
+        {"user_id": notification.user_id, "open": True}
+    ).update(push)
+    if result and result.matched_count:
+        return
+
+    try:
+        user = await User.get(ObjectId(notification.user_id))
+    except InvalidId:
+        user = None
+    if not user:
+        logger.debug("No user %s for notification digest", notification.user_id)
+        return
+
+    cadence = DigestCadence(user.notification_digest)
+    now = utc_now()
+    try:
+        await NotificationDigest.find_one(
+            {"user_id": notification.user_id, "open": True}
+        ).update(
+            {
+                **push,
+                "$setOnInsert": {
+                    "email": user.email,
+                    "cadence": cadence.value,
+                    "window_start": now,
+                    "due_at": now + CADENCE_WINDOWS[cadence],
+                },
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # A concurrent upsert opened the window first; join it
+        await NotificationDigest.find_one(
+            {"user_id": notification.user_id, "open": True}
+        ).update(push)
+
+    if cadence == DigestCadence.immediate:
+        digest_scheduler.wake()
+
+
+def render_digest(notifications: List[Notification], name: str) -> str:
+    """Render the digest email once for the whole batch"""
+    shown = notifications[:configurations.DIGEST_MAX_ITEMS]
+    items = "\n".join(
+        DIGEST_ITEM_TEMPLATE.substitute(
+            title=html.escape(notif.title),
+            message=html.escape(notif.message),
+        )
+        for notif in shown
+    )
+    hidden = len(notifications) - len(shown)
+    more = f"    <p>... and {hidden} more.</p>" if hidden > 0 else ""
+    return DIGEST_TEMPLATE.substitute(
+        name=html.escape(name),
+        count=len(notifications),
+        plural="" if len(notifications) == 1 else "s",
+        app_name=html.escape(configurations.APP_NAME),
+        items=items,
+        more=more,
+        frontend_url=html.escape(configurations.FRONTEND_URL, quote=True),
+    )
+
+
+async def claim_due_digest() -> Optional[NotificationDigest]:
+    now = utc_now()
+    return await NotificationDigest.find_one(
+        {
+            "$or": [
+                {"open": True, "due_at": {"$lte": now}},
+                {"open": False, "due_at": {"$lte": now - DIGEST_CLAIM_TIMEOUT}},
+            ]
+        }
+    ).update(
+        # due_at is pushed forward so a crashed flush is retried after the timeout
+        {"$set": {"open": False, "due_at": now}},
+        response_type=UpdateResponse.NEW_DOCUMENT,
+        sort=[("due_at", 1)],
+    )
+
+
+async def flush_digest(digest: NotificationDigest) -> bool:
+    """Render and queue one claimed digest. Returns True if an email was queued."""
+    object_ids = []
+    for notif_id in digest.notification_ids:
+        try:
+            object_ids.append(ObjectId(notif_id))
+        except InvalidId:
+            continue
+
+    # Notifications already read or dismissed in the app are not emailed
+    notifications = await Notification.find(
+        {"_id": {"$in": object_ids}, "status": NotificationStatus.UNREAD.value}
+    ).sort("-created_at").to_list()
+
+    sent = False
+    if notifications:
+        user = await User.get(ObjectId(digest.user_id))
+        name = (user.full_name if user else None) or "there"
+        count = len(notifications)
+        subject = (
+            notifications[0].title if count == 1
+            else f"You have {count} new notifications on {configurations.APP_NAME}"
+        )
+        await enqueue_email([digest.email], subject, render_digest(notifications, name))
+        digest_stats.sent(count)
+        sent = True
+    else:
+        digest_stats.skipped()
+
+    await digest.delete()
+    return sent
+
+
+async def flush_due_digests(limit: int = 500) -> int:
+    """Flush up to `limit` due digests. Returns the number processed."""
+    processed = 0
+    while processed < limit:
+        digest = await claim_due_digest()
+        if not digest:
+            break
+        try:
+            await flush_digest(digest)
+        except Exception as e:
+            logger.exception("Failed to flush digest for user %s: %s", digest.user_id, e)
+        processed += 1
+    return processed
+
+
+class DigestScheduler:
+    """Background task that periodically flushes due digests"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="digest-scheduler")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await flush_due_digests()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Digest flush failed: %s", e)
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=configurations.DIGEST_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+digest_scheduler = DigestScheduler()
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from app.core import events
+from app.db.documents.notification import Notification, NotificationType
+from app.services import moderation
+from app.services.notification_digest import record_notification
+
+
+async def create_notification(
+    user_id: str,
+    title: str,
+    message: str,
+    type: str = NotificationType.SYSTEM,
+    related_resource_id: Optional[str] = None,
+) -> Notification:
+    """
+    Create a notification for a user and add it to their email digest.
+
+    All code that produces notifications should go through this function so the
+    user gets at most one email per digest window instead of one per notification.
+    Flagged-content notifications also queue their alert for moderation.
+    """
+    notification = Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        type=type,
+        related_resource_id=related_resource_id,
+    )
+    await notification.insert()
+    await record_notification(notification)
+    if type == NotificationType.FLAGGED_CONTENT and related_resource_id:
+        await moderation.enqueue(related_resource_id, str(notification.id), user_id, title)
+    events.publish("notifications.changed", user_id=user_id)
+    return notification
@@ -0,0 +1,192 @@
+"""
+Parent dashboard: every linked child's progress and notifications in one response.
+
+Children are resolved through the `parent_links` index, then each child's
+standing and notifications are fetched concurrently, at most
+PARENT_DASHBOARD_CONCURRENCY children at a time so one parent with many
+children cannot take over the connection pool.
+
+Dashboards are cached per parent for PARENT_DASHBOARD_CACHE_TTL_SECONDS and
+dropped as soon as this worker publishes a change for the parent or one of the
+children (app/core/events.py); the TTL bounds staleness from changes made in
+other workers.
+"""
+
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core import events
+from app.core.cache import TTLCache
+from app.core.config import configurations
+from app.db.documents.notification import Notification, NotificationStatus
+from app.db.documents.parent_link import ParentLink
+from app.db.documents.school_rollup import StudentStanding
+from app.services.users import get_users_by_ids
+
+RECENT_NOTIFICATIONS = 5
+
+
+class ParentDashboardCache:
+    """Per-parent dashboards, with the child -> parents map needed to invalidate them"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.entries: TTLCache[Dict[str, Any]] = TTLCache("parent_dashboard", ttl=ttl, maxsize=maxsize)
+        self.parents_of: Dict[str, Set[str]] = defaultdict(set)
+        # Bumped on every invalidation, so a dashboard built from older data is not stored
+        self.versions: Dict[str, int] = defaultdict(int)
+
+    def get(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(parent_id)
+
+    def version(self, parent_id: str) -> int:
+        return self.versions[parent_id]
+
+    def track(self, parent_id: str, child_ids: List[str]) -> None:
+        """Route the children's change events to this parent, before its dashboard is built"""
+        for child_id in child_ids:
+            self.parents_of[child_id].add(parent_id)
+
+    def store(self, parent_id: str, version: int, dashboard: Dict[str, Any]) -> None:
+        if self.versions[parent_id] == version:
+            self.entries.set(parent_id, dashboard)
+
+    def invalidate_parent(self, parent_id: str) -> None:
+        self.versions[parent_id] += 1
+        self.entries.invalidate(parent_id)
+
+    def invalidate_children(self, child_ids) -> None:
+        for child_id in child_ids:
+            for parent_id in self.parents_of.pop(child_id, ()):
+                self.invalidate_parent(parent_id)
+
+
+@lru_cache(maxsize=1)
+def dashboard_cache() -> ParentDashboardCache:
+    cache = ParentDashboardCache(
+        ttl=configurations.PARENT_DASHBOARD_CACHE_TTL_SECONDS,
+        maxsize=configurations.PARENT_DASHBOARD_CACHE_MAX_ENTRIES,
+    )
+    events.subscribe("notifications.changed", lambda user_id: cache.invalidate_children([user_id]))
+    events.subscribe("school.standings_changed", lambda student_ids: cache.invalidate_children(student_ids))
+    events.subscribe("parent_links.changed", lambda parent_id: cache.invalidate_parent(parent_id))
+    return cache
+
+
+async def link_child(parent_id: str, child_id: str) -> bool:
+    """Give a parent access to a child; False if the link already existed"""
+    try:
+        await ParentLink(parent_id=parent_id, child_id=child_id).insert()
+    except DuplicateKeyError:
+        return False
+    events.publish("parent_links.changed", parent_id=parent_id)
+    return True
+
+
+async def unlink_child(parent_id: str, child_id: str) -> bool:
+    result = await ParentLink.get_pymongo_collection().delete_one({"parent_id": parent_id, "child_id": child_id})
+    if result.deleted_count:
+        events.publish("parent_links.changed", parent_id=parent_id)
+    return bool(result.deleted_count)
+
+
+async def child_ids_of(parent_id: str) -> List[str]:
+    cursor = ParentLink.get_pymongo_collection().find(
+        {"parent_id": parent_id}, {"_id": 0, "child_id": 1},
+    ).sort("child_id", 1)
+    return [doc["child_id"] async for doc in cursor]
+
+
+async def _standings(child_id: str) -> List[Dict[str, Any]]:
+    docs = await StudentStanding.get_pymongo_collection().find(
+        {"student_id": child_id},
+        {"_id": 0, "school_id": 1, "grade": 1, "avg_score": 1, "score_count": 1, "minutes": 1,
+         "last_active_at": 1, "low_score": 1},
+    ).to_list()
+    return [
+        {
+            "school_id": doc["school_id"],
+            "grade": doc["grade"],
+            "average_score": round(doc["avg_score"], 2) if doc.get("avg_score") is not None else None,
+            "assessments": doc.get("score_count", 0),
+            "minutes": round(doc.get("minutes", 0.0), 1),
+            "last_active_at": doc.get("last_active_at"),
+            "low_score": doc.get("low_score", False),
+        }
+        for doc in docs
+    ]
+
+
+async def _notifications(child_id: str) -> Dict[str, Any]:
+    collection = Notification.get_pymongo_collection()
+    unread, recent = await asyncio.gather(
+        collection.count_documents({"user_id": child_id, "status": NotificationStatus.UNREAD.value}),
+        collection.find(
+            {"user_id": child_id, "status": {"$ne": NotificationStatus.DISMISSED.value}},
+            {"title": 1, "type": 1, "status": 1, "created_at": 1},
+        ).sort("created_at", -1).limit(RECENT_NOTIFICATIONS).to_list(),
+    )
+    return {
+        "unread": unread,
+        "recent": [
+            {
+                "id": str(doc["_id"]),
+                "title": doc["title"],
+                "type": doc["type"],
+                "status": doc["status"],
+                "created_at": doc["created_at"],
+            }
+            for doc in recent
+        ],
+    }
+
+
+async def _child_summary(child_id: str, user, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    async with semaphore:
+        standings, notifications = await asyncio.gather(_standings(child_id), _notifications(child_id))
+    return {
+        "child_id": child_id,
+        "name": user.full_name if user else None,
+        "email": user.email if user else None,
+        "standings": standings,
+        "notifications": notifications,
+    }
+
+
+async def build_dashboard(parent_id: str, child_ids: List[str]) -> Dict[str, Any]:
+    oids = [ObjectId(child_id) for child_id in child_ids if ObjectId.is_valid(child_id)]
+    users = await get_users_by_ids(oids) if oids else {}
+    semaphore = asyncio.Semaphore(configurations.PARENT_DASHBOARD_CONCURRENCY)
+    children = await asyncio.gather(*(
+        _child_summary(
+            child_id,
+            users.get(ObjectId(child_id)) if ObjectId.is_valid(child_id) else None,
+            semaphore,
+        )
+        for child_id in child_ids
+    ))
+    return {
+        "parent_id": parent_id,
+        "children": list(children),
+        "unread_notifications": sum(child["notifications"]["unread"] for child in children),
+        "children_needing_attention": sum(
+            1 for child in children if any(standing["low_score"] for standing in child["standings"])
+        ),
+    }
+
+
+async def get_parent_dashboard(parent_id: str) -> Dict[str, Any]:
+    cache = dashboard_cache()
+    cached = cache.get(parent_id)
+    if cached is not None:
+        return cached
+    version = cache.version(parent_id)
+    child_ids = await child_ids_of(parent_id)
+    cache.track(parent_id, child_ids)
+    dashboard = await build_dashboard(parent_id, child_ids)
+    cache.store(parent_id, version, dashboard)
+    return dashboard
@@ -0,0 +1,409 @@
+"""
+Bulk school roster provisioning.
+
+`create_import` parses an uploaded CSV or NDJSON roster, stores one
+`RosterImportRow` per line and returns at once. The runner leases the import
+and works through it in chunks: Cognito users are created with bounded
+parallelism, a throttled call pauses every caller with exponential backoff,
+and then the chunk's `User` documents are written with one unordered
+`insert_many`. Row status is persisted after each stage, so an import
+interrupted by a restart resumes where it stopped once its lease expires.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from beanie import UpdateResponse
+from bson import ObjectId
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.cognito import CognitoThrottled, CognitoUserExists, admin_create_user
+from app.core.config import configurations
+from app.core.metrics import registry
+from app.db.documents.roster_import import (
+    RosterImport,
+    RosterImportRow,
+    RosterImportStatus,
+    RosterRowStatus,
+)
+from app.db.documents.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+SOURCE_FORMATS = ("csv", "ndjson")
+MAX_THROTTLE_BACKOFF_SECONDS = 30.0
+DUPLICATE_KEY_ERROR = 11000
+
+ROSTER_ROWS = registry.counter(
+    "roster_rows_total", "Roster import rows by final status", ("status",),
+)
+ROSTER_COGNITO_THROTTLED = registry.counter(
+    "roster_cognito_throttled_total", "Throttled Cognito calls during roster imports",
+)
+
+_email_adapter = TypeAdapter(EmailStr)
+
+
+class RosterParseError(ValueError):
+    """The uploaded roster cannot be read at all"""
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _records(body: bytes, source_format: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, parse error) for every non-blank line"""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise RosterParseError("Roster must be UTF-8 encoded")
+
+    records = []
+    if source_format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or "email" not in [name.strip().lower() for name in reader.fieldnames]:
+            raise RosterParseError("CSV header must include an 'email' column")
+        for row in reader:
+            record = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            if any(record.values()):
+                records.append((reader.line_num, record, None))
+    elif source_format == "ndjson":
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                records.append((line_number, None, f"Invalid JSON: {e.msg}"))
+                continue
+            if not isinstance(record, dict):
+                records.append((line_number, None, "Line is not a JSON object"))
+                continue
+            records.append((line_number, {str(key).lower(): value for key, value in record.items()}, None))
+    else:
+        raise RosterParseError(f"Unsupported roster format '{source_format}'")
+    return records
+
+
+def parse_roster(body: bytes, source_format: str, import_id: str, default_role: str) -> List[RosterImportRow]:
+    """
+    Turn an uploaded roster into import rows. Lines that cannot be provisioned
+    (bad email, unknown role, duplicate email) become INVALID rows with an error.
+    """
+    records = _records(body, source_format)
+    if len(records) > configurations.ROSTER_MAX_ROWS:
+        raise RosterParseError(f"Roster has {len(records)} rows; the limit is {configurations.ROSTER_MAX_ROWS}")
+
+    roles = {role.value for role in UserRole}
+    first_seen: Dict[str, int] = {}
+    rows = []
+    for row_number, record, error in records:
+        row = RosterImportRow(import_id=import_id, row_number=row_number)
+        if record is not None:
+            raw_email = str(record.get("email") or "").strip()
+            row.email = raw_email.lower() or None
+            row.full_name = str(record.get("name") or record.get("full_name") or "").strip() or None
+            row.role = str(record.get("role") or default_role).strip().lower()
+            if not raw_email:
+                error = "Missing email"
+            elif row.role not in roles:
+                error = f"Unknown role '{row.role}'"
+            else:
+                try:
+                    _email_adapter.validate_python(raw_email)
+                except ValidationError:
+                    error = f"Invalid email '{raw_email}'"
+            if error is None and row.email in first_seen:
+                error = f"Duplicate of row {first_seen[row.email]}"
+            if error is None:
+                first_seen[row.email] = row_number
+        if error is not None:
+            row.status = RosterRowStatus.INVALID.value
+            row.error = error
+        rows.append(row)
+    return rows
+
+
+async def create_import(body: bytes, source_format: str, default_role: str = UserRole.student.value) -> RosterImport:
+    """Store the roster rows and queue the import for the background runner"""
+    job = RosterImport(source_format=source_format)
+    # Parsing and validating a full roster takes long enough to stall the event loop
+    rows = await asyncio.to_thread(parse_roster, body, source_format, str(job.id), default_role)
+    invalid = sum(1 for row in rows if row.status == RosterRowStatus.INVALID.value)
+
+    # Rows go in before the import itself so the runner never sees a partial roster
+    for start in range(0, len(rows), configurations.ROSTER_CHUNK_SIZE):
+        await RosterImportRow.insert_many(rows[start:start + configurations.ROSTER_CHUNK_SIZE], ordered=False)
+    job.total_rows = len(rows)
+    job.counts = {RosterRowStatus.INVALID.value: invalid} if invalid else {}
+    await job.insert()
+    if invalid:
+        ROSTER_ROWS.inc(RosterRowStatus.INVALID.value, amount=invalid)
+    roster_import_runner.wake()
+    return job
+
+
+async def claim_import() -> Optional[RosterImport]:
+    """Lease the oldest pending import, or a running one whose worker died"""
+    now = utc_now()
+    return await RosterImport.find_one(
+        {
+            "$or": [
+                {"status": RosterImportStatus.PENDING.value},
+                {"status": RosterImportStatus.RUNNING.value, "locked_until": {"$lte": now}},
+            ]
+        }
+    ).update(
+        {
+            "$set": {
+                "status": RosterImportStatus.RUNNING.value,
+                "claim_id": uuid.uuid4().hex,
+                "locked_until": now + timedelta(seconds=configurations.ROSTER_LEASE_SECONDS),
+            }
+        },
+        response_type=UpdateResponse.NEW_DOCUMENT,
+        sort=[("created_at", 1)],
+    )
+
+
+async def _renew_lease(job: RosterImport) -> bool:
+    result = await RosterImport.find({"_id": job.id, "claim_id": job.claim_id}).update_many(
+        {"$set": {"locked_until": utc_now() + timedelta(seconds=configurations.ROSTER_LEASE_SECONDS)}}
+    )
+    return bool(result and result.matched_count)
+
+
+async def provision_cognito(
+    rows: List[RosterImportRow],
+    concurrency: Optional[int] = None,
+) -> List[Tuple[RosterImportRow, str, Optional[str]]]:
+    """
+    Create Cognito users for `rows`, at most `concurrency` calls at a time.
+
+    A throttled call makes every caller wait out an exponential backoff before
+    its next attempt; a row still throttled after ROSTER_THROTTLE_RETRIES
+    retries fails. Users that already exist in Cognito count as provisioned.
+    """
+    concurrency = concurrency or configurations.ROSTER_COGNITO_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    # A dedicated pool, so the parallelism is real on small machines and the
+    # default executor stays free for request handlers
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="roster-cognito")
+    loop = asyncio.get_running_loop()
+    pause_until = 0.0
+
+    async def provision(row: RosterImportRow) -> Tuple[RosterImportRow, str, Optional[str]]:
+        nonlocal pause_until
+        async with semaphore:
+            retries = 0
+            while True:
+                delay = pause_until - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                row.cognito_attempts += 1
+                try:
+                    await loop.run_in_executor(executor, admin_create_user, row.email, row.full_name)
+                    return row, RosterRowStatus.PROVISIONED.value, None
+                except CognitoUserExists:
+                    return row, RosterRowStatus.PROVISIONED.value, None
+                except CognitoThrottled as e:
+                    ROSTER_COGNITO_THROTTLED.inc()
+                    retries += 1
+                    if retries > configurations.ROSTER_THROTTLE_RETRIES:
+                        return row, RosterRowStatus.FAILED.value, str(e)
+                    backoff = min(
+                        configurations.ROSTER_THROTTLE_BASE_SECONDS * 2 ** (retries - 1),
+                        MAX_THROTTLE_BACKOFF_SECONDS,
+                    ) * random.uniform(0.5, 1.0)
+                    pause_until = max(pause_until, loop.time() + backoff)
+                except ValueError as e:
+                    return row, RosterRowStatus.FAILED.value, str(e)
+
+    try:
+        return await asyncio.gather(*(provision(row) for row in rows))
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def create_users(rows: List[RosterImportRow]) -> List[Tuple[RosterImportRow, str, Optional[str], Optional[str]]]:
+    """
+    Write `User` documents for provisioned rows with one unordered `insert_many`.
+    Returns (row, status, user_id, error); emails already in `users` are EXISTING.
+    """
+    existing = {
+        user.email: str(user.id)
+        for user in await User.find({"email": {"$in": [row.email for row in rows]}}).to_list()
+    }
+    outcomes = []
+    pending: List[Tuple[RosterImportRow, User]] = []
+    for row in rows:
+        if row.email in existing:
+            outcomes.append((row, RosterRowStatus.EXISTING.value, existing[row.email], None))
+        else:
+            pending.append((row, User(email=row.email, full_name=row.full_name, role=row.role)))
+    if not pending:
+        return outcomes
+
+    write_errors: Dict[int, dict] = {}
+    try:
+        await User.insert_many([user for _, user in pending], ordered=False)
+    except BulkWriteError as e:
+        write_errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+    for index, (row, user) in enumerate(pending):
+        error = write_errors.get(index)
+        if error is None:
+            outcomes.append((row, RosterRowStatus.CREATED.value, str(user.id), None))
+        elif error.get("code") == DUPLICATE_KEY_ERROR:
+            # Inserted concurrently, e.g. by the user registering themselves
+            matched = await User.find_one({"email": row.email})
+            outcomes.append((row, RosterRowStatus.EXISTING.value, str(matched.id) if matched else None, None))
+        else:
+            outcomes.append((row, RosterRowStatus.FAILED.value, None, error.get("errmsg", "Insert failed")))
+    return outcomes
+
+
+async def _save_rows(updates: List[Tuple[RosterImportRow, Dict]]) -> None:
+    if updates:
+        await RosterImportRow.get_pymongo_collection().bulk_write(
+            [UpdateOne({"_id": row.id}, {"$set": fields}) for row, fields in updates],
+            ordered=False,
+        )
+
+
+async def process_chunk(job: RosterImport) -> int:
+    """Provision the next chunk of an import. Returns the number of rows handled."""
+    rows = await RosterImportRow.find(
+        {
+            "import_id": str(job.id),
+            "status": {"$in": [RosterRowStatus.PENDING.value, RosterRowStatus.PROVISIONED.value]},
+        }
+    ).sort("+row_number").limit(configurations.ROSTER_CHUNK_SIZE).to_list()
+    if not rows:
+        return 0
+
+    counts: Dict[str, int] = {}
+    to_provision = [row for row in rows if row.status == RosterRowStatus.PENDING.value]
+    provisioned = [row for row in rows if row.status == RosterRowStatus.PROVISIONED.value]
+
+    cognito_updates = []
+    for row, status, error in await provision_cognito(to_provision):
+        cognito_updates.append((row, {"status": status, "error": error, "cognito_attempts": row.cognito_attempts}))
+        if status == RosterRowStatus.PROVISIONED.value:
+            provisioned.append(row)
+        else:
+            counts[status] = counts.get(status, 0) + 1
+    # Persisted before the User writes so a resumed import does not call Cognito again
+    await _save_rows(cognito_updates)
+
+    user_updates = []
+    if provisioned:
+        for row, status, user_id, error in await create_users(provisioned):
+            user_updates.append((row, {"status": status, "user_id": user_id, "error": error}))
+            counts[status] = counts.get(status, 0) + 1
+    await _save_rows(user_updates)
+
+    if counts:
+        await RosterImport.find({"_id": job.id}).update_many(
+            {"$inc": {f"counts.{status}": count for status, count in counts.items()}}
+        )
+        for status, count in counts.items():
+            ROSTER_ROWS.inc(status, amount=count)
+    return len(rows)
+
+
+async def run_import(job: RosterImport) -> None:
+    """Process a leased import chunk by chunk until it completes or the lease is lost"""
+    if job.started_at is None:
+        await RosterImport.find({"_id": job.id}).update_many({"$set": {"started_at": utc_now()}})
+    while True:
+        if not await _renew_lease(job):
+            logger.warning("Lost the lease on roster import %s", job.id)
+            return
+        if not await process_chunk(job):
+            break
+    await RosterImport.find({"_id": job.id, "claim_id": job.claim_id}).update_many(
+        {
+            "$set": {
+                "status": RosterImportStatus.COMPLETED.value,
+                "finished_at": utc_now(),
+                "claim_id": None,
+                "locked_until": None,
+            }
+        }
+    )
+    logger.info("Roster import %s completed", job.id)
+
+
+async def retry_failed_rows(import_id: str) -> int:
+    """Queue an import's FAILED rows again. Returns the number of rows requeued."""
+    result = await RosterImportRow.find(
+        {"import_id": import_id, "status": RosterRowStatus.FAILED.value}
+    ).update_many({"$set": {"status": RosterRowStatus.PENDING.value, "error": None}})
+    requeued = result.modified_count if result else 0
+    if requeued:
+        await RosterImport.find({"_id": ObjectId(import_id)}).update_many(
+            {"$inc": {f"counts.{RosterRowStatus.FAILED.value}": -requeued}}
+        )
+        await RosterImport.find(
+            {"_id": ObjectId(import_id), "status": RosterImportStatus.COMPLETED.value}
+        ).update_many({"$set": {"status": RosterImportStatus.PENDING.value, "finished_at": None}})
+        roster_import_runner.wake()
+    return requeued
+
+
+class RosterImportRunner:
+    """Background task that runs queued roster imports one at a time"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="roster-import-runner")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await claim_import()
+                if job is not None:
+                    await run_import(job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Roster import failed: %s", e)
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=configurations.ROSTER_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+roster_import_runner = RosterImportRunner()
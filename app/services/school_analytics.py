@@ -0,0 +1,327 @@
+"""
+School-wide analytics for school managers, served from precomputed rollups.
+
+Recording a score or usage updates the rollups incrementally, class -> grade ->
+school, plus the student's standing and a per-day usage bucket, so reads never
+scan a school's raw results. `apply_events` folds a batch of events into one
+delta per rollup document and writes each collection with a single unordered
+`bulk_write`; the four rollup collections are written concurrently.
+
+Reads are a handful of indexed lookups, run concurrently with `asyncio.gather`.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core import events
+from app.core.config import configurations
+from app.db.documents.school_rollup import (
+    ClassRollup,
+    GradeRollup,
+    SchoolRollup,
+    SchoolUsageDay,
+    StudentStanding,
+)
+from app.services.users import get_users_by_ids
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class SchoolEvent:
+    """A score and/or minutes of usage for one student in one class"""
+    school_id: str
+    class_id: str
+    grade: str
+    subject: str
+    student_id: str
+    score: Optional[float] = None
+    minutes: float = 0.0
+    at: datetime = field(default_factory=utc_now)
+
+    def __post_init__(self):
+        # Naive timestamps are taken as UTC
+        if self.at.tzinfo is None:
+            self.at = self.at.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class _Delta:
+    score_sum: float = 0.0
+    score_count: int = 0
+    minutes: float = 0.0
+    sessions: int = 0
+    last_at: Optional[datetime] = None
+
+    def add(self, event: SchoolEvent) -> None:
+        if event.score is not None:
+            self.score_sum += event.score
+            self.score_count += 1
+        if event.minutes:
+            self.minutes += event.minutes
+            self.sessions += 1
+        if self.last_at is None or event.at > self.last_at:
+            self.last_at = event.at
+
+
+def _standing_update(key: Tuple[str, str], grade: str, delta: _Delta) -> UpdateOne:
+    """Add the delta and recompute the average and low-score flag in one pipeline update"""
+    school_id, student_id = key
+    return UpdateOne(
+        {"school_id": school_id, "student_id": student_id},
+        [
+            {"$set": {
+                "grade": {"$ifNull": ["$grade", grade]},
+                "score_sum": {"$add": [{"$ifNull": ["$score_sum", 0]}, delta.score_sum]},
+                "score_count": {"$add": [{"$ifNull": ["$score_count", 0]}, delta.score_count]},
+                "minutes": {"$add": [{"$ifNull": ["$minutes", 0]}, delta.minutes]},
+                "last_active_at": {"$max": ["$last_active_at", delta.last_at]},
+            }},
+            {"$set": {
+                "avg_score": {"$cond": [
+                    {"$gt": ["$score_count", 0]}, {"$divide": ["$score_sum", "$score_count"]}, None,
+                ]},
+            }},
+            {"$set": {
+                "low_score": {"$and": [
+                    {"$gte": ["$score_count", configurations.AT_RISK_MIN_ASSESSMENTS]},
+                    {"$lt": ["$avg_score", configurations.AT_RISK_SCORE]},
+                ]},
+            }},
+        ],
+        upsert=True,
+    )
+
+
+def _inc_update(filter_: Dict[str, Any], delta: _Delta, now: datetime, on_insert=None, **extra_inc) -> UpdateOne:
+    inc = {"score_sum": delta.score_sum, "score_count": delta.score_count, "minutes": delta.minutes, **extra_inc}
+    update: Dict[str, Any] = {"$inc": inc, "$set": {"updated_at": now}}
+    if on_insert:
+        update["$setOnInsert"] = on_insert
+    return UpdateOne(filter_, update, upsert=True)
+
+
+async def _bulk(model, operations: List[UpdateOne]):
+    if operations:
+        return await model.get_pymongo_collection().bulk_write(operations, ordered=False)
+    return None
+
+
+async def apply_events(batch: List[SchoolEvent]) -> None:
+    """Fold `batch` into the standings and the class, grade, school and daily usage rollups"""
+    if not batch:
+        return
+    now = utc_now()
+    standings: Dict[Tuple[str, str], _Delta] = defaultdict(_Delta)
+    standing_grades: Dict[Tuple[str, str], str] = {}
+    classes: Dict[Tuple[str, str], _Delta] = defaultdict(_Delta)
+    class_info: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    grades: Dict[Tuple[str, str, str], _Delta] = defaultdict(_Delta)
+    schools: Dict[str, _Delta] = defaultdict(_Delta)
+    usage_days: Dict[Tuple[str, str, str], _Delta] = defaultdict(_Delta)
+
+    for event in batch:
+        student = (event.school_id, event.student_id)
+        standings[student].add(event)
+        standing_grades.setdefault(student, event.grade)
+        classes[(event.school_id, event.class_id)].add(event)
+        class_info.setdefault((event.school_id, event.class_id), (event.grade, event.subject))
+        grades[(event.school_id, event.grade, event.subject)].add(event)
+        schools[event.school_id].add(event)
+        if event.minutes:
+            day = event.at.astimezone(timezone.utc).strftime("%Y-%m-%d")
+            usage_days[(event.school_id, day, event.grade)].add(event)
+
+    # Standings first: their upserts tell which students are new to the school
+    standing_keys = list(standings)
+    result = await _bulk(StudentStanding, [
+        _standing_update(key, standing_grades[key], standings[key]) for key in standing_keys
+    ])
+    new_students: Dict[str, int] = defaultdict(int)
+    for index in result.upserted_ids:
+        new_students[standing_keys[index][0]] += 1
+
+    class_ops = [
+        _inc_update(
+            {"school_id": school_id, "class_id": class_id}, delta, now,
+            on_insert=dict(zip(("grade", "subject"), class_info[(school_id, class_id)])),
+        )
+        for (school_id, class_id), delta in classes.items()
+    ]
+    grade_ops = [
+        _inc_update({"school_id": school_id, "grade": grade, "subject": subject}, delta, now)
+        for (school_id, grade, subject), delta in grades.items()
+    ]
+    school_ops = [
+        _inc_update({"school_id": school_id}, delta, now, student_count=new_students[school_id])
+        for school_id, delta in schools.items()
+    ]
+    usage_ops = [
+        UpdateOne(
+            {"school_id": school_id, "day": day, "grade": grade},
+            {"$inc": {"minutes": delta.minutes, "sessions": delta.sessions}},
+            upsert=True,
+        )
+        for (school_id, day, grade), delta in usage_days.items()
+    ]
+    await asyncio.gather(
+        _bulk(ClassRollup, class_ops),
+        _bulk(GradeRollup, grade_ops),
+        _bulk(SchoolRollup, school_ops),
+        _bulk(SchoolUsageDay, usage_ops),
+    )
+    # Only announce the change once every rollup write has gone through
+    events.publish("school.standings_changed", student_ids={student_id for _, student_id in standing_keys})
+
+
+def _average(doc: Dict[str, Any]) -> Optional[float]:
+    count = doc.get("score_count") or 0
+    return round(doc["score_sum"] / count, 2) if count else None
+
+
+def _at_risk_filter(school_id: str, grade: Optional[str]) -> Dict[str, Any]:
+    inactive_since = utc_now() - timedelta(days=configurations.AT_RISK_INACTIVE_DAYS)
+    query: Dict[str, Any] = {
+        "school_id": school_id,
+        "$or": [{"low_score": True}, {"last_active_at": {"$lt": inactive_since}}],
+    }
+    if grade:
+        query["grade"] = grade
+    return query
+
+
+async def _school_totals(school_id: str) -> Dict[str, Any]:
+    doc = await SchoolRollup.get_pymongo_collection().find_one({"school_id": school_id}) or {}
+    return {
+        "students": doc.get("student_count", 0),
+        "average_score": _average(doc) if doc else None,
+        "total_minutes": round(doc.get("minutes", 0.0), 1),
+    }
+
+
+async def _active_students(school_id: str, days: int) -> int:
+    since = utc_now() - timedelta(days=days)
+    return await StudentStanding.get_pymongo_collection().count_documents(
+        {"school_id": school_id, "last_active_at": {"$gte": since}}
+    )
+
+
+async def _at_risk_count(school_id: str) -> int:
+    return await StudentStanding.get_pymongo_collection().count_documents(_at_risk_filter(school_id, None))
+
+
+async def usage_by_day(school_id: str, days: int) -> List[Dict[str, Any]]:
+    """Minutes and sessions per UTC day over the last `days` days, oldest first"""
+    first_day = (utc_now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    totals: Dict[str, Dict[str, float]] = {}
+    cursor = SchoolUsageDay.get_pymongo_collection().find(
+        {"school_id": school_id, "day": {"$gte": first_day}}, {"_id": 0, "day": 1, "minutes": 1, "sessions": 1},
+    )
+    async for doc in cursor:
+        day = totals.setdefault(doc["day"], {"minutes": 0.0, "sessions": 0})
+        day["minutes"] += doc["minutes"]
+        day["sessions"] += doc["sessions"]
+    return [
+        {"day": day, "minutes": round(values["minutes"], 1), "sessions": int(values["sessions"])}
+        for day, values in sorted(totals.items())
+    ]
+
+
+async def grade_breakdown(school_id: str) -> List[Dict[str, Any]]:
+    """Average score and minutes per grade and subject"""
+    cursor = GradeRollup.get_pymongo_collection().find({"school_id": school_id}).sort([("grade", 1), ("subject", 1)])
+    return [
+        {
+            "grade": doc["grade"],
+            "subject": doc["subject"],
+            "average_score": _average(doc),
+            "assessments": doc["score_count"],
+            "minutes": round(doc["minutes"], 1),
+        }
+        async for doc in cursor
+    ]
+
+
+async def class_breakdown(school_id: str, grade: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Average score and minutes per class, optionally of one grade"""
+    query: Dict[str, Any] = {"school_id": school_id}
+    if grade:
+        query["grade"] = grade
+    docs = await ClassRollup.get_pymongo_collection().find(query).to_list()
+    docs.sort(key=lambda doc: (doc["grade"], doc["subject"], doc["class_id"]))
+    return [
+        {
+            "class_id": doc["class_id"],
+            "grade": doc["grade"],
+            "subject": doc["subject"],
+            "average_score": _average(doc),
+            "assessments": doc["score_count"],
+            "minutes": round(doc["minutes"], 1),
+        }
+        for doc in docs
+    ]
+
+
+async def at_risk_students(school_id: str, grade: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Students whose average is below AT_RISK_SCORE (over at least
+    AT_RISK_MIN_ASSESSMENTS scores) or who have not been active for
+    AT_RISK_INACTIVE_DAYS, lowest average first
+    """
+    docs = await StudentStanding.get_pymongo_collection().find(
+        _at_risk_filter(school_id, grade),
+        {"_id": 0, "student_id": 1, "grade": 1, "avg_score": 1, "score_count": 1, "last_active_at": 1, "low_score": 1},
+    ).sort([("avg_score", 1), ("student_id", 1)]).limit(limit).to_list()
+
+    user_ids = [ObjectId(doc["student_id"]) for doc in docs if ObjectId.is_valid(doc["student_id"])]
+    users = await get_users_by_ids(user_ids) if user_ids else {}
+    # Stored datetimes come back naive (UTC)
+    inactive_since = utc_now().replace(tzinfo=None) - timedelta(days=configurations.AT_RISK_INACTIVE_DAYS)
+    students = []
+    for doc in docs:
+        user = users.get(ObjectId(doc["student_id"])) if ObjectId.is_valid(doc["student_id"]) else None
+        reasons = []
+        if doc.get("low_score"):
+            reasons.append("low_score")
+        last_active = doc.get("last_active_at")
+        if last_active is not None and last_active.replace(tzinfo=None) < inactive_since:
+            reasons.append("inactive")
+        students.append({
+            "student_id": doc["student_id"],
+            "name": user.full_name if user else None,
+            "grade": doc["grade"],
+            "average_score": round(doc["avg_score"], 2) if doc.get("avg_score") is not None else None,
+            "assessments": doc.get("score_count", 0),
+            "last_active_at": last_active,
+            "reasons": reasons,
+        })
+    return students
+
+
+async def school_overview(school_id: str, days: int = 30) -> Dict[str, Any]:
+    """The school manager dashboard: every section is an independent indexed read, run concurrently"""
+    totals, active, at_risk, usage, grades, at_risk_list = await asyncio.gather(
+        _school_totals(school_id),
+        _active_students(school_id, 7),
+        _at_risk_count(school_id),
+        usage_by_day(school_id, days),
+        grade_breakdown(school_id),
+        at_risk_students(school_id, limit=10),
+    )
+    return {
+        "school_id": school_id,
+        **totals,
+        "active_students_7d": active,
+        "at_risk_students": at_risk,
+        "usage": usage,
+        "grades": grades,
+        "most_at_risk": at_risk_list,
+    }
@@ -0,0 +1,196 @@
+"""
+Student activity: raw events in a time-series collection, and one rollup
+document per student that the dashboard reads.
+
+`record_activity` folds a batch of events into one delta per student and
+writes it with a single pipeline update per student (one unordered
+`bulk_write`): the first stage drops weeks older than STUDENT_ACTIVITY_WEEKS,
+the second adds the delta to the overall, per-subject and per-week totals. The
+raw events are inserted concurrently. The dashboard is then one indexed
+`find_one` instead of a scan over weeks of events.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import configurations
+from app.db.documents.student_activity import StudentActivity, StudentProgress
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class ActivityEvent:
+    """Minutes of study and/or a score for one student in one subject"""
+    student_id: str
+    subject: str
+    minutes: float = 0.0
+    score: Optional[float] = None
+    at: datetime = field(default_factory=utc_now)
+
+    def __post_init__(self):
+        # Naive timestamps are taken as UTC
+        if self.at.tzinfo is None:
+            self.at = self.at.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class _Totals:
+    minutes: float = 0.0
+    sessions: int = 0
+    score_sum: float = 0.0
+    score_count: int = 0
+
+    def add(self, event: ActivityEvent) -> None:
+        if event.minutes:
+            self.minutes += event.minutes
+            self.sessions += 1
+        if event.score is not None:
+            self.score_sum += event.score
+            self.score_count += 1
+
+
+@dataclass
+class _StudentDelta:
+    totals: _Totals = field(default_factory=_Totals)
+    subjects: Dict[str, _Totals] = field(default_factory=lambda: defaultdict(_Totals))
+    weeks: Dict[str, _Totals] = field(default_factory=lambda: defaultdict(_Totals))
+    last_at: Optional[datetime] = None
+
+
+def week_of(day: date) -> str:
+    """Key of the week `day` falls in: its Monday, YYYY-MM-DD"""
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def subject_key(subject: str) -> str:
+    """`subject` as a field name: no dots, no leading `$`"""
+    return subject.strip().replace(".", "_").lstrip("$") or "other"
+
+
+def _first_week(now: datetime) -> str:
+    return week_of(now.date() - timedelta(weeks=configurations.STUDENT_ACTIVITY_WEEKS - 1))
+
+
+def _adds(prefix: str, totals: _Totals) -> Dict[str, Any]:
+    return {
+        f"{prefix}.{name}": {"$add": [{"$ifNull": [f"${prefix}.{name}", 0]}, value]}
+        for name, value in vars(totals).items()
+    }
+
+
+def _progress_update(
+    student_id: str, delta: _StudentDelta, first_week: str, now: datetime, upsert: bool = True,
+) -> UpdateOne:
+    additions = _adds("totals", delta.totals)
+    for subject, totals in delta.subjects.items():
+        additions.update(_adds(f"subjects.{subject}", totals))
+    for week, totals in delta.weeks.items():
+        additions.update(_adds(f"weeks.{week}", totals))
+    return UpdateOne(
+        {"student_id": student_id},
+        [
+            {"$set": {
+                "weeks": {"$arrayToObject": {"$filter": {
+                    "input": {"$objectToArray": {"$ifNull": ["$weeks", {}]}},
+                    "cond": {"$gte": ["$$this.k", first_week]},
+                }}},
+            }},
+            {"$set": {
+                **additions,
+                "last_active_at": {"$max": ["$last_active_at", delta.last_at]},
+                "updated_at": now,
+            }},
+        ],
+        upsert=upsert,
+    )
+
+
+async def record_activity(events: List[ActivityEvent]) -> None:
+    """Store `events` and fold them into each student's progress rollup"""
+    if not events:
+        return
+    now = utc_now()
+    first_week = _first_week(now)
+    students: Dict[str, _StudentDelta] = defaultdict(_StudentDelta)
+    raw = []
+    for event in events:
+        delta = students[event.student_id]
+        delta.totals.add(event)
+        delta.subjects[subject_key(event.subject)].add(event)
+        week = week_of(event.at.astimezone(timezone.utc).date())
+        # Weeks already out of the window would only be dropped again by the next update
+        if week >= first_week:
+            delta.weeks[week].add(event)
+        if delta.last_at is None or event.at > delta.last_at:
+            delta.last_at = event.at
+        raw.append({
+            "at": event.at, "student_id": event.student_id, "subject": event.subject,
+            "minutes": event.minutes, "score": event.score,
+        })
+
+    await asyncio.gather(
+        StudentActivity.get_pymongo_collection().insert_many(raw, ordered=False),
+        _update_progress(students, first_week, now),
+    )
+
+
+async def _update_progress(students: Dict[str, _StudentDelta], first_week: str, now: datetime) -> None:
+    collection = StudentProgress.get_pymongo_collection()
+    student_ids = list(students)
+    try:
+        await collection.bulk_write([
+            _progress_update(student_id, students[student_id], first_week, now) for student_id in student_ids
+        ], ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        # Concurrent first-time upserts for the same student; the rollup exists now
+        retry = [student_ids[error["index"]] for error in errors]
+        await collection.bulk_write([
+            _progress_update(student_id, students[student_id], first_week, now, upsert=False)
+            for student_id in retry
+        ], ordered=False)
+
+
+def _average(totals: Dict[str, Any]) -> Optional[float]:
+    count = totals.get("score_count") or 0
+    return round(totals["score_sum"] / count, 1) if count else None
+
+
+async def student_dashboard(student_id: str) -> Dict[str, Any]:
+    """Overall progress, minutes per week (oldest first) and progress per subject, from the rollup"""
+    doc = await StudentProgress.get_pymongo_collection().find_one({"student_id": student_id}) or {}
+    first = date.fromisoformat(_first_week(utc_now()))
+    weeks = [(first + timedelta(weeks=index)).isoformat() for index in range(configurations.STUDENT_ACTIVITY_WEEKS)]
+    stored_weeks = doc.get("weeks", {})
+    subjects = [
+        {"name": name, "progress": _average(totals), "minutes": round(totals.get("minutes", 0.0), 1)}
+        for name, totals in sorted(doc.get("subjects", {}).items())
+    ]
+    weakest = sorted(
+        (subject for subject in subjects if subject["progress"] is not None
+         and subject["progress"] < configurations.AT_RISK_SCORE),
+        key=lambda subject: subject["progress"],
+    )
+    return {
+        "progress": _average(doc.get("totals", {})) or 0,
+        "total_minutes": round(doc.get("totals", {}).get("minutes", 0.0), 1),
+        "weeks": weeks,
+        "weekly_activity": [round(stored_weeks.get(week, {}).get("minutes", 0.0), 1) for week in weeks],
+        "subjects": subjects,
+        "recommendations": [f"Revise {subject['name']}" for subject in weakest[:3]],
+        "last_active_at": doc.get("last_active_at"),
+    }
@@ -0,0 +1,92 @@
+"""
+User directory: role filter, case-insensitive prefix search and keyset pagination.
+
+Prefix search is a range query, `[prefix, prefix + U+FFFF)`, evaluated under
+DIRECTORY_COLLATION so it can walk the collated directory indexes. (U+FFFF sorts
+after every other character in the collation.) Pages continue after the
+(sort value, _id) of the last row instead of skipping, so a deep page costs the
+same as the first.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.db.documents.user import DIRECTORY_COLLATION, User, UserDirectoryView
+
+SEARCH_FIELDS = {"name": "full_name", "email": "email"}
+PREFIX_UPPER_BOUND = "\uffff"
+
+
+class InvalidCursor(ValueError):
+    """The pagination cursor is malformed or belongs to another query"""
+
+
+def encode_cursor(search_by: str, value: Optional[str], last_id: ObjectId) -> str:
+    payload = json.dumps([search_by, value, str(last_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, search_by: str) -> Tuple[Optional[str], ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_search_by, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_search_by != search_by or not (value is None or isinstance(value, str)):
+            raise InvalidCursor("Invalid cursor")
+        return value, ObjectId(last_id)
+    except (ValueError, TypeError, InvalidId):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _after(field: str, value: Optional[str], last_id: ObjectId) -> Dict[str, Any]:
+    """Rows sorting after (value, last_id) in (field, _id) order"""
+    if value is None:
+        # Missing/null names sort first; every string sorts after them
+        return {"$or": [{field: None, "_id": {"$gt": last_id}}, {field: {"$gte": ""}}]}
+    return {"$or": [{field: {"$gt": value}}, {field: value, "_id": {"$gt": last_id}}]}
+
+
+def build_directory_query(
+    role: Optional[str] = None,
+    prefix: Optional[str] = None,
+    search_by: str = "name",
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    field = SEARCH_FIELDS[search_by]
+    clauses: List[Dict[str, Any]] = []
+    if role:
+        clauses.append({"role": role})
+    if prefix:
+        clauses.append({field: {"$gte": prefix, "$lt": prefix + PREFIX_UPPER_BOUND}})
+    if cursor:
+        value, last_id = decode_cursor(cursor, search_by)
+        clauses.append(_after(field, value, last_id))
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def list_directory(
+    role: Optional[str] = None,
+    prefix: Optional[str] = None,
+    search_by: str = "name",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[UserDirectoryView], Optional[str]]:
+    """One page of users sorted by the search field, and the cursor of the next page"""
+    field = SEARCH_FIELDS[search_by]
+    rows = await User.find(
+        build_directory_query(role, prefix, search_by, cursor),
+        projection_model=UserDirectoryView,
+        collation=DIRECTORY_COLLATION,
+    ).sort([(field, 1), ("_id", 1)]).limit(limit + 1).to_list()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(search_by, getattr(last, field), last.id)
+    return rows, next_cursor
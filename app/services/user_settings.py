@@ -0,0 +1,93 @@
+"""
+Per-user settings, read on nearly every page load and rarely written.
+
+Reads go through an in-process cache keyed by user and invalidated by
+version: a cached entry is served only after a `find_one` projected to
+`version` (covered by the `user_id_version` index) shows it is still current,
+so every worker sees another worker's write on its next read. Updates are a
+single `find_one_and_update` that `$set`s only the changed fields by dotted
+path and increments the document's `version`. The returned document replaces
+the cached one unless the cache already holds a newer version, so a slow read
+can never overwrite a newer write.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.cache import TTLCache
+from app.core.config import configurations
+from app.db.documents.user_settings import (
+    PersonalInfo,
+    Preferences,
+    SystemSettings,
+    TutorCustomization,
+    TwoFactorSettings,
+    UserSettings,
+    utc_now,
+)
+
+SECTIONS: Dict[str, Type[BaseModel]] = {
+    "personal_info": PersonalInfo,
+    "tutor_customization": TutorCustomization,
+    "preferences": Preferences,
+    "system_settings": SystemSettings,
+    "two_factor": TwoFactorSettings,
+}
+
+
+@lru_cache(maxsize=1)
+def settings_cache() -> TTLCache[UserSettings]:
+    return TTLCache(
+        "user_settings",
+        ttl=configurations.USER_SETTINGS_CACHE_TTL_SECONDS,
+        maxsize=configurations.USER_SETTINGS_CACHE_MAX_ENTRIES,
+    )
+
+
+def _remember(settings: UserSettings) -> UserSettings:
+    """Cache `settings` unless a newer version is cached; returns the newest of the two"""
+    cache = settings_cache()
+    cached = cache.get(settings.user_id)
+    if cached is not None and cached.version > settings.version:
+        return cached
+    cache.set(settings.user_id, settings)
+    return settings
+
+
+async def get_settings(user_id: str) -> UserSettings:
+    """The user's settings; defaults (version 0) if they never saved any"""
+    collection = UserSettings.get_pymongo_collection()
+    cached = settings_cache().get(user_id)
+    if cached is not None:
+        current = await collection.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        if (current["version"] if current else 0) == cached.version:
+            return cached
+    doc = await collection.find_one({"user_id": user_id})
+    settings = UserSettings.model_validate(doc) if doc else UserSettings(user_id=user_id)
+    return _remember(settings)
+
+
+async def update_section(user_id: str, section: str, changes: BaseModel) -> UserSettings:
+    """
+    Write the fields set on `changes` into `section` and bump the version.
+    Fields the client did not send are left as they are.
+    """
+    fields = changes.model_dump(mode="json", exclude_unset=True)
+    update: Dict[str, Any] = {
+        "$set": {**{f"{section}.{name}": value for name, value in fields.items()}, "updated_at": utc_now()},
+        "$inc": {"version": 1},
+    }
+    query = {"user_id": user_id}
+    collection = UserSettings.get_pymongo_collection()
+    try:
+        doc = await collection.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Two first-time updates raced on the upsert; the document exists now
+        doc = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    return _remember(UserSettings.model_validate(doc))
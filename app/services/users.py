@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from beanie import UpdateResponse
+from beanie.odm.utils.dump import get_dict
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core.cache import TTLCache
+from app.core.config import configurations
+from app.db.documents.user import User, UserDirectoryView, UserRole
+
+
+@lru_cache(maxsize=1)
+def user_cache() -> TTLCache[UserDirectoryView]:
+    """Users looked up by id, shared by the batch lookups of this worker"""
+    return TTLCache(
+        "users_by_id",
+        ttl=configurations.USER_CACHE_TTL_SECONDS,
+        maxsize=configurations.USER_CACHE_MAX_ENTRIES,
+    )
+
+
+async def get_or_create_user(
+    email: str,
+    full_name: Optional[str] = None,
+    role: str = UserRole.student,
+) -> Tuple[User, bool]:
+    """
+    Return the user with `email`, creating it if there is none. The second
+    value is True when this call created the user.
+
+    One findOneAndUpdate upsert with `$setOnInsert`: an existing user is
+    returned untouched, and the unique email index guarantees that concurrent
+    calls for the same email end up with a single document.
+    """
+    candidate = User(email=email, full_name=full_name, role=role)
+    try:
+        user = await User.find_one(User.email == email).update(
+            {"$setOnInsert": get_dict(candidate, to_db=True, exclude={"email"})},
+            upsert=True,
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+    except DuplicateKeyError:
+        # Racing upserts that the server did not retry; the winner's document exists now
+        user = await User.find_one(User.email == email)
+        if user is None:
+            raise
+        return user, False
+    return user, user.id == candidate.id
+
+
+async def get_users_by_ids(ids: Iterable[ObjectId]) -> Dict[ObjectId, UserDirectoryView]:
+    """
+    The users among `ids` that exist, keyed by id. Cached users are served from
+    `user_cache()`; the rest are fetched with a single `$in` query.
+    """
+    ids = list(dict.fromkeys(ids))
+    cache = user_cache()
+    found = cache.get_many(ids)
+    missing = [oid for oid in ids if oid not in found]
+    if missing:
+        users = await User.find({"_id": {"$in": missing}}, projection_model=UserDirectoryView).to_list()
+        for user in users:
+            cache.set(user.id, user)
+            found[user.id] = user
+    return found
+
+
+async def assign_school(user_id: ObjectId, school_id: Optional[str]) -> bool:
+    """Set (or with None, clear) the school a user belongs to. False if there is no such user."""
+    result = await User.get_pymongo_collection().update_one({"_id": user_id}, {"$set": {"school_id": school_id}})
+    return result.matched_count > 0
@@ -1,17 +1,23 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
 from app.utils.cognito_auth import security, verify_cognito_token
 from app.db.documents.user import User
+from app.services.login_history import record_token_use
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> User:
     """
     Get the current authenticated user from the database using Beanie.
     
     This function validates the Cognito token and fetches the corresponding user
     from MongoDB using Beanie ODM. Use this dependency in all authenticated routes.
+    Every successful call is recorded in the user's login history.
     
     Args:
+        request: The incoming request, for the client address and user agent
         credentials: HTTP Bearer token from Authorization header
         
     Returns:
@@ -42,6 +48,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 detail="User not found in database"
             )
         
+        record_token_use(
+            str(user.id),
+            decoded_token,
+            request.client.host if request.client else None,
+            request.headers.get("user-agent"),
+        )
         return user
         
     except HTTPException:
@@ -0,0 +1,80 @@
+"""
+Minimal in-process ASGI client used by the benchmarks.
+
+Drives the FastAPI app directly, without a socket or extra HTTP client dependency.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+
+class Response:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status_code = status
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    json_body: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    client: Tuple[str, int] = ("127.0.0.1", 50000),
+) -> Response:
+    """Send one HTTP request to `app` and collect the full response"""
+    body = b""
+    raw_headers = [(b"host", b"testserver")]
+    for key, value in (headers or {}).items():
+        raw_headers.append((key.lower().encode(), value.encode()))
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}, doseq=True).encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": client,
+        "server": ("testserver", 80),
+        "state": {},
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    chunks = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for key, value in message.get("headers", []):
+                response_headers[key.decode().lower()] = value.decode()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return Response(status, response_headers, b"".join(chunks))
@@ -0,0 +1,115 @@
+"""
+Stored benchmark baselines and regression checks.
+
+Baselines live in `benchmarks/baselines/<name>.json`. A metric regresses when it
+is worse than the baseline by more than the tolerance (a fraction, 0.2 = 20%).
+With `--record-history`, every run is also appended to
+`benchmarks/history/<name>.jsonl` so results can be tracked over time.
+"""
+
+import json
+import os
+import subprocess
+import time
+from typing import Dict, Iterable, List
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+HISTORY_DIR = os.path.join(os.path.dirname(__file__), "history")
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def load_baseline(name: str) -> Dict[str, float]:
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_baseline(name: str, results: Dict[str, float]) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(name)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    return path
+
+
+def append_history(name: str, results: Dict[str, float]) -> str:
+    """Append one timestamped run, tagged with the current git revision"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    path = os.path.join(HISTORY_DIR, f"{name}.jsonl")
+    entry = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "revision": revision, "results": results}
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry, sort_keys=True) + "\n")
+    return path
+
+
+def find_regressions(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float,
+    higher_is_better: Iterable[str] = (),
+) -> List[str]:
+    """Describe every metric that is worse than its baseline beyond `tolerance`"""
+    higher = set(higher_is_better)
+    regressions = []
+    for key, value in results.items():
+        base = baseline.get(key)
+        # Differences of noisy measurements can be <= 0; they are reported only
+        if not base or base <= 0:
+            continue
+        if key in higher:
+            worse = value < base * (1 - tolerance)
+        else:
+            worse = value > base * (1 + tolerance)
+        if worse:
+            regressions.append(f"{key}: {value:.3f} vs baseline {base:.3f}")
+    return regressions
+
+
+def report(name: str, results: Dict[str, float], args, higher_is_better: Iterable[str] = ()) -> int:
+    """
+    Print results, then update or check the baseline according to the
+    `--update-baseline` / `--tolerance` arguments. Returns the process exit code.
+    """
+    for key, value in results.items():
+        print(f"  {key:<40} {value:12.3f}")
+
+    if getattr(args, "record_history", False):
+        print(f"Run appended to {append_history(name, results)}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline(name, results)}")
+        return 0
+
+    baseline = load_baseline(name)
+    if not baseline:
+        print(f"No baseline for '{name}'; run with --update-baseline to record one.")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance, higher_is_better)
+    if regressions:
+        print(f"REGRESSION (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"OK: within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+def add_baseline_arguments(parser, default_tolerance: float = 0.2) -> None:
+    parser.add_argument("--update-baseline", action="store_true", help="Record results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance, help="Allowed regression fraction")
+    parser.add_argument("--record-history", action="store_true", help="Append results to benchmarks/history")
@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark: import time, startup and time-to-first-request.
+
+Each run starts a fresh interpreter, imports `main`, optionally runs the app
+lifespan (needs a reachable MONGODB_URL) and sends the first request in-process.
+Medians are compared against the stored baseline and regressions exit non-zero.
+
+    python -m benchmarks.cold_start --runs 7
+    python -m benchmarks.cold_start --lifespan --update-baseline
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.baseline import add_baseline_arguments, report
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from benchmarks.asgi_client import request
+
+async def run(lifespan, path):
+    result = {"import_ms": (t1 - t0) * 1000}
+    start = time.perf_counter()
+    if lifespan:
+        async with main.app.router.lifespan_context(main.app):
+            ready = time.perf_counter()
+            response = await request(main.app, "GET", path)
+            done = time.perf_counter()
+        result["startup_ms"] = (ready - start) * 1000
+    else:
+        ready = start
+        response = await request(main.app, "GET", path)
+        done = time.perf_counter()
+    result["first_request_ms"] = (done - ready) * 1000
+    result["status"] = response.status_code
+
+    # Cost moved from import time to first use of the lazily created clients
+    from app.core.cognito import get_cognito_client
+    from app.core.http import get_http_session
+    from app.services.mail import get_sendgrid_client
+    lazy_start = time.perf_counter()
+    get_cognito_client(); get_http_session(); get_sendgrid_client()
+    result["lazy_clients_ms"] = (time.perf_counter() - lazy_start) * 1000
+    return result
+
+print(json.dumps(asyncio.run(run(sys.argv[1] == "1", sys.argv[2]))))
+"""
+
+
+def run_once(lifespan: bool, path: str) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, "1" if lifespan else "0", path],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if result["status"] >= 500:
+        raise RuntimeError(f"First request failed with status {result['status']}")
+    # Process wall time includes interpreter start and teardown
+    result["time_to_first_request_ms"] = wall_ms
+    return result
+
+
+def slowest_imports(limit: int) -> list:
+    """Top-level packages and app modules by cumulative import time (microseconds)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(1)), len(match.group(2)), match.group(3)
+        if indent <= 3 or (name.startswith("app.") and "." not in name[4:]):
+            rows.append((cumulative, name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/health", help="Path of the first request")
+    parser.add_argument("--lifespan", action="store_true", help="Run the app lifespan (requires MongoDB)")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports")
+    add_baseline_arguments(parser, default_tolerance=0.25)
+    args = parser.parse_args()
+
+    runs = [run_once(args.lifespan, args.path) for _ in range(args.runs)]
+    keys = ["import_ms", "first_request_ms", "lazy_clients_ms", "time_to_first_request_ms"]
+    if args.lifespan:
+        keys.insert(1, "startup_ms")
+    results = {key: statistics.median(run[key] for run in runs) for key in keys}
+
+    print("Slowest imports of main (cumulative ms):")
+    for cumulative, name in slowest_imports(args.top):
+        print(f"  {name:<40} {cumulative / 1000:10.1f}")
+
+    print(f"Cold start, median of {args.runs} run(s):")
+    name = "cold_start_lifespan" if args.lifespan else "cold_start"
+    sys.exit(report(name, results, args))
+
+
+if __name__ == "__main__":
+    main()
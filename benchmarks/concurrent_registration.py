@@ -0,0 +1,151 @@
+"""
+Concurrency check for the idempotent user writes, against a local mongod.
+
+Fires parallel `POST /api/auth/register` requests for the same email through the
+real `main.app` (Cognito is an in-process stand-in that lets every request
+through), and parallel calls of the dev default-user dependency. For every
+round exactly one request may report a new registration, all responses must
+name the same user id, and the `users` collection must hold one document per
+email. A second set of rounds makes the stand-in reject existing usernames, as
+Cognito does: then exactly one request may succeed, the rest must get 400, and
+the pool must hold one account per email. Exits non-zero on any violation, and
+reports the registration latency of the first set.
+
+Needs a running mongod, so it is not part of any automated test run.
+
+The database named in --mongodb-url is wiped, so it must end in "loadtest".
+
+    python -m benchmarks.concurrent_registration --parallel 50 --rounds 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS, percentile
+
+REGISTERED_MESSAGE = "User registered. Please check your email for the confirmation code."
+
+
+async def register_round(app, email: str, parallel: int) -> List[str]:
+    """Register one email from `parallel` concurrent requests; returns the violations"""
+    from benchmarks.asgi_client import request
+
+    body = {"name": "Race Condition", "email": email, "password": "Password123!", "role": "student"}
+    responses = await asyncio.gather(*(
+        request(app, "POST", "/api/auth/register", json_body=body) for _ in range(parallel)
+    ))
+    problems = []
+    statuses = sorted({response.status_code for response in responses})
+    if statuses != [201]:
+        problems.append(f"{email}: unexpected statuses {statuses}")
+        return problems
+    payloads = [response.json() for response in responses]
+    created = sum(1 for payload in payloads if payload["message"] == REGISTERED_MESSAGE)
+    user_ids = {payload["user_id"] for payload in payloads}
+    if created != 1:
+        problems.append(f"{email}: {created} responses reported a new registration")
+    if len(user_ids) != 1:
+        problems.append(f"{email}: responses name {len(user_ids)} different user ids")
+    return problems
+
+
+async def strict_round(app, cognito, email: str, parallel: int) -> List[str]:
+    """Like `register_round`, with Cognito rejecting all but the first sign-up"""
+    from benchmarks.asgi_client import request
+
+    body = {"name": "Race Condition", "email": email, "password": "Password123!", "role": "student"}
+    responses = await asyncio.gather(*(
+        request(app, "POST", "/api/auth/register", json_body=body) for _ in range(parallel)
+    ))
+    problems = []
+    statuses = [response.status_code for response in responses]
+    if statuses.count(201) != 1 or statuses.count(400) != parallel - 1:
+        problems.append(f"{email}: expected one 201 and {parallel - 1} x 400, got {sorted(statuses)}")
+    elif next(r for r in responses if r.status_code == 201).json()["message"] != REGISTERED_MESSAGE:
+        problems.append(f"{email}: the successful request did not report a new registration")
+    if cognito.created.get(email, 0) != 1:
+        problems.append(f"{email}: {cognito.created.get(email, 0)} Cognito accounts created")
+    return problems
+
+
+async def run(args) -> Dict[str, float]:
+    from main import app
+    from app.api.dependencies import get_current_user
+    from app.db.documents.user import User
+    from benchmarks.fakes import install_fake_cognito, install_fake_mail
+
+    cognito = install_fake_cognito(latency=0.0, reject_existing=False)
+    install_fake_mail()
+
+    problems: List[str] = []
+    round_times: List[float] = []
+    async with app.router.lifespan_context(app):
+        await User.get_pymongo_collection().delete_many({})
+
+        for index in range(args.rounds):
+            start = time.perf_counter()
+            problems.extend(await register_round(app, f"race-{index}@example.com", args.parallel))
+            round_times.append(time.perf_counter() - start)
+
+        cognito.reject_existing = True
+        for index in range(args.rounds):
+            problems.extend(await strict_round(app, cognito, f"strict-race-{index}@example.com", args.parallel))
+
+        default_users = await asyncio.gather(*(get_current_user(None) for _ in range(args.parallel)))
+        if len({str(user.id) for user in default_users}) != 1:
+            problems.append("default user: concurrent calls returned different users")
+
+        cursor = await User.get_pymongo_collection().aggregate([
+            {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ])
+        duplicates = await cursor.to_list()
+        for duplicate in duplicates:
+            problems.append(f"{duplicate['_id']}: {duplicate['count']} documents in users")
+
+    print(f"{args.rounds} round(s) x {args.parallel} parallel registrations of one email")
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    if not problems:
+        print("  OK: one user and one Cognito account per email, one 'registered' response per round")
+    if problems:
+        sys.exit(1)
+
+    round_times.sort()
+    return {
+        "round_ms_median": statistics.median(round_times) * 1000,
+        "round_ms_p95": percentile(round_times, 95) * 1000,
+        "registration_ms_mean": sum(round_times) / (args.rounds * args.parallel) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--parallel", type=int, default=50, help="Concurrent registrations per email")
+    parser.add_argument("--rounds", type=int, default=20, help="Emails to race on")
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MAIL_TRANSPORT"] = "memory"
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    sys.exit(report("concurrent_registration", results, args))
+
+
+if __name__ == "__main__":
+    main()
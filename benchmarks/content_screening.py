@@ -0,0 +1,138 @@
+"""
+Chat screening throughput, messages per second on one core (CPU only).
+
+Screens a synthetic chat corpus against a synthetic term list with:
+
+* `automaton`  - `TermMatcher.find`, which normalizes itself (current code)
+* `regex`      - normalize + one `\\b(?:term|...)\\b` alternation
+* `naive`      - normalize + `term in text` for every term (substring matches,
+                 so it flags more; only run up to 1,000 terms)
+
+and separately times `normalize` alone on ASCII and on accented text. A
+fraction of messages (`--flagged`) contain a term, disguised with leetspeak,
+punctuation or diacritics, to check that the automaton and the regex flag the
+same messages.
+
+    python -m benchmarks.content_screening --terms 500,5000 --words 20
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import string
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.load_test import OFFLINE_DEFAULTS
+
+BENCHMARK_MONGODB_URL = "mongodb://127.0.0.1:27017/maitech_benchmark"
+
+DISGUISES = {"a": "@", "e": "3", "o": "0", "s": "$", "i": "1"}
+ACCENTS = {"a": "á", "e": "é", "o": "ö", "u": "ü", "i": "í"}
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+
+def disguise(term: str, rng: random.Random) -> str:
+    kind = rng.randrange(3)
+    if kind == 0:
+        return "".join(DISGUISES.get(ch, ch) for ch in term).upper()
+    if kind == 1:
+        return ".".join(term)
+    return "".join(ACCENTS.get(ch, ch) for ch in term)
+
+
+def corpus(terms: List[str], count: int, words: int, flagged: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = [random_word(rng) for _ in range(20000)]
+    banned = set(terms)
+    vocabulary = [word for word in vocabulary if word not in banned]
+    messages = []
+    for _ in range(count):
+        message = [rng.choice(vocabulary) for _ in range(words)]
+        if rng.random() < flagged:
+            message[rng.randrange(words)] = disguise(rng.choice(terms), rng)
+        messages.append(" ".join(message).capitalize() + rng.choice([".", "!", "?", ""]))
+    return messages
+
+
+def measure(screen: Callable[[str], object], messages: List[str], repeat: int) -> float:
+    """Median messages per second over `repeat` passes"""
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            screen(message)
+        rates.append(len(messages) / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def run(args) -> Dict[str, float]:
+    from app.services.content_screening import TermMatcher, normalize
+
+    results: Dict[str, float] = {}
+    rng = random.Random(args.seed)
+    for size in [int(value) for value in args.terms.split(",")]:
+        terms = sorted({random_word(rng) for _ in range(size)})
+        messages = corpus(terms, args.messages, args.words, args.flagged, args.seed)
+
+        start = time.perf_counter()
+        matcher = TermMatcher(terms)
+        build_ms = (time.perf_counter() - start) * 1000
+        regex = re.compile(r"\b(?:" + "|".join(map(re.escape, terms)) + r")\b")
+
+        def naive(text: str) -> List[str]:
+            text = normalize(text)
+            return [term for term in terms if term in text]
+
+        strategies = {
+            "automaton": matcher.find,
+            "regex": lambda text: regex.findall(normalize(text)),
+            "naive": naive,
+        }
+        if size > 1000:
+            del strategies["naive"]
+        flagged = {name: sum(1 for m in messages if screen(m)) for name, screen in strategies.items()}
+        print(f"{size} terms, {args.messages} messages of {args.words} words; "
+              f"automaton built in {build_ms:.1f} ms; flagged: {flagged}")
+
+        results[f"terms_{size}.build_ms"] = build_ms
+        for name, screen in strategies.items():
+            results[f"terms_{size}.{name}_msgs_per_s"] = measure(screen, messages, args.repeat)
+
+    ascii_text = " ".join(random_word(rng) for _ in range(args.words))
+    accented = "".join(ACCENTS.get(ch, ch) for ch in ascii_text)
+    results["normalize.ascii_msgs_per_s"] = measure(normalize, [ascii_text] * 10000, args.repeat)
+    results["normalize.accented_msgs_per_s"] = measure(normalize, [accented] * 10000, args.repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", default="500,5000", help="Comma-separated term list sizes")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=20, help="Words per message")
+    parser.add_argument("--flagged", type=float, default=0.02, help="Fraction of messages containing a term")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes per case; the median is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGODB_URL", BENCHMARK_MONGODB_URL)
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = run(args)
+    print()
+    higher = [key for key in results if key.endswith("_msgs_per_s")]
+    sys.exit(report("content_screening", results, args, higher_is_better=higher))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Offline stand-ins for external services used by the benchmarks.
+
+- `TokenSigner` issues RS256 ID tokens that `verify_cognito_token` accepts.
+- `install_jwks_stub` serves the signer's JWKS to the shared HTTP session, so the
+  real JWKS fetch and cache path runs without network access.
+- `install_fake_mail` swaps the mail transport for an in-memory outbox.
+- `install_fake_cognito` replaces the shared boto3 Cognito client with an
+  in-process user pool that enforces a request-rate quota like Cognito does.
+  To test against a real stand-in server instead (moto_server, cognito-local),
+  set COGNITO_ENDPOINT_URL.
+"""
+
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import jwt
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+from app.core.config import configurations
+from app.core.http import get_http_session
+from app.services.mail import InMemoryTransport, set_transport
+
+
+class TokenSigner:
+    """RSA key pair that signs Cognito-shaped ID tokens"""
+
+    def __init__(self, kid: str = "loadtest-key"):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        self.kid = kid
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self._private_key.public_key()))
+        public_jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+        self.jwks = {"keys": [public_jwk]}
+
+    def issue(self, email: str, ttl: int = 3600, **claims: Any) -> str:
+        now = int(time.time())
+        payload: Dict[str, Any] = {
+            "sub": str(uuid.uuid4()),
+            "email": email,
+            "token_use": "id",
+            "aud": configurations.COGNITO_CLIENT_ID,
+            "iss": f"https://cognito-idp.{configurations.COGNITO_REGION}.amazonaws.com/{configurations.COGNITO_USER_POOL_ID}",
+            "iat": now,
+            "auth_time": now,
+            "exp": now + ttl,
+        }
+        payload.update(claims)
+        return jwt.encode(payload, self._private_key, algorithm="RS256", headers={"kid": self.kid})
+
+
+class _JWKSAdapter(BaseAdapter):
+    def __init__(self, jwks: Dict[str, Any]):
+        super().__init__()
+        self.body = json.dumps(jwks).encode()
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = self.body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install_jwks_stub(signer: TokenSigner) -> _JWKSAdapter:
+    """Answer every Cognito JWKS request from the shared session with the signer's keys"""
+    adapter = _JWKSAdapter(signer.jwks)
+    get_http_session().mount("https://cognito-idp.", adapter)
+    return adapter
+
+
+def install_fake_mail() -> InMemoryTransport:
+    transport = InMemoryTransport()
+    set_transport(transport)
+    return transport
+
+
+class FakeCognitoClient:
+    """
+    Thread-safe in-memory user pool implementing `admin_create_user`.
+
+    Calls take `latency` seconds; more than `rate_limit` calls per second are
+    rejected with TooManyRequestsException and existing usernames with
+    UsernameExistsException, both as botocore ClientErrors. With
+    `reject_existing=False` repeated usernames succeed, so concurrent requests
+    for one email all get past Cognito.
+    """
+
+    def __init__(self, latency: float = 0.05, rate_limit: Optional[float] = None, reject_existing: bool = True):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reject_existing = reject_existing
+        self.users: Dict[str, Dict[str, str]] = {}
+        # Accounts created per username; above 1 only with `reject_existing=False`
+        self.created: Dict[str, int] = {}
+        self.calls = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0.0
+        self._refilled_at = time.monotonic()
+
+    def _error(self, code: str, message: str, operation: str):
+        from botocore.exceptions import ClientError
+
+        return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _create(self, operation: str, username: str, attributes) -> None:
+        with self._lock:
+            self.calls += 1
+            if not self._take_token():
+                self.throttled += 1
+                raise self._error("TooManyRequestsException", "Too many requests", operation)
+        time.sleep(self.latency)
+        with self._lock:
+            if self.reject_existing and username in self.users:
+                raise self._error("UsernameExistsException", "User account already exists", operation)
+            self.users[username] = {attr["Name"]: attr["Value"] for attr in attributes}
+            self.created[username] = self.created.get(username, 0) + 1
+
+    def admin_create_user(self, UserPoolId: str, Username: str, UserAttributes=(), **kwargs):
+        self._create("AdminCreateUser", Username, UserAttributes)
+        return {"User": {"Username": Username, "UserStatus": "FORCE_CHANGE_PASSWORD"}}
+
+    def sign_up(self, ClientId: str, Username: str, Password: str, UserAttributes=(), **kwargs):
+        self._create("SignUp", Username, UserAttributes)
+        return {"UserConfirmed": False, "UserSub": str(uuid.uuid5(uuid.NAMESPACE_DNS, Username))}
+
+
+def install_fake_cognito(
+    latency: float = 0.05,
+    rate_limit: Optional[float] = None,
+    reject_existing: bool = True,
+) -> FakeCognitoClient:
+    """Make `get_cognito_client()` return an in-memory user pool"""
+    from app.core import cognito
+
+    client = FakeCognitoClient(latency=latency, rate_limit=rate_limit, reject_existing=reject_existing)
+    cognito._cognito_client = client
+    return client
+
+
+class _OfflineDatabase:
+    """Just enough of AsyncDatabase for `init_beanie` to run without a server"""
+
+    def __init__(self, database):
+        self._database = database
+
+    async def command(self, command, **kwargs):
+        return {"version": "7.0.0", "versionArray": [7, 0, 0, 0]}
+
+    async def list_collection_names(self, **kwargs):
+        return []
+
+    def __getitem__(self, name):
+        return self._database[name]
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+
+async def init_offline_beanie(document_models) -> None:
+    """
+    Initialize Beanie models without connecting to MongoDB, so documents can be
+    constructed, validated and serialized in CPU-only benchmarks. Any query fails.
+    """
+    from beanie import init_beanie
+    from pymongo import AsyncMongoClient
+
+    client = AsyncMongoClient("mongodb://127.0.0.1:1/offline", connect=False, serverSelectionTimeoutMS=1)
+    await init_beanie(
+        database=_OfflineDatabase(client.get_default_database()),
+        document_models=document_models,
+        skip_indexes=True,
+    )
@@ -0,0 +1,238 @@
+"""
+End-to-end HTTP load test of the real `main.app`, fully offline.
+
+Runs the app lifespan against a local mongod, seeds users and notifications,
+stubs the Cognito JWKS endpoint with a local signing key and swaps SendGrid for
+an in-memory transport. Each concurrency stage runs for a fixed duration and
+reports p50/p95/p99 latency and throughput per scenario; results are compared
+against the stored baseline and regressions exit non-zero.
+
+The database named in --mongodb-url is wiped, so it must end in "loadtest".
+
+    python -m benchmarks.load_test --concurrency 1,16,64 --duration 10
+    python -m benchmarks.load_test --scenarios notifications_list,auth_me
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+SEARCH_TERMS = ["assignment", "grade", "message", "reminder", "flagged", "quiz", "math", "science"]
+
+# Required settings that have no meaning offline. They are set in the process
+# environment where it lacks them, and python-decouple reads the environment
+# before .env, so they take precedence over .env values.
+OFFLINE_DEFAULTS = {
+    "CORS_ALLOWED_ORIGINS": "http://localhost:3000",
+    "COGNITO_REGION": "us-east-1",
+    "COGNITO_USER_POOL_ID": "us-east-1_loadtest",
+    "COGNITO_CLIENT_ID": "loadtest-client",
+    "MAIL_FROM": "loadtest@example.com",
+    "SENDGRID_API_KEY": "unused",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+class LoadTest:
+    def __init__(self, app, users: List[dict], notification_ids: Dict[str, List[str]], tokens: Dict[str, str]):
+        self.app = app
+        self.users = users
+        self.notification_ids = notification_ids
+        self.tokens = tokens
+        # name -> (request builder, statuses counted as success)
+        self.scenarios: Dict[str, Tuple[Callable[[], dict], set]] = {
+            "notifications_list": (self._notifications_list, {200}),
+            "notifications_search": (self._notifications_search, {200}),
+            "mark_read": (self._mark_read, {200, 404}),
+            "auth_me": (self._auth_me, {200}),
+            "student_dashboard": (lambda: {"method": "GET", "path": "/api/student/dashboard"}, {200}),
+            "teacher_dashboard": (lambda: {"method": "GET", "path": "/api/teacher/dashboard"}, {200}),
+        }
+
+    def _random_user_id(self) -> str:
+        return random.choice(self.users)["id"]
+
+    def _notifications_list(self) -> dict:
+        return {
+            "method": "GET", "path": "/api/notifications",
+            "params": {"user_id": self._random_user_id(), "limit": 20},
+        }
+
+    def _notifications_search(self) -> dict:
+        return {
+            "method": "GET", "path": "/api/notifications/search",
+            "params": {"query": random.choice(SEARCH_TERMS), "user_id": self._random_user_id(), "limit": 20},
+        }
+
+    def _mark_read(self) -> dict:
+        ids = self.notification_ids[self._random_user_id()]
+        return {
+            "method": "PATCH", "path": "/api/notifications/mark-read",
+            "json_body": {"notification_ids": random.sample(ids, min(5, len(ids)))},
+        }
+
+    def _auth_me(self) -> dict:
+        user = random.choice(self.users)
+        return {
+            "method": "GET", "path": "/api/auth/me",
+            "headers": {"Authorization": f"Bearer {self.tokens[user['email']]}"},
+        }
+
+    async def run_stage(self, scenario_names: List[str], concurrency: int, duration: float) -> Dict[str, dict]:
+        from benchmarks.asgi_client import request
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            step = offset
+            while time.perf_counter() < deadline:
+                name = scenario_names[step % len(scenario_names)]
+                step += 1
+                build, ok_statuses = self.scenarios[name]
+                kwargs = build()
+                start = time.perf_counter()
+                try:
+                    response = await request(self.app, **kwargs)
+                    ok = response.status_code in ok_statuses
+                except Exception:
+                    ok = False
+                latencies[name].append(time.perf_counter() - start)
+                if not ok:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        stats = {}
+        for name in scenario_names:
+            values = sorted(latencies[name])
+            stats[name] = {
+                "requests": len(values),
+                "errors": errors[name],
+                "rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        return stats
+
+
+async def seed(user_count: int, notifications_per_user: int):
+    from app.db.documents.notification import Notification, NotificationType
+    from app.db.documents.user import User, UserRole
+
+    await User.get_pymongo_collection().delete_many({})
+    await Notification.get_pymongo_collection().delete_many({})
+
+    users = [
+        User(
+            email=f"loadtest-{index}@example.com",
+            full_name=f"Load Test {index}",
+            role=UserRole.teacher if index % 10 == 0 else UserRole.student,
+        )
+        for index in range(user_count)
+    ]
+    await User.insert_many(users)
+
+    notification_ids: Dict[str, List[str]] = {}
+    types = [NotificationType.CHAT.value, NotificationType.SYSTEM.value, NotificationType.FLAGGED_CONTENT.value]
+    for user in users:
+        batch = [
+            Notification(
+                user_id=str(user.id),
+                title=f"{random.choice(SEARCH_TERMS).title()} update {index}",
+                message=f"Your {random.choice(SEARCH_TERMS)} has a new {random.choice(SEARCH_TERMS)}",
+                type=random.choice(types),
+            )
+            for index in range(notifications_per_user)
+        ]
+        await Notification.insert_many(batch)
+        notification_ids[str(user.id)] = [str(notif.id) for notif in batch]
+
+    return [{"id": str(user.id), "email": user.email} for user in users], notification_ids
+
+
+async def run(args) -> Dict[str, float]:
+    from main import app
+    from benchmarks.fakes import TokenSigner, install_fake_mail, install_jwks_stub
+
+    signer = TokenSigner()
+    install_jwks_stub(signer)
+    install_fake_mail()
+
+    results: Dict[str, float] = {}
+    async with app.router.lifespan_context(app):
+        print(f"Seeding {args.users} users x {args.notifications_per_user} notifications ...")
+        users, notification_ids = await seed(args.users, args.notifications_per_user)
+        tokens = {user["email"]: signer.issue(user["email"]) for user in users}
+        load_test = LoadTest(app, users, notification_ids, tokens)
+
+        scenario_names = args.scenarios.split(",")
+        unknown = set(scenario_names) - set(load_test.scenarios)
+        if unknown:
+            raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            stats = await load_test.run_stage(scenario_names, concurrency, args.duration)
+            print(f"\nconcurrency={concurrency}")
+            print(f"  {'scenario':<22}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+            for name, row in stats.items():
+                print(
+                    f"  {name:<22}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+                    f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                )
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                    results[f"c{concurrency}.{name}.{key}"] = row[key]
+                results[f"c{concurrency}.{name}.error_rate"] = row["errors"] / max(row["requests"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma-separated concurrency stages")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per stage")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--notifications-per-user", type=int, default=50)
+    parser.add_argument(
+        "--scenarios",
+        default="notifications_list,notifications_search,mark_read,auth_me,student_dashboard,teacher_dashboard",
+    )
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.3)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to seed a database whose name does not end in 'loadtest'")
+
+    # Settings are read from the environment on first import of the app
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MAIL_TRANSPORT"] = "memory"
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    higher_is_better = [key for key in results if key.endswith(".rps")]
+    sys.exit(report("load_test", results, args, higher_is_better=higher_is_better))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Login event write throughput and history reads, against a local mongod.
+
+Writes --events login events for --users users in four ways:
+
+* `insert_one`     - one round trip per event (what recording inline would cost)
+* `buffered`       - `record_token_use` + `LoginEventWriter.flush`, batches of
+                     LOGIN_EVENTS_BATCH_SIZE (current code), into `login_events`
+* `buffered_plain` - the same batches into an ordinary collection with a
+                     (user_id, at) index, for comparison with time-series storage
+* `record_only`    - `record_token_use` alone: the cost on the request path
+
+then times `login_history` for one user's last 7 days and reports the storage
+size of both collections. The database named in --mongodb-url is wiped, so it
+must end in "loadtest".
+
+    python -m benchmarks.login_history --events 200000 --users 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS, percentile
+
+PLAIN_COLLECTION = "login_events_plain"
+
+
+def generate(users: List[str], count: int, rng: random.Random) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    span = timedelta(days=30).total_seconds()
+    events = []
+    for index in range(count):
+        events.append({
+            "user_id": rng.choice(users),
+            "at": now - timedelta(seconds=span * (1 - index / count)),
+            "kind": "token_use",
+            "ip": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": "Mozilla/5.0 (benchmark)",
+            "auth_time": int(now.timestamp()) - rng.randrange(86400),
+        })
+    return events
+
+
+async def run(args) -> Dict[str, float]:
+    from main import app
+    from pymongo import ASCENDING, DESCENDING
+    from app.core.config import configurations
+    from app.db.documents.login_event import LoginEvent
+    from app.services import login_history
+
+    rng = random.Random(46)
+    users = [f"user-{index}" for index in range(args.users)]
+    events = generate(users, args.events, rng)
+    results: Dict[str, float] = {}
+
+    async with app.router.lifespan_context(app):
+        collection = LoginEvent.get_pymongo_collection()
+        database = collection.database
+        await collection.delete_many({})
+        await database.drop_collection(PLAIN_COLLECTION)
+        plain = database[PLAIN_COLLECTION]
+        await plain.create_index([("user_id", ASCENDING), ("at", DESCENDING)])
+
+        sample = events[:args.single]
+        start = time.perf_counter()
+        for event in sample:
+            await collection.insert_one(dict(event))
+        results["insert_one.events_per_s"] = len(sample) / (time.perf_counter() - start)
+        await collection.delete_many({})
+
+        writer = login_history.login_event_writer
+        start = time.perf_counter()
+        for event in events:
+            writer.record(dict(event))
+            if writer.pending() >= configurations.LOGIN_EVENTS_BATCH_SIZE:
+                await writer.flush()
+        await writer.flush()
+        results["buffered.events_per_s"] = len(events) / (time.perf_counter() - start)
+
+        batch_size = configurations.LOGIN_EVENTS_BATCH_SIZE
+        start = time.perf_counter()
+        for offset in range(0, len(events), batch_size):
+            await plain.insert_many([dict(event) for event in events[offset:offset + batch_size]], ordered=False)
+        results["buffered_plain.events_per_s"] = len(events) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for index in range(args.events):
+            login_history.record_token_use(users[index % len(users)], {"auth_time": index}, "10.0.0.1", "bench")
+        results["record_only.events_per_s"] = args.events / (time.perf_counter() - start)
+        writer._buffer.clear()
+
+        since = datetime.now(timezone.utc) - timedelta(days=7)
+        latencies = []
+        for _ in range(args.reads):
+            user_id = rng.choice(users)
+            start = time.perf_counter()
+            await login_history.login_history(user_id, since=since, limit=50)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results["history.p50_ms"] = statistics.median(latencies)
+        results["history.p99_ms"] = percentile(latencies, 99)
+
+        for name in (LoginEvent.Settings.name, PLAIN_COLLECTION):
+            stats = await database.command("collStats", name)
+            print(f"{name}: storage {stats.get('storageSize', 0) / 1e6:.1f} MB, "
+                  f"indexes {stats.get('totalIndexSize', 0) / 1e6:.1f} MB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--single", type=int, default=5000, help="Events written one at a time")
+    parser.add_argument("--reads", type=int, default=500)
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MAIL_TRANSPORT"] = "memory"
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    higher = [key for key in results if key.endswith("events_per_s")]
+    sys.exit(report("login_history", results, args, higher_is_better=higher))
+
+
+if __name__ == "__main__":
+    main()
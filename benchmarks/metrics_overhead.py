@@ -0,0 +1,86 @@
+"""
+Per-request overhead of MetricsMiddleware.
+
+Sends the same requests to two otherwise identical FastAPI apps, with and
+without the middleware, and reports the difference in mean latency.
+
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION, HTTP_REQUESTS, MetricsMiddleware
+from benchmarks.asgi_client import request
+from benchmarks.baseline import add_baseline_arguments, report
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"item_id": item_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def mean_latency_us(app: FastAPI, count: int) -> float:
+    # Warm up routing and response model caches
+    for _ in range(200):
+        await request(app, "GET", "/items/warmup")
+    start = time.perf_counter()
+    for index in range(count):
+        await request(app, "GET", f"/items/{index}")
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bookkeeping_us(count: int) -> float:
+    """Cost of the metric updates the middleware performs per request"""
+    start = time.perf_counter()
+    for _ in range(count):
+        HTTP_IN_FLIGHT.inc("GET")
+        HTTP_IN_FLIGHT.dec("GET")
+        HTTP_REQUEST_DURATION.observe("GET", "/items/{item_id}", value=0.003)
+        HTTP_REQUESTS.inc("GET", "/items/{item_id}", "200")
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def run(count: int, rounds: int) -> dict:
+    plain, instrumented = build_app(False), build_app(True)
+    plain_runs, instrumented_runs = [], []
+    # Interleave rounds so CPU frequency and GC noise hit both variants equally
+    for _ in range(rounds):
+        plain_runs.append(await mean_latency_us(plain, count))
+        instrumented_runs.append(await mean_latency_us(instrumented, count))
+    baseline_us = statistics.median(plain_runs)
+    with_metrics_us = statistics.median(instrumented_runs)
+    return {
+        "request_us_without_metrics": baseline_us,
+        "request_us_with_metrics": with_metrics_us,
+        "overhead_us": with_metrics_us - baseline_us,
+        "bookkeeping_us": statistics.median(bookkeeping_us(count * 10) for _ in range(rounds)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per round and variant")
+    parser.add_argument("--rounds", type=int, default=5)
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.rounds))
+    print(f"MetricsMiddleware overhead, median of {args.rounds} round(s) x {args.requests} requests:")
+    sys.exit(report("metrics_overhead", results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Roster import throughput against a local Cognito stand-in.
+
+The Cognito stage always runs offline: `provision_cognito` creates users in the
+in-process fake user pool (per-call latency plus a request-rate quota that
+answers TooManyRequestsException) at each parallelism level, and reports rows/s
+and throttled calls.
+
+With --mongodb-url the whole import also runs end to end (`create_import` and
+`run_import`, chunked unordered `insert_many`) and is compared with provisioning
+the same roster one row at a time the way `POST /api/auth/register` does. That
+database is wiped, so its name must end in "loadtest".
+
+    python -m benchmarks.roster_import --rows 300 --concurrency 1,8,16
+    python -m benchmarks.roster_import --mongodb-url mongodb://127.0.0.1:27017/maitech_loadtest
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS
+
+
+def roster_csv(count: int, prefix: str = "student") -> bytes:
+    lines = ["email,name,role"]
+    lines.extend(f"{prefix}-{index}@school.example.com,Student {index},student" for index in range(count))
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def cognito_stage(args) -> Dict[str, float]:
+    from app.db.documents.roster_import import RosterImportRow, RosterRowStatus
+    from app.services.roster_import import provision_cognito
+    from benchmarks.fakes import init_offline_beanie, install_fake_cognito
+
+    await init_offline_beanie([RosterImportRow])
+    results: Dict[str, float] = {}
+    print(f"Cognito stage: {args.rows} rows, {args.latency * 1000:.0f} ms per call, quota {args.rate_limit:g}/s")
+    print(f"  {'parallel':>8}{'rows/s':>10}{'seconds':>10}{'throttled':>11}{'failed':>8}")
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        client = install_fake_cognito(latency=args.latency, rate_limit=args.rate_limit)
+        rows = [
+            RosterImportRow(import_id="benchmark", row_number=index, email=f"c{concurrency}-{index}@school.example.com")
+            for index in range(args.rows)
+        ]
+        start = time.perf_counter()
+        outcomes = await provision_cognito(rows, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for _, status, _ in outcomes if status != RosterRowStatus.PROVISIONED.value)
+        print(f"  {concurrency:>8}{args.rows / elapsed:>10.1f}{elapsed:>10.2f}{client.throttled:>11}{failed:>8}")
+        results[f"cognito.c{concurrency}.rows_per_s"] = args.rows / elapsed
+        results[f"cognito.c{concurrency}.failed"] = failed
+    return results
+
+
+async def end_to_end(args) -> Dict[str, float]:
+    from app.core.cognito import CognitoUserExists, admin_create_user
+    from app.db.documents.roster_import import RosterImport, RosterImportRow
+    from app.db.documents.user import User
+    from app.db.init_db import close_db, init_db
+    from app.services.roster_import import claim_import, create_import, run_import
+    from benchmarks.fakes import install_fake_cognito
+
+    client = await init_db()
+    results: Dict[str, float] = {}
+    try:
+        for model in (User, RosterImport, RosterImportRow):
+            await model.get_pymongo_collection().delete_many({})
+
+        # One row at a time, as POST /api/auth/register does it
+        install_fake_cognito(latency=args.latency, rate_limit=args.rate_limit)
+        sequential_rows = min(args.rows, 200)
+        start = time.perf_counter()
+        for index in range(sequential_rows):
+            email = f"seq-{index}@school.example.com"
+            try:
+                await asyncio.to_thread(admin_create_user, email, f"Student {index}")
+            except CognitoUserExists:
+                pass
+            if not await User.find_one(User.email == email):
+                await User(email=email, full_name=f"Student {index}").insert()
+        per_row = (time.perf_counter() - start) / sequential_rows
+        results["sequential.rows_per_s"] = 1 / per_row
+
+        install_fake_cognito(latency=args.latency, rate_limit=args.rate_limit)
+        start = time.perf_counter()
+        job = await create_import(roster_csv(args.rows), "csv")
+        claimed = await claim_import()
+        await run_import(claimed)
+        elapsed = time.perf_counter() - start
+        job = await RosterImport.get(job.id)
+        results["import.rows_per_s"] = args.rows / elapsed
+        print(f"\nEnd to end, {args.rows} rows:")
+        print(f"  one row at a time  {results['sequential.rows_per_s']:>8.1f} rows/s (measured on {sequential_rows} rows)")
+        print(f"  roster import      {results['import.rows_per_s']:>8.1f} rows/s, counts={job.counts}")
+    finally:
+        await close_db(client)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--concurrency", default="1,8,16", help="Comma-separated Cognito parallelism levels")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake Cognito call")
+    parser.add_argument("--rate-limit", type=float, default=100.0, help="Fake Cognito calls per second before throttling")
+    parser.add_argument("--mongodb-url", default="", help="Also run the full import against this database")
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.3)
+    args = parser.parse_args()
+
+    if args.mongodb_url:
+        database = urlparse(args.mongodb_url).path.lstrip("/")
+        if not database.endswith("loadtest"):
+            raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+        os.environ["MONGODB_URL"] = args.mongodb_url
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault("MONGODB_URL", "mongodb://127.0.0.1:27017/maitech_loadtest")
+
+    async def run() -> Dict[str, float]:
+        results = await cognito_stage(args)
+        if args.mongodb_url:
+            results.update(await end_to_end(args))
+        return results
+
+    results = asyncio.run(run())
+    print()
+    higher_is_better = [key for key in results if key.endswith("rows_per_s")]
+    sys.exit(report("roster_import", results, args, higher_is_better=higher_is_better))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+School-manager analytics on rollups vs computing them live, against a local mongod.
+
+Seeds one school (--students students in grades 6-12, one class of ~30 per
+grade and subject) with --days days of usage sessions and --scores scores per
+student and subject. The events go through `apply_events` in batches, which
+reports the rollup ingestion rate; the same events are also stored raw in a
+benchmark-only collection.
+
+Then times `GET /api/school-manager/analytics` (and the at-risk and class
+endpoints) through the real app with a signed school-manager token, and the
+equivalent live aggregations over the raw events. The dashboard target is
+under 100 ms for 5,000 students. The database named in --mongodb-url is wiped,
+so it must end in "loadtest".
+
+    python -m benchmarks.school_analytics --students 5000 --days 30
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS, percentile
+
+SCHOOL_ID = "benchmark-school"
+GRADES = [str(grade) for grade in range(6, 13)]
+SUBJECTS = ["math", "science", "english", "history", "geography", "art"]
+RAW_COLLECTION = "school_events_raw"
+
+
+def generate_events(student_ids: List[str], days: int, scores: int, rng: random.Random):
+    from app.services.school_analytics import SchoolEvent
+
+    now = datetime.now(timezone.utc)
+    events = []
+    for index, student_id in enumerate(student_ids):
+        grade = GRADES[index % len(GRADES)]
+        section = index // (len(GRADES) * 30)
+        ability = rng.gauss(75, 12)
+        # Some students stop showing up, so the inactivity rule has something to find
+        last_day = days if index % 25 else rng.randint(0, days // 2)
+        for subject in SUBJECTS:
+            class_id = f"{grade}-{subject}-{section}"
+            for _ in range(scores):
+                at = now - timedelta(days=rng.uniform(days - last_day, days))
+                events.append(SchoolEvent(SCHOOL_ID, class_id, grade, subject, student_id,
+                                          score=max(0.0, min(100.0, rng.gauss(ability, 10))), at=at))
+        for day in range(days - last_day, days):
+            subject = rng.choice(SUBJECTS)
+            events.append(SchoolEvent(SCHOOL_ID, f"{grade}-{subject}-{section}", grade, subject, student_id,
+                                      minutes=rng.uniform(5, 60), at=now - timedelta(days=day, hours=rng.uniform(0, 8))))
+    rng.shuffle(events)
+    return events
+
+
+async def live_overview(database, days: int) -> Dict[str, Any]:
+    """The dashboard numbers computed from raw events, for comparison"""
+    raw = database[RAW_COLLECTION]
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    async def aggregate(pipeline):
+        cursor = await raw.aggregate(pipeline, allowDiskUse=True)
+        return await cursor.to_list()
+
+    grades, usage, students = await asyncio.gather(
+        aggregate([
+            {"$match": {"school_id": SCHOOL_ID, "score": {"$ne": None}}},
+            {"$group": {"_id": {"grade": "$grade", "subject": "$subject"}, "avg": {"$avg": "$score"}, "n": {"$sum": 1}}},
+        ]),
+        aggregate([
+            {"$match": {"school_id": SCHOOL_ID, "minutes": {"$gt": 0}, "at": {"$gte": since}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$at"}},
+                        "minutes": {"$sum": "$minutes"}, "sessions": {"$sum": 1}}},
+        ]),
+        aggregate([
+            {"$match": {"school_id": SCHOOL_ID}},
+            {"$group": {"_id": "$student_id", "avg": {"$avg": "$score"}, "last": {"$max": "$at"}}},
+            {"$match": {"$or": [{"avg": {"$lt": 60}}, {"last": {"$lt": datetime.now(timezone.utc) - timedelta(days=14)}}]}},
+            {"$sort": {"avg": 1}},
+        ]),
+    )
+    return {"grades": grades, "usage": usage, "at_risk": students}
+
+
+async def timed(call, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+async def run(args) -> Dict[str, float]:
+    from dataclasses import asdict
+
+    from main import app
+    from app.db.documents.school_rollup import ClassRollup, GradeRollup, SchoolRollup, SchoolUsageDay, StudentStanding
+    from app.db.documents.user import User, UserRole
+    from app.services.school_analytics import apply_events
+    from benchmarks.asgi_client import request
+    from benchmarks.fakes import TokenSigner, install_fake_mail, install_jwks_stub
+
+    signer = TokenSigner()
+    install_jwks_stub(signer)
+    install_fake_mail()
+    rng = random.Random(41)
+    results: Dict[str, float] = {}
+
+    async with app.router.lifespan_context(app):
+        database = User.get_pymongo_collection().database
+        for model in (User, StudentStanding, ClassRollup, GradeRollup, SchoolRollup, SchoolUsageDay):
+            await model.get_pymongo_collection().delete_many({})
+        await database.drop_collection(RAW_COLLECTION)
+
+        students = [
+            User(email=f"student-{index}@school.example.com", full_name=f"Student {index}", school_id=SCHOOL_ID)
+            for index in range(args.students)
+        ]
+        await User.insert_many(students)
+        manager = User(email="manager@school.example.com", full_name="Manager",
+                       role=UserRole.school_manager, school_id=SCHOOL_ID)
+        await manager.insert()
+        headers = {"Authorization": f"Bearer {signer.issue(manager.email)}"}
+
+        events = generate_events([str(user.id) for user in students], args.days, args.scores, rng)
+        start = time.perf_counter()
+        for offset in range(0, len(events), args.batch):
+            await apply_events(events[offset:offset + args.batch])
+        elapsed = time.perf_counter() - start
+        results["ingest.events_per_s"] = len(events) / elapsed
+        print(f"{args.students} students, {len(events)} events: rollups ingested at {len(events) / elapsed:,.0f} events/s")
+
+        raw = [asdict(event) for event in events]
+        for offset in range(0, len(raw), 10_000):
+            await database[RAW_COLLECTION].insert_many(raw[offset:offset + 10_000], ordered=False)
+        await database[RAW_COLLECTION].create_index([("school_id", 1), ("student_id", 1)])
+
+        def endpoint(path):
+            async def call():
+                response = await request(app, "GET", path, headers=headers)
+                if response.status_code != 200:
+                    raise SystemExit(f"{path}: {response.status_code} {response.body[:200]!r}")
+            return call
+
+        cases = {
+            "rollup.analytics": endpoint("/api/school-manager/analytics"),
+            "rollup.at_risk": endpoint("/api/school-manager/analytics/at-risk"),
+            "rollup.classes": endpoint("/api/school-manager/analytics/classes"),
+            "live.analytics": lambda: live_overview(database, 30),
+        }
+        print(f"\n  {'case':<22}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, call in cases.items():
+            repeat = args.repeat if name.startswith("rollup") else max(3, args.repeat // 10)
+            samples = await timed(call, repeat)
+            p50, p95 = statistics.median(samples) * 1000, percentile(samples, 95) * 1000
+            print(f"  {name:<22}{p50:>10.2f}{p95:>10.2f}")
+            results[f"{name}.p50_ms"] = p50
+            results[f"{name}.p95_ms"] = p95
+
+        if results["rollup.analytics.p95_ms"] > args.target_ms:
+            print(f"\n  FAIL analytics p95 above the {args.target_ms:g} ms target")
+            sys.exit(1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=30, help="Days of usage sessions per student")
+    parser.add_argument("--scores", type=int, default=4, help="Scores per student and subject")
+    parser.add_argument("--batch", type=int, default=2000, help="Events per apply_events call")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MAIL_TRANSPORT"] = "memory"
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    sys.exit(report("school_analytics", results, args, higher_is_better=["ingest.events_per_s"]))
+
+
+if __name__ == "__main__":
+    main()
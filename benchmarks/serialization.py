@@ -0,0 +1,304 @@
+"""
+Serialization cost of the list endpoints' response models, CPU only.
+
+Compares the ways a page of documents can become a JSON response:
+
+* `kwargs`          - `NotificationResponse(id=str(n.id), ...)` per row (current code)
+* `model_validate`  - validate the document's `model_dump()` per row
+* `type_adapter`    - validate the whole page at once with `TypeAdapter(List[...])`
+* `model_construct` - build response models without validation
+* `dicts`           - plain dicts, validated only by the route's response_model
+
+Each strategy is timed twice: building the page (`build`), and building plus
+what FastAPI does with the return value for `response_model` (validate and dump
+to JSON, `endpoint`). Documents are also dumped directly with
+`model_dump(mode="json")` to show the cost of their field serializers, and
+raw Mongo rows are parsed into documents to show what `to_list()` costs.
+
+Nothing connects to MongoDB; Beanie is initialized against an offline stand-in.
+
+    python -m benchmarks.serialization --sizes 20,100,1000
+    python -m benchmarks.serialization --record-history
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+from benchmarks.load_test import OFFLINE_DEFAULTS
+
+
+def raw_notifications(count: int) -> List[dict]:
+    """Rows shaped like the `notifications` collection returns them"""
+    now = datetime.now(timezone.utc)
+    user_id = str(ObjectId())
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "title": f"Assignment {index} graded",
+            "message": f"Your assignment {index} has been graded. Open it to see the feedback from your teacher.",
+            "type": ("chat", "system", "flagged_content")[index % 3],
+            "status": ("unread", "read")[index % 2],
+            "related_resource_id": str(ObjectId()) if index % 2 else None,
+            "created_at": now - timedelta(minutes=index),
+        }
+        for index in range(count)
+    ]
+
+
+def raw_users(count: int) -> List[dict]:
+    """Rows shaped like the `users` collection returns them"""
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"user-{index}@example.com",
+            "full_name": f"User Number {index}",
+            "role": ("student", "teacher", "parent")[index % 3],
+            "is_active": True,
+            "created_at": now - timedelta(days=index),
+            "updated_at": now,
+        }
+        for index in range(count)
+    ]
+
+
+def notification_strategies(documents) -> Dict[str, Callable[[], object]]:
+    """Ways `get_notifications` can build its NotificationListResponse"""
+    from pydantic import TypeAdapter
+
+    from app.api.v1.routes.notifications import NotificationListResponse, NotificationResponse
+
+    page_adapter = TypeAdapter(List[NotificationResponse])
+
+    def page(rows):
+        return NotificationListResponse(notifications=rows, total=len(rows), limit=len(rows), offset=0)
+
+    def kwargs():
+        return page([
+            NotificationResponse(
+                id=str(notif.id),
+                user_id=notif.user_id,
+                title=notif.title,
+                message=notif.message,
+                type=notif.type,
+                status=notif.status,
+                created_at=notif.created_at,
+                related_resource_id=notif.related_resource_id,
+            )
+            for notif in documents
+        ])
+
+    def model_validate():
+        # The document's field serializer already turns `id` into a string
+        return page([NotificationResponse.model_validate(notif.model_dump()) for notif in documents])
+
+    def type_adapter():
+        return page(page_adapter.validate_python([notif.model_dump() for notif in documents]))
+
+    def model_construct():
+        return page([
+            NotificationResponse.model_construct(
+                id=str(notif.id),
+                user_id=notif.user_id,
+                title=notif.title,
+                message=notif.message,
+                type=notif.type,
+                status=notif.status,
+                created_at=notif.created_at,
+                related_resource_id=notif.related_resource_id,
+            )
+            for notif in documents
+        ])
+
+    def dicts():
+        rows = [
+            {
+                "id": str(notif.id),
+                "user_id": notif.user_id,
+                "title": notif.title,
+                "message": notif.message,
+                "type": notif.type,
+                "status": notif.status,
+                "created_at": notif.created_at,
+                "related_resource_id": notif.related_resource_id,
+            }
+            for notif in documents
+        ]
+        return {"notifications": rows, "total": len(rows), "limit": len(rows), "offset": 0}
+
+    return {
+        "kwargs": kwargs,
+        "model_validate": model_validate,
+        "type_adapter": type_adapter,
+        "model_construct": model_construct,
+        "dicts": dicts,
+    }
+
+
+def user_strategies(documents) -> Dict[str, Callable[[], object]]:
+    """Ways `get_all_users` can build its List[UserResponse]"""
+    from app.models.user_model import UserResponse, UserRole
+
+    # UserResponse.role only accepts the legacy customer/seller/admin roles, so
+    # the rows carry a valid one to keep the comparison about serialization
+    role = UserRole.admin.value
+
+    def dicts():
+        return [
+            {
+                "id": str(user.id),
+                "name": user.full_name or "Unknown",
+                "email": user.email,
+                "role": role,
+                "created_at": user.created_at,
+            }
+            for user in documents
+        ]
+
+    def kwargs():
+        return [
+            UserResponse(
+                id=str(user.id),
+                name=user.full_name or "Unknown",
+                email=user.email,
+                role=role,
+                created_at=user.created_at,
+            )
+            for user in documents
+        ]
+
+    def model_construct():
+        return [
+            UserResponse.model_construct(
+                id=str(user.id),
+                name=user.full_name or "Unknown",
+                email=user.email,
+                role=UserRole.admin,
+                created_at=user.created_at,
+            )
+            for user in documents
+        ]
+
+    return {"dicts": dicts, "kwargs": kwargs, "model_construct": model_construct}
+
+
+def fastapi_response(response_model) -> Callable[[object], bytes]:
+    """
+    What FastAPI does with an endpoint's return value for `response_model`:
+    validate it against the route's response field and dump it to JSON bytes.
+    """
+    from fastapi.routing import APIRoute
+
+    async def endpoint():
+        return None
+
+    field = APIRoute("/", endpoint, response_model=response_model).response_field
+
+    def render(content) -> bytes:
+        value, errors = field.validate(content, {}, loc=("response",))
+        if errors:
+            raise ValueError(errors)
+        return field.serialize_json(value, by_alias=True)
+
+    return render
+
+
+def median_us(func: Callable[[], object], number: int, repeat: int) -> float:
+    """Median over `repeat` rounds of the mean call time, in microseconds"""
+    func()
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number * 1e6)
+    return statistics.median(rounds)
+
+
+async def run(sizes: List[int], repeat: int, budget: int) -> Dict[str, float]:
+    from app.api.v1.routes.notifications import NotificationListResponse
+    from app.db.documents.notification import Notification
+    from app.db.documents.user import User
+    from app.models.user_model import UserResponse
+    from benchmarks.fakes import init_offline_beanie
+
+    await init_offline_beanie([User, Notification])
+
+    render_notifications = fastapi_response(NotificationListResponse)
+    render_users = fastapi_response(List[UserResponse])
+
+    results: Dict[str, float] = {}
+    for size in sizes:
+        # Keep each measurement around `budget` row-operations
+        number = max(budget // size, 3)
+
+        notification_rows = raw_notifications(size)
+        user_rows = raw_users(size)
+        results[f"notifications.parse_documents.n{size}_us"] = median_us(
+            lambda: [Notification.model_validate(row) for row in notification_rows], number, repeat,
+        )
+        results[f"users.parse_documents.n{size}_us"] = median_us(
+            lambda: [User.model_validate(row) for row in user_rows], number, repeat,
+        )
+        notifications = [Notification.model_validate(row) for row in notification_rows]
+        users = [User.model_validate(row) for row in user_rows]
+
+        results[f"notifications.document_dump_json.n{size}_us"] = median_us(
+            lambda: [notif.model_dump(mode="json") for notif in notifications], number, repeat,
+        )
+        results[f"users.document_dump_json.n{size}_us"] = median_us(
+            lambda: [user.model_dump(mode="json") for user in users], number, repeat,
+        )
+
+        for group, strategies, render in (
+            ("notifications", notification_strategies(notifications), render_notifications),
+            ("users", user_strategies(users), render_users),
+        ):
+            for name, build in strategies.items():
+                results[f"{group}.{name}.build.n{size}_us"] = median_us(build, number, repeat)
+                results[f"{group}.{name}.endpoint.n{size}_us"] = median_us(
+                    lambda build=build, render=render: render(build()), number, repeat,
+                )
+    return results
+
+
+def print_table(results: Dict[str, float], sizes: List[int]) -> None:
+    rows: Dict[str, Dict[int, float]] = {}
+    for key, value in results.items():
+        name, size = key.rsplit(".n", 1)
+        rows.setdefault(name, {})[int(size[:-3])] = value
+    print(f"  {'case (us per page)':<44}" + "".join(f"{f'n={size}':>12}" for size in sizes))
+    for name, by_size in rows.items():
+        print(f"  {name:<44}" + "".join(f"{by_size.get(size, 0.0):>12.1f}" for size in sizes))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20,100,1000", help="Comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per case; the median is reported")
+    parser.add_argument("--budget", type=int, default=20000, help="Rows processed per round")
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.3)
+    args = parser.parse_args()
+
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    sizes = [int(value) for value in args.sizes.split(",")]
+    results = asyncio.run(run(sizes, args.repeat, args.budget))
+    print_table(results, sizes)
+    sys.exit(report("serialization", results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Student dashboard from per-student rollups vs computing it live, against a local mongod.
+
+Generates --days days of activity for --students students: --sessions study
+sessions a day on average, in random subjects, and a score for about one
+session in four. The events go through `record_activity` in batches of
+--batch, which reports the ingestion rate (time-series inserts plus rollup
+updates).
+
+Then times `GET /api/student/dashboard` through the real app with signed
+student tokens, and the same numbers aggregated live from the raw
+time-series collection for comparison. The database named in --mongodb-url is
+wiped, so it must end in "loadtest".
+
+    python -m benchmarks.student_dashboard --students 10000 --days 30
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS, percentile
+
+SUBJECTS = ["Math", "Science", "English", "History", "Geography", "Art"]
+
+
+def generate_events(student_ids: List[str], days: int, sessions: float, rng: random.Random):
+    from app.services.student_activity import ActivityEvent
+
+    now = datetime.now(timezone.utc)
+    events = []
+    for student_id in student_ids:
+        ability = rng.gauss(75, 12)
+        for _ in range(int(days * sessions)):
+            at = now - timedelta(days=rng.uniform(0, days))
+            score = max(0.0, min(100.0, rng.gauss(ability, 10))) if rng.random() < 0.25 else None
+            events.append(ActivityEvent(student_id, rng.choice(SUBJECTS), rng.uniform(5, 60), score, at))
+    # Events arrive roughly in time order, interleaved across students
+    events.sort(key=lambda event: event.at)
+    return events
+
+
+async def live_dashboard(collection, student_id: str, weeks: int):
+    """The dashboard numbers aggregated from raw activity, for comparison"""
+    since = datetime.now(timezone.utc) - timedelta(weeks=weeks)
+    cursor = await collection.aggregate([
+        {"$match": {"student_id": student_id}},
+        {"$facet": {
+            "subjects": [{"$group": {"_id": "$subject", "minutes": {"$sum": "$minutes"}, "avg": {"$avg": "$score"}}}],
+            "weeks": [
+                {"$match": {"at": {"$gte": since}}},
+                {"$group": {"_id": {"$dateTrunc": {"date": "$at", "unit": "week", "startOfWeek": "monday"}},
+                            "minutes": {"$sum": "$minutes"}}},
+            ],
+            "totals": [{"$group": {"_id": None, "minutes": {"$sum": "$minutes"}, "avg": {"$avg": "$score"}}}],
+        }},
+    ])
+    return await cursor.to_list()
+
+
+async def timed(call, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+async def run(args) -> Dict[str, float]:
+    from main import app
+    from app.core.config import configurations
+    from app.db.documents.student_activity import StudentActivity, StudentProgress
+    from app.db.documents.user import User
+    from app.services.student_activity import record_activity
+    from benchmarks.asgi_client import request
+    from benchmarks.fakes import TokenSigner, install_fake_mail, install_jwks_stub
+
+    signer = TokenSigner()
+    install_jwks_stub(signer)
+    install_fake_mail()
+    rng = random.Random(49)
+    results: Dict[str, float] = {}
+
+    async with app.router.lifespan_context(app):
+        for model in (User, StudentActivity, StudentProgress):
+            await model.get_pymongo_collection().delete_many({})
+
+        students = [
+            User(email=f"student-{index}@school.example.com", full_name=f"Student {index}")
+            for index in range(args.students)
+        ]
+        for offset in range(0, len(students), 10_000):
+            await User.insert_many(students[offset:offset + 10_000])
+        student_ids = [str(user.id) for user in students]
+
+        events = generate_events(student_ids, args.days, args.sessions, rng)
+        start = time.perf_counter()
+        for offset in range(0, len(events), args.batch):
+            await record_activity(events[offset:offset + args.batch])
+        elapsed = time.perf_counter() - start
+        results["ingest.events_per_s"] = len(events) / elapsed
+        print(f"{args.students} students, {len(events)} events: ingested at {len(events) / elapsed:,.0f} events/s")
+
+        database = User.get_pymongo_collection().database
+        for name in (StudentActivity.Settings.name, StudentProgress.Settings.name):
+            stats = await database.command("collStats", name)
+            print(f"{name}: storage {stats.get('storageSize', 0) / 1e6:.1f} MB, "
+                  f"indexes {stats.get('totalIndexSize', 0) / 1e6:.1f} MB")
+
+        sample = rng.sample(students, min(args.repeat, len(students)))
+        tokens = [f"Bearer {signer.issue(user.email)}" for user in sample]
+        picks = iter(range(10**9))
+
+        async def rollup():
+            token = tokens[next(picks) % len(tokens)]
+            response = await request(app, "GET", "/api/student/dashboard", headers={"Authorization": token})
+            if response.status_code != 200:
+                raise SystemExit(f"dashboard: {response.status_code} {response.body[:200]!r}")
+
+        raw = StudentActivity.get_pymongo_collection()
+
+        async def live():
+            student_id = student_ids[rng.randrange(len(student_ids))]
+            await live_dashboard(raw, student_id, configurations.STUDENT_ACTIVITY_WEEKS)
+
+        print(f"\n  {'case':<22}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, call, repeat in (("rollup.dashboard", rollup, args.repeat),
+                                   ("live.dashboard", live, max(3, args.repeat // 5))):
+            samples = await timed(call, repeat)
+            p50, p95 = statistics.median(samples) * 1000, percentile(samples, 95) * 1000
+            print(f"  {name:<22}{p50:>10.2f}{p95:>10.2f}")
+            results[f"{name}.p50_ms"] = p50
+            results[f"{name}.p95_ms"] = p95
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sessions", type=float, default=2.0, help="Study sessions per student per day")
+    parser.add_argument("--batch", type=int, default=2000, help="Events per record_activity call")
+    parser.add_argument("--repeat", type=int, default=200)
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MAIL_TRANSPORT"] = "memory"
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    sys.exit(report("student_dashboard", results, args, higher_is_better=["ingest.events_per_s"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+User directory query plans at scale, against a local mongod.
+
+Seeds --users synthetic users (raw unordered `insert_many` batches; reused on
+later runs when the count already matches) and times `list_directory` pages
+against the naive alternatives it replaces:
+
+  * keyset page N vs `skip(N * limit)`, with and without a role filter
+  * collated range prefix vs an anchored case-insensitive regex (`/^q/i`)
+
+Each case also prints the plan's keys/docs examined from `explain`, which is
+what the directory indexes are there to keep flat. The database named in
+--mongodb-url is wiped when it is (re)seeded, so it must end in "loadtest".
+
+    python -m benchmarks.user_directory --users 500000 --page 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import string
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS
+
+ROLE_WEIGHTS = [("student", 85), ("teacher", 8), ("parent", 5), ("school_manager", 2)]
+
+
+def synthetic_user(index: int, rng: random.Random) -> Dict[str, Any]:
+    from bson import ObjectId
+
+    first = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))).capitalize()
+    last = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+    # Mixed case, so a case-sensitive index order would be wrong
+    last = last.upper() if index % 7 == 0 else last.capitalize()
+    role = rng.choices([r for r, _ in ROLE_WEIGHTS], weights=[w for _, w in ROLE_WEIGHTS])[0]
+    return {
+        "_id": ObjectId(),
+        "email": f"{first.lower()}.{last.lower()}.{index}@school.example.com",
+        "full_name": f"{first} {last}",
+        "role": role,
+        "is_active": True,
+    }
+
+
+async def seed(users: int, batch: int) -> None:
+    from app.db.documents.user import User
+
+    collection = User.get_pymongo_collection()
+    if await collection.estimated_document_count() == users:
+        print(f"Reusing {users} seeded users")
+        return
+    await collection.delete_many({})
+    rng = random.Random(37)
+    start = time.perf_counter()
+    for offset in range(0, users, batch):
+        docs = [synthetic_user(index, rng) for index in range(offset, min(offset + batch, users))]
+        await collection.insert_many(docs, ordered=False)
+    print(f"Seeded {users} users in {time.perf_counter() - start:.1f}s")
+
+
+async def explain(filter_: Dict[str, Any], sort, skip: int, limit: int, collation) -> Tuple[int, int]:
+    from app.db.documents.user import User
+
+    database = User.get_pymongo_collection().database
+    command = {"find": User.get_collection_name(), "filter": filter_, "sort": dict(sort), "limit": limit}
+    if skip:
+        command["skip"] = skip
+    if collation is not None:
+        command["collation"] = collation.document
+    result = await database.command({"explain": command, "verbosity": "executionStats"})
+    stats = result["executionStats"]
+    return stats["totalKeysExamined"], stats["totalDocsExamined"]
+
+
+async def timed(call: Callable[[], Awaitable[Any]], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def run(args) -> Dict[str, float]:
+    from app.db.documents.user import DIRECTORY_COLLATION, User
+    from app.db.init_db import close_db, init_db
+    from app.services.user_directory import build_directory_query, list_directory
+
+    client = await init_db()
+    results: Dict[str, float] = {}
+    try:
+        await seed(args.users, args.batch)
+        collection = User.get_pymongo_collection()
+        sort = [("full_name", 1), ("_id", 1)]
+        projection = {"full_name": 1, "email": 1, "role": 1}
+
+        print(f"\n{'case':<34}{'ms':>9}{'keys':>10}{'docs':>10}")
+
+        def line(name: str, ms: float, plan: Tuple[int, int]) -> None:
+            print(f"{name:<34}{ms:>9.2f}{plan[0]:>10}{plan[1]:>10}")
+            results[f"{name}.ms"] = ms
+
+        for role in (None, "teacher"):
+            label = role or "all"
+            # Walk to page N once to get its cursor, then time fetching it
+            cursor = None
+            for _ in range(args.page):
+                _, cursor = await list_directory(role=role, cursor=cursor, limit=args.limit)
+            query = build_directory_query(role=role, cursor=cursor)
+            ms = await timed(lambda: list_directory(role=role, cursor=cursor, limit=args.limit), args.repeat)
+            line(f"keyset.{label}.page{args.page}", ms,
+                 await explain(query, sort, 0, args.limit + 1, DIRECTORY_COLLATION))
+
+            skip_filter = {"role": role} if role else {}
+            skip = args.page * args.limit
+
+            async def skip_page():
+                return await collection.find(skip_filter, projection, collation=DIRECTORY_COLLATION) \
+                    .sort(sort).skip(skip).limit(args.limit).to_list()
+
+            ms = await timed(skip_page, args.repeat)
+            line(f"skip.{label}.page{args.page}", ms,
+                 await explain(skip_filter, sort, skip, args.limit, DIRECTORY_COLLATION))
+
+        for prefix in args.prefixes.split(","):
+            for role in (None, "teacher"):
+                label = f"{prefix}.{role or 'all'}"
+                query = build_directory_query(role=role, prefix=prefix)
+                ms = await timed(lambda: list_directory(role=role, prefix=prefix, limit=args.limit), args.repeat)
+                line(f"range.{label}", ms, await explain(query, sort, 0, args.limit + 1, DIRECTORY_COLLATION))
+
+                regex_filter: Dict[str, Any] = {"full_name": {"$regex": f"^{re.escape(prefix)}", "$options": "i"}}
+                if role:
+                    regex_filter["role"] = role
+
+                async def regex_page():
+                    return await collection.find(regex_filter, projection).sort(sort).limit(args.limit).to_list()
+
+                ms = await timed(regex_page, args.repeat)
+                line(f"regex.{label}", ms, await explain(regex_filter, sort, 0, args.limit, None))
+    finally:
+        await close_db(client)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=10_000, help="Documents per seeding insert_many")
+    parser.add_argument("--limit", type=int, default=50, help="Page size")
+    parser.add_argument("--page", type=int, default=200, help="Deep page to compare keyset and skip on")
+    parser.add_argument("--prefixes", default="a,mar,qu", help="Comma-separated name prefixes")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case (median reported)")
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.5)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to wipe a database whose name does not end in 'loadtest'")
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    for key, value in OFFLINE_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+    print()
+    sys.exit(report("user_directory", results, args))
+
+
+if __name__ == "__main__":
+    main()
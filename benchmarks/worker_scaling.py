@@ -0,0 +1,187 @@
+"""
+Throughput of the production server (gunicorn.conf.py) across worker counts.
+
+For each worker count, starts `gunicorn main:app` on a local port against a
+local mongod, waits for every worker to answer, then drives it for --duration
+seconds from --load-procs load generator processes, each holding --connections
+keep-alive HTTP/1.1 connections. Reports requests/s, the scaling over one
+worker and p50/p99 latency, and stops the server with SIGTERM (a graceful
+drain; the run fails if it does not exit within the graceful timeout).
+
+The load generators share the machine with the server, so leave cores for them:
+scaling flattens once workers + load processes exceed the core count.
+
+    python -m benchmarks.worker_scaling --workers 1,2,4 --path /api/student/dashboard
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from benchmarks.load_test import OFFLINE_DEFAULTS, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _request(reader, writer, raw: bytes) -> None:
+    writer.write(raw)
+    headers = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in headers.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    if not headers.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(headers.split(b"\r\n", 1)[0].decode())
+    await reader.readexactly(length)
+
+
+async def _connection(port: int, raw: bytes, deadline: float, latencies: List[float]) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await _request(reader, writer, raw)
+                latencies.append(time.perf_counter() - start)
+            except (RuntimeError, asyncio.IncompleteReadError, ConnectionError):
+                errors += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    finally:
+        writer.close()
+    return errors
+
+
+def load_process(port: int, path: str, connections: int, duration: float, queue) -> None:
+    raw = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n\r\n".encode()
+
+    async def run() -> Tuple[List[float], int]:
+        latencies: List[float] = []
+        deadline = time.perf_counter() + duration
+        errors = await asyncio.gather(*(_connection(port, raw, deadline, latencies) for _ in range(connections)))
+        return latencies, sum(errors)
+
+    queue.put(asyncio.run(run()))
+
+
+def wait_until_serving(port: int, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited with {server.returncode} during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("gunicorn did not start serving in time")
+
+
+def measure(workers: int, args, env: Dict[str, str]) -> Dict[str, float]:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py",
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_until_serving(port, server)
+        # Workers boot one after another; give the last ones time to finish their lifespan
+        time.sleep(args.settle)
+
+        queue = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=load_process, args=(port, args.path, args.connections, args.duration, queue))
+            for _ in range(args.load_procs)
+        ]
+        for proc in procs:
+            proc.start()
+        outcomes = [queue.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    finally:
+        start = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=args.graceful_timeout + 5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            raise SystemExit(f"gunicorn with {workers} worker(s) did not drain within the graceful timeout")
+        drain = time.perf_counter() - start
+
+    latencies = sorted(latency for outcome in outcomes for latency in outcome[0])
+    errors = sum(outcome[1] for outcome in outcomes)
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+        "shutdown_s": drain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default="mongodb://127.0.0.1:27017/maitech_loadtest")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--path", default="/api/student/dashboard", help="GET path to drive")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--load-procs", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connections per load process")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait after the first worker answers")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    from benchmarks.baseline import add_baseline_arguments, report
+    add_baseline_arguments(parser, default_tolerance=0.3)
+    args = parser.parse_args()
+
+    database = urlparse(args.mongodb_url).path.lstrip("/")
+    if not database.endswith("loadtest"):
+        raise SystemExit("Refusing to run against a database whose name does not end in 'loadtest'")
+    env = dict(os.environ)
+    env.update({key: value for key, value in OFFLINE_DEFAULTS.items() if key not in env})
+    env.update({
+        "MONGODB_URL": args.mongodb_url,
+        "MAIL_TRANSPORT": "memory",
+        # Measure raw throughput, not the limiter's shedding
+        "ADMISSION_ENABLED": "false",
+        # JWKS and Cognito are not reachable offline
+        "WARM_UP_ON_STARTUP": "false",
+        "GUNICORN_GRACEFUL_TIMEOUT": str(args.graceful_timeout),
+    })
+
+    results: Dict[str, float] = {}
+    print(f"GET {args.path}, {args.load_procs} load process(es) x {args.connections} connections, {args.duration:g}s each")
+    print(f"  {'workers':>7}{'req/s':>10}{'scaling':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'stop s':>8}")
+    single = None
+    for workers in [int(value) for value in args.workers.split(",")]:
+        stats = measure(workers, args, env)
+        single = single or stats["rps"]
+        print(f"  {workers:>7}{stats['rps']:>10.0f}{stats['rps'] / single:>8.2f}x"
+              f"{stats['p50_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['errors']:>8}{stats['shutdown_s']:>8.1f}")
+        results[f"w{workers}.rps"] = stats["rps"]
+        results[f"w{workers}.p99_ms"] = stats["p99_ms"]
+    print()
+    higher_is_better = [key for key in results if key.endswith(".rps")]
+    sys.exit(report("worker_scaling", results, args, higher_is_better=higher_is_better))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Production server settings: gunicorn pre-forks uvicorn workers running main:app.
+
+    gunicorn main:app
+
+Settings come from the environment: WEB_CONCURRENCY (workers, default one per
+available core), BIND, GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT,
+GUNICORN_KEEPALIVE and GUNICORN_MAX_REQUESTS. App settings (.env) apply to every
+worker; each worker opens its own MongoDB pool, so the database sees up to
+workers x MONGODB_MAX_POOL_SIZE connections.
+"""
+
+import logging
+import os
+
+# Workers warm MongoDB, Cognito and the JWKS cache before serving (app/core/lifecycle.py)
+os.environ.setdefault("WARM_UP_ON_STARTUP", "true")
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", _available_cores()))
+worker_class = "app.core.server.UvicornWorker"
+
+# Import the app once in the master; the MongoDB client and background loops
+# are created per worker in the lifespan, after the fork
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# Recycle workers after this many requests (0 disables), staggered by the jitter
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    server.log.info("Serving with %d worker(s), event loop %s, HTTP parser %s", server.cfg.workers, loop, http)
+
+
+def post_fork(server, worker):
+    # The app's loggers (warm-up, mail queue, roster imports) write to gunicorn's error log
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = server.log.error_log.handlers
+    app_logger.setLevel(logging.INFO)
+    app_logger.propagate = False
+    server.log.info("Worker %s spawned", worker.pid)
+
+
+def worker_int(worker):
+    worker.log.info("Worker %s interrupted", worker.pid)
+
+
+def worker_abort(worker):
+    worker.log.warning("Worker %s aborted after exceeding the %ss timeout", worker.pid, worker.cfg.timeout)
@@ -1,8 +1,14 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.admission import AdmissionControlMiddleware
 from app.core.config import configurations
+from app.core.health import health_monitor, readiness
+from app.core.lifecycle import warm_up
+from app.core.metrics import MetricsMiddleware, event_loop_lag_monitor, registry, CONTENT_TYPE
+from app.core.process_pool import shutdown_cpu_pool
 from app.api.routes.auth import router as auth_router
 from app.api.routes.user_routes import router as user_router
 from app.api.routes.student_api import router as student_router
@@ -11,21 +17,56 @@ from app.api.routes.class_chat import router as class_chat_router
 from app.api.routes.settings import router as settings_router
 from app.api.routes.teacher import teacher_router
 from app.api.v1.routes.notifications import router as notifications_router
-from app.db.init_db import init_db
+from app.api.routes.admin import router as admin_router
+from app.api.routes.roster_imports import router as roster_imports_router
+from app.api.routes.school_manager import router as school_manager_router
+from app.api.routes.parent import router as parent_router
+from app.api.routes.moderation import router as moderation_router
+from app.db.init_db import init_db, close_db
+from app.services.content_screening import flag_reporter, screening_terms
+from app.services.login_history import login_event_writer
+from app.services.mail_queue import mail_worker_pool
+from app.services.moderation import moderation_queue_monitor
+from app.services.notification_digest import digest_scheduler
+from app.services.roster_import import roster_import_runner
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize Beanie ODM with AsyncMongoClient
     try:
-        await init_db()
+        app.state.mongo_client = await init_db()
         print("✅ Beanie ODM initialized successfully")
     except Exception as e:
         print(f"❌ Beanie init failed: {e}")
         raise
+    await mail_worker_pool.start()
+    print(f"📬 Mail queue started with {mail_worker_pool.size} worker(s)")
+    await digest_scheduler.start()
+    await roster_import_runner.start()
+    await moderation_queue_monitor.start()
+    await login_event_writer.start()
+    await screening_terms.start()
+    await flag_reporter.start()
+    await event_loop_lag_monitor.start()
+    await health_monitor.start(app.state.mongo_client)
+    if configurations.WARM_UP_ON_STARTUP:
+        await warm_up(app.state.mongo_client)
     print("🚀 Starting up MaiTech API")
     yield
     print("🛑 Shutting down")
+    await health_monitor.stop()
+    await event_loop_lag_monitor.stop()
+    await flag_reporter.stop()
+    await screening_terms.stop()
+    await login_event_writer.stop()
+    await moderation_queue_monitor.stop()
+    await roster_import_runner.stop()
+    await digest_scheduler.stop()
+    await mail_worker_pool.stop()
+    shutdown_cpu_pool()
+    await close_db(app.state.mongo_client)
+    print("🔌 MongoDB client closed")
 
 
 app = FastAPI(
@@ -38,6 +79,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost of the three so shed requests still get CORS headers and metrics
+if configurations.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[item.strip() for item in configurations.CORS_ALLOWED_ORIGINS.split(",")],
@@ -45,6 +89,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(auth_router)
@@ -56,24 +101,58 @@ app.include_router(class_chat_router)
 app.include_router(settings_router)
 app.include_router(teacher_router)
 app.include_router(notifications_router)
+app.include_router(admin_router)
+app.include_router(roster_imports_router)
+app.include_router(school_manager_router)
+app.include_router(parent_router)
+app.include_router(moderation_router)
 
 @app.get("/api/health")
+@app.get("/api/health/live")
 async def health():
+    """Liveness: no I/O, only proves the event loop answers"""
     return {"status": "ok"}
 
 
+@app.get("/api/health/ready")
+async def health_ready():
+    """Readiness: 503 while draining, with a saturated MongoDB pool, or when MongoDB does not answer a ping"""
+    ready, body = await readiness(app.state.mongo_client)
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/api/health/deep")
+async def health_deep():
+    """
+    The last background check of MongoDB, the JWKS cache and the mail queue
+    (every HEALTH_CHECK_INTERVAL_SECONDS). 503 when a check fails or no recent
+    report exists; "degraded" still returns 200.
+    """
+    if health_monitor.stale():
+        return JSONResponse({"status": "unknown", "message": "No recent health report"}, status_code=503)
+    report = health_monitor.report
+    return JSONResponse(
+        {**report, "checked_at": report["checked_at"].isoformat()},
+        status_code=503 if report["status"] == "fail" else 200,
+    )
+
+
 @app.get("/api/ping-db")
 async def ping_db():
     """
-    Test database connection using Beanie.
-    Returns user count to verify connection is working.
+    Database connectivity, kept for existing probes: the readiness check
+    (one `ping`), no longer a count of the users collection.
     """
-    from app.db.documents.user import User
-    try:
-        count = await User.find_all().count()
-        return {"status": "connected", "users_in_db": count, "message": "Database connection successful"}
-    except Exception as e:
-        return {"status": "error", "message": f"Database connection failed: {str(e)}"}
+    ready, body = await readiness(app.state.mongo_client)
+    if ready:
+        return {"status": "connected", "message": "Database connection successful"}
+    return JSONResponse({"status": "error", "message": body.get("error") or body["status"]}, status_code=503)
+
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.get("/")